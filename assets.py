@@ -0,0 +1,166 @@
+import pygame
+
+# Only needed to make pitched copies of sounds
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Every enemy used to load and decode its own copy of imgs/Enemy.png. This
+# module keeps a single copy of each image / sound around and hands out the
+# same object to everyone who asks for it.
+# -- Types --
+ColorType = tuple[int, int, int]
+
+
+class AssetLibrary:
+    """Loads each image and sound once and shares the result between every
+    entity that asks for it. Keeps track of how many times each file was
+    actually read from disk so we can make sure the cache is doing its job.
+    """
+
+    def __init__(self):
+        self.images: dict[str, pygame.Surface] = {}
+        self.solids: dict[tuple[tuple[int, int], ColorType], pygame.Surface] = {}
+        self.sounds: dict[str, pygame.mixer.Sound] = {}
+        self.pitched: dict[tuple[str, float], pygame.mixer.Sound] = {}
+
+        # path -> number of times the file was read from disk
+        self.load_counts: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def image(self, path: str) -> pygame.Surface:
+        """Returns the image stored at `path`, loading it the first time it
+        is requested. The returned surface is shared, so don't draw on it.
+        """
+
+        surface = self.images.get(path)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = pygame.image.load(path)
+
+        # .convert() needs a display mode to be set. Headless runs don't have
+        # one, but they don't draw anything either so the raw surface is fine.
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+
+        self._count_load(path)
+        self.images[path] = surface
+        return surface
+
+    def solid(self, size: tuple[int, int], color: ColorType) -> pygame.Surface:
+        """Returns a shared surface of the given size filled with a single
+        color. Used for the entities that don't have any art yet.
+        """
+
+        key = (tuple(size), tuple(color))
+        surface = self.solids.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = pygame.Surface(size)
+        surface.fill(color)
+        self.solids[key] = surface
+        return surface
+
+    def sound(self, path: str) -> pygame.mixer.Sound:
+        """Returns the sound stored at `path`, loading it the first time it
+        is requested.
+        """
+
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.hits += 1
+            return sound
+
+        self.misses += 1
+        sound = pygame.mixer.Sound(path)
+        self._count_load(path)
+        self.sounds[path] = sound
+        return sound
+
+    def pitched_sound(self, path: str, pitch: float) -> pygame.mixer.Sound:
+        """Returns the sound at `path` sped up (pitch > 1) or slowed down
+        (pitch < 1) by resampling it. Without numpy this is just the sound.
+        """
+
+        pitch = round(pitch, 3)
+        if pitch == 1.0 or np is None:
+            return self.sound(path)
+
+        key = (path, pitch)
+        sound = self.pitched.get(key)
+        if sound is not None:
+            self.hits += 1
+            return sound
+
+        self.misses += 1
+        samples = pygame.sndarray.array(self.sound(path))
+        positions = np.arange(0, len(samples) - 1, pitch)
+        # Linear interpolation between the two nearest samples
+        before = positions.astype(np.intp)
+        weight = (positions - before).reshape((-1,) + (1,) * (samples.ndim - 1))
+        resampled = samples[before] * (1 - weight) + samples[before + 1] * weight
+        sound = pygame.sndarray.make_sound(np.ascontiguousarray(resampled.astype(samples.dtype)))
+        self.pitched[key] = sound
+        return sound
+
+    def preload_images(self, paths) -> None:
+        for path in paths:
+            self.image(path)
+
+    def _count_load(self, path: str) -> None:
+        self.load_counts[path] = self.load_counts.get(path, 0) + 1
+
+    def bytes_resident(self) -> int:
+        """Rough estimate of how much memory the cached pixels and samples
+        take up.
+        """
+
+        total = 0
+        for surface in list(self.images.values()) + list(self.solids.values()):
+            total += surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+        mixer_settings = pygame.mixer.get_init()
+        if mixer_settings is not None:
+            frequency, size, channels = mixer_settings
+            bytes_per_sample = abs(size) // 8
+            for sound in list(self.sounds.values()) + list(self.pitched.values()):
+                total += int(sound.get_length() * frequency) * bytes_per_sample * channels
+
+        return total
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        return {
+            "images": len(self.images),
+            "solids": len(self.solids),
+            "sounds": len(self.sounds) + len(self.pitched),
+            "hits": self.hits,
+            "misses": self.misses,
+            "load_counts": dict(self.load_counts),
+            "bytes_resident": self.bytes_resident()
+        }
+
+    def clear(self) -> None:
+        """Forget everything that has been loaded. Mostly useful if the
+        display mode changes and the converted surfaces need to be redone.
+        """
+
+        self.images.clear()
+        self.solids.clear()
+        self.sounds.clear()
+        self.pitched.clear()
+        self.load_counts.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared library used by the entities. Modules should go through this instead
+# of calling pygame.image.load / pygame.mixer.Sound directly.
+library = AssetLibrary()
@@ -0,0 +1,230 @@
+from itertools import chain
+
+import pygame
+
+# Only needed for the texture backend, pygame._sdl2 is still marked as
+# experimental and isn't in every build of pygame.
+try:
+    from pygame._sdl2 import video as sdl2_video
+except ImportError:
+    sdl2_video = None
+
+
+class SpriteAtlas:
+    """Packs every image the game draws (the pngs in imgs/, the solid color
+    placeholders and the bullet images) into one big surface. Drawing a frame
+    is then a single Surface.blits call from the atlas with a source rect per
+    sprite, instead of a blit per sprite for each group.
+
+    Debris slices are subsurfaces of the enemy images, so they're found in
+    the atlas through their parent. Images the atlas hasn't seen yet are still
+    drawn, from their own surface, and get packed in by the next build().
+    Anything with transparency is always drawn from its own surface since the
+    atlas is opaque.
+    """
+
+    def __init__(self, width: int = 512, padding: int = 1):
+        self.width = width
+        self.padding = padding # Gap between images, keeps scaled textures from bleeding
+
+        self.surface: pygame.Surface | None = None
+        self.images: list[pygame.Surface] = [] # Everything in the atlas
+        self.regions: dict[pygame.Surface, pygame.Rect] = {} # Image (or slice of one) -> where it is in the atlas
+
+        # Images seen since the last build(), and ones that can't be packed
+        self.missing: dict[pygame.Surface, None] = {}
+        self.unpackable: set[pygame.Surface] = set()
+        self.builds = 0
+
+    @staticmethod
+    def packable(image: pygame.Surface) -> bool:
+        return (image.get_colorkey() is None and image.get_alpha() is None
+                and not image.get_flags() & pygame.SRCALPHA)
+
+    def add(self, image: pygame.Surface) -> None:
+        """Queues `image` (or the image it's a subsurface of) to be packed
+        by the next build().
+        """
+
+        image = image.get_abs_parent()
+        if image in self.regions or image in self.missing or image in self.unpackable:
+            return
+        if self.packable(image):
+            self.missing[image] = None
+        else:
+            self.unpackable.add(image)
+
+    def build(self) -> None:
+        """(Re)packs everything added so far into a new atlas surface. Rows
+        of images, tallest first, which wastes a bit of space but the images
+        are all about the same size anyway.
+        """
+
+        images = self.images + list(self.missing)
+        self.missing.clear()
+
+        padding = self.padding
+        width = max([self.width] + [image.get_width() for image in images])
+        placed = []
+        x = y = row_height = 0
+        for image in sorted(images, key=lambda image: image.get_height(), reverse=True):
+            w, h = image.get_size()
+            if x + w > width:
+                x = 0
+                y += row_height + padding
+                row_height = 0
+            placed.append((image, pygame.Rect(x, y, w, h)))
+            x += w + padding
+            row_height = max(row_height, h)
+
+        surface = pygame.Surface((width, max(1, y + row_height)))
+        # Same pixel format as the screen so blitting from it is a straight copy
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+
+        regions = {}
+        for image, rect in placed:
+            surface.blit(image, rect)
+            regions[image] = rect
+
+        self.surface = surface
+        self.images = [image for image, _ in placed]
+        self.regions = regions
+        self.builds += 1
+
+    def region(self, image: pygame.Surface) -> pygame.Rect | None:
+        """Where `image` is in the atlas, or None if it isn't (yet)."""
+
+        region = self.regions.get(image)
+        if region is not None:
+            return region
+
+        parent = image.get_abs_parent()
+        parent_region = self.regions.get(parent) if parent is not image else None
+        if parent_region is None:
+            self.add(image)
+            return None
+
+        x, y = image.get_abs_offset()
+        region = self.regions[image] = pygame.Rect(parent_region.x + x, parent_region.y + y, *image.get_size())
+        return region
+
+    def source(self, image: pygame.Surface) -> tuple[pygame.Surface, pygame.Rect | None]:
+        """The (surface, area) to blit from to draw `image`."""
+
+        region = self.regions.get(image) or self.region(image)
+        if region is None:
+            return image, None
+        return self.surface, region
+
+    def blit_sequence(self, sprites) -> list[tuple]:
+        """Everything needed to draw `sprites` at their rects, ready for
+        Surface.blits.
+        """
+
+        atlas = self.surface
+        regions = self.regions
+        sequence = []
+        append = sequence.append
+        for sprite in sprites:
+            image = sprite.image
+            region = regions.get(image) or self.region(image)
+            if region is None:
+                append((image, sprite.rect))
+            else:
+                append((atlas, sprite.rect, region))
+        return sequence
+
+    def draw_groups(self, surface: pygame.Surface, groups: tuple[pygame.sprite.RenderUpdates, ...],
+                    dirty: bool = True) -> list[pygame.Rect]:
+        """Draws every sprite in `groups` (in order) with one Surface.blits
+        call. Otherwise works like calling RenderUpdates.draw on each group:
+        they remember where every sprite went for clear(), and with `dirty`
+        the rects that changed since the groups were last drawn are returned.
+        """
+
+        sprite_lists = [group.sprites() for group in groups]
+        drawn = surface.blits(self.blit_sequence(chain.from_iterable(sprite_lists)))
+
+        changed = []
+        start = 0
+        for group, sprites in zip(groups, sprite_lists):
+            end = start + len(sprites)
+            spritedict = group.spritedict
+            if not dirty:
+                spritedict.update(zip(sprites, drawn[start:end]))
+                group.lostsprites = []
+                start = end
+                continue
+
+            changed.extend(group.lostsprites)
+            group.lostsprites = []
+            for sprite, new_rect in zip(sprites, drawn[start:end]):
+                old_rect = spritedict[sprite]
+                if old_rect:
+                    if new_rect.colliderect(old_rect):
+                        changed.append(new_rect.union(old_rect))
+                    else:
+                        changed.append(new_rect)
+                        changed.append(old_rect)
+                else:
+                    changed.append(new_rect)
+                spritedict[sprite] = new_rect
+            start = end
+        return changed
+
+    def stats(self) -> dict[str, int]:
+        width, height = self.surface.get_size() if self.surface is not None else (0, 0)
+        return {
+            "images": len(self.images),
+            "unpackable": len(self.unpackable),
+            "builds": self.builds,
+            "width": width,
+            "height": height
+        }
+
+
+class TextureAtlas:
+    """Optional hardware accelerated backend for a SpriteAtlas. The atlas is
+    uploaded once (again after every rebuild) as a pygame._sdl2 Texture, and
+    sprites are drawn with the renderer straight from it. Images that aren't
+    in the atlas get a texture of their own.
+    """
+
+    def __init__(self, renderer, atlas: SpriteAtlas):
+        self.renderer = renderer
+        self.atlas = atlas
+        self.texture = None
+        self.uploaded = -1 # atlas.builds when it was last uploaded
+        self.textures: dict[pygame.Surface, object] = {}
+
+    @staticmethod
+    def available() -> bool:
+        return sdl2_video is not None
+
+    def sync(self) -> None:
+        if self.atlas.surface is not None and self.uploaded != self.atlas.builds:
+            self.texture = sdl2_video.Texture.from_surface(self.renderer, self.atlas.surface)
+            self.uploaded = self.atlas.builds
+
+    def texture_for(self, image: pygame.Surface):
+        texture = self.textures.get(image)
+        if texture is None:
+            texture = self.textures[image] = sdl2_video.Texture.from_surface(self.renderer, image)
+        return texture
+
+    def draw(self, images_and_rects) -> None:
+        """Draws each (image, rect) pair with the renderer."""
+
+        self.sync()
+        atlas_surface = self.atlas.surface
+        source = self.atlas.source
+        for image, rect in images_and_rects:
+            surface, area = source(image)
+            if surface is atlas_surface:
+                self.texture.draw(area, rect)
+            else:
+                self.texture_for(image).draw(None, rect)
+
+    def draw_groups(self, groups: tuple[pygame.sprite.AbstractGroup, ...]) -> None:
+        self.draw((sprite.image, sprite.rect) for group in groups for sprite in group.sprites())
@@ -0,0 +1,245 @@
+"""Sound effects through a fixed number of mixer channels.
+
+Calling Sound.play() for every shot and every kill meant a chain of kills
+grabbed a channel per explosion and cut off whatever else was playing.
+Now sounds are only asked for during the frame (play() just counts them),
+and flush() plays them once per frame. Asking for the same sound several
+times in one frame plays it once (a bit louder). Each sound has a limit on
+how many copies can play at once and a priority, and when every channel
+is busy a new sound only takes one over from something less important.
+So the cost per frame depends on how many different sounds there are,
+never on how many enemies died.
+
+Each sound also gets a few variants with slightly different pitch and
+volume, rendered once when the mixer starts, so repeated sounds don't all
+sound identical. (Changing the pitch needs numpy, without it the variants
+only differ in volume.)
+"""
+
+import math
+import random
+
+import pygame
+
+from assets import library
+
+
+class SoundSpec:
+    """A registered sound and its playback rules. Its variants are made
+    when the audio manager starts.
+    """
+
+    def __init__(self, name: str, path: str, priority: int, max_voices: int, volume: float):
+        self.name = name
+        self.path = path
+        self.variants: list[tuple[pygame.mixer.Sound, float]] = [] # (sound, volume) pairs
+        self.priority = priority
+        self.max_voices = max_voices
+        self.volume = volume
+
+
+class AudioManager:
+    """Owns `channels` mixer channels and decides what plays on them. Call
+    play() whenever something makes a noise and flush() once per frame.
+
+    Nothing touches the mixer until start() (or the first flush() with
+    something to play), so creating one is free. If the mixer can't start
+    (no audio device) everything is silently dropped instead.
+    """
+
+    def __init__(self, channels: int = 16, variants: int = 4, pitch_spread: float = 0.08,
+                 volume_spread: float = 0.15):
+        self.num_channels = channels
+        self.channels: list[pygame.mixer.Channel] = []
+        # What each channel was last given: (priority, name, frame started)
+        self.playing: list[tuple[int, str, int] | None] = []
+        self.started = False
+        self.failed = False
+
+        self.num_variants = variants
+        self.pitch_spread = pitch_spread
+        self.volume_spread = volume_spread
+        self.sounds: dict[str, SoundSpec] = {}
+        self.pending: dict[str, int] = {} # name -> times asked for this frame
+
+        # Picking variants must not touch the game's rng, or turning sound
+        # off would change how a seeded game plays out
+        self.rng = random.Random()
+        self.frame = 0
+
+        self.requested = 0
+        self.played = 0
+        self.coalesced = 0 # Requests merged into another one in the same frame
+        self.stolen = 0    # Sounds cut off to make room for a more important one
+        self.dropped = 0   # Sounds that didn't get a channel at all
+
+    def start(self) -> bool:
+        """Starts the mixer and loads every registered sound. main.run does
+        this after the first frame is up, so it isn't part of startup.
+        Returns False if there's no sound.
+        """
+
+        if not self.started:
+            self.started = True
+            try:
+                if pygame.mixer.get_init() is None:
+                    pygame.mixer.init()
+                pygame.mixer.set_num_channels(self.num_channels)
+                self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+                self.playing = [None] * self.num_channels
+                for spec in self.sounds.values():
+                    self.load(spec)
+            except pygame.error:
+                self.failed = True
+        return not self.failed
+
+    def register(self, name: str, path: str, priority: int = 0, max_voices: int = 4,
+                 volume: float = 1.0) -> None:
+        """Adds the sound at `path` under `name`. Higher priorities win
+        channels.
+        """
+
+        spec = self.sounds[name] = SoundSpec(name, path, priority, max_voices, volume)
+        if self.started and not self.failed:
+            self.load(spec)
+
+    def load(self, spec: SoundSpec) -> None:
+        """Loads the sound (through the asset library, so only once) and
+        renders its variants.
+        """
+
+        spec.variants = []
+        for i in range(self.num_variants):
+            # Spread evenly across the range instead of randomly, so every
+            # variant is actually different
+            offset = 0.0 if self.num_variants == 1 else 2 * i / (self.num_variants - 1) - 1
+            pitch = 1.0 + offset * self.pitch_spread
+            variant_volume = spec.volume * (1.0 - self.volume_spread * abs(offset))
+            spec.variants.append((library.pitched_sound(spec.path, pitch), variant_volume))
+
+    def play(self, name: str) -> None:
+        """Asks for `name` to be played this frame. Unknown names are
+        ignored.
+        """
+
+        if name not in self.sounds:
+            return
+        self.requested += 1
+        count = self.pending.get(name, 0)
+        if count:
+            self.coalesced += 1
+        self.pending[name] = count + 1
+
+    def flush(self) -> None:
+        """Plays everything asked for since the last flush, most important
+        first.
+        """
+
+        self.frame += 1
+        if not self.pending:
+            return
+        if not self.start():
+            self.dropped += len(self.pending)
+            self.pending.clear()
+            return
+
+        pending = sorted(self.pending.items(), key=lambda item: -self.sounds[item[0]].priority)
+        self.pending.clear()
+
+        # Forget channels that have finished
+        for i, channel in enumerate(self.channels):
+            if self.playing[i] is not None and not channel.get_busy():
+                self.playing[i] = None
+
+        for name, count in pending:
+            spec = self.sounds[name]
+            index = self.pick_channel(spec)
+            if index is None:
+                self.dropped += 1
+                continue
+
+            if self.playing[index] is not None:
+                self.stolen += 1
+            sound, volume = spec.variants[self.rng.randrange(len(spec.variants))]
+            # The same sound asked for a lot at once gets a little louder
+            # instead of being played over itself
+            volume = min(1.0, volume * (1.0 + 0.25 * math.log2(count)))
+
+            channel = self.channels[index]
+            channel.play(sound)
+            channel.set_volume(volume)
+            self.playing[index] = (spec.priority, name, self.frame)
+            self.played += 1
+
+    def pick_channel(self, spec: SoundSpec) -> int | None:
+        """The oldest copy of this sound if it's already at its voice limit,
+        otherwise a free channel. If every channel is busy, the oldest of the
+        least important sounds playing, as long as it's less important than
+        this one.
+        """
+
+        free = None
+        voices = []
+        weakest = None
+        for i, playing in enumerate(self.playing):
+            if playing is None:
+                if free is None:
+                    free = i
+                continue
+
+            priority, name, started = playing
+            if name == spec.name:
+                voices.append((started, i))
+            if weakest is None or (priority, started) < weakest[:2]:
+                weakest = (priority, started, i)
+
+        if len(voices) >= spec.max_voices:
+            return min(voices)[1]
+        if free is not None:
+            return free
+
+        # Every channel is busy
+        if weakest is not None and weakest[0] < spec.priority:
+            return weakest[2]
+        return None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requested": self.requested,
+            "played": self.played,
+            "coalesced": self.coalesced,
+            "stolen": self.stolen,
+            "dropped": self.dropped,
+            "busy": sum(1 for playing in self.playing if playing is not None)
+        }
+
+
+class NullAudio:
+    """Stands in for AudioManager when there's no sound (headless runs and
+    batch simulations). Never touches the mixer.
+    """
+
+    def __init__(self):
+        self.requested = 0
+
+    def register(self, name: str, path: str, priority: int = 0, max_voices: int = 4,
+                 volume: float = 1.0) -> None:
+        pass
+
+    def play(self, name: str) -> None:
+        self.requested += 1
+
+    def start(self) -> bool:
+        return False
+
+    def flush(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {"requested": self.requested, "played": 0, "coalesced": 0, "stolen": 0, "dropped": 0, "busy": 0}
+
+
+def make_audio(enabled: bool = True, channels: int = 16) -> AudioManager | NullAudio:
+    """An AudioManager, or a NullAudio if sound is turned off."""
+
+    return AudioManager(channels) if enabled else NullAudio()
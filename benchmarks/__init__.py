@@ -0,0 +1,6 @@
+"""Benchmarks for the game's hot paths. Run them from the root of the repo
+so the asset paths resolve, e.g. `python -m benchmarks.collision`.
+
+`python -m benchmarks.suite` runs the regression suite, which saves its
+results as JSON and compares them against a baseline.
+"""
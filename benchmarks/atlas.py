@@ -0,0 +1,103 @@
+"""Time spent drawing a crowd of sprites group by group (a blit per sprite
+from its own image) against one Surface.blits call from the sprite atlas,
+for both the full screen and the dirty rect renderer. Also checks they draw
+the same pixels, and times the pygame._sdl2 texture backend if it's there.
+
+    python -m benchmarks.atlas
+"""
+
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from atlas import TextureAtlas, sdl2_video
+from director import Director
+from enemy import Grunt
+from family import FamilyMember
+from player import Player
+import main
+
+FRAMES = 200
+ENEMIES = 2000
+FAMILY = 200
+
+
+def make_director() -> Director:
+    rng = random.Random(0)
+    screen_rect = main.SCREEN_RECT
+
+    def coords(count: int) -> list[tuple[float, float]]:
+        return [(rng.uniform(0, screen_rect.width), rng.uniform(0, screen_rect.height)) for _ in range(count)]
+
+    director = Director(screen_rect, rng=rng, headless=True)
+    director.load_level({Grunt: coords(ENEMIES), FamilyMember: coords(FAMILY), Player: [screen_rect.center]})
+    director.prepare_atlas()
+    return director
+
+
+def time_frames(draw) -> float:
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        draw()
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def run() -> None:
+    pygame.display.init()
+    screen = pygame.display.set_mode(main.SCREEN_SIZE)
+    director = make_director()
+    groups = (director.moving_enemy_group, director.family_group, director.player_group, director.bullet_group)
+    atlas = director.atlas
+
+    def per_group(dirty: bool) -> None:
+        screen.fill((0, 0, 0))
+        for group in groups:
+            if dirty:
+                group.draw(screen) # RenderUpdates.draw
+            else:
+                pygame.sprite.AbstractGroup.draw(group, screen)
+
+    def batched(dirty: bool) -> None:
+        screen.fill((0, 0, 0))
+        atlas.draw_groups(screen, groups, dirty)
+
+    print(f"{ENEMIES + FAMILY + 1} sprites, {FRAMES} frames (atlas {atlas.stats()})")
+    for dirty in (False, True):
+        name = "dirty rects " if dirty else "full screen "
+        per_group_ms = time_frames(lambda: per_group(dirty))
+        per_group_pixels = pygame.image.tobytes(screen, "RGB")
+        batched_ms = time_frames(lambda: batched(dirty))
+        same = pygame.image.tobytes(screen, "RGB") == per_group_pixels
+        print(f"{name} per group: {per_group_ms:.3f} ms, atlas: {batched_ms:.3f} ms "
+              f"({per_group_ms / batched_ms:.1f}x){'' if same else ' PIXELS DIFFER'}")
+
+    if not TextureAtlas.available():
+        print("pygame._sdl2 isn't available, no texture backend")
+        pygame.quit()
+        return
+
+    window = sdl2_video.Window("atlas benchmark", size=main.SCREEN_SIZE)
+    renderer = sdl2_video.Renderer(window)
+    textures = TextureAtlas(renderer, atlas)
+
+    def textured() -> None:
+        renderer.draw_color = (0, 0, 0, 255)
+        renderer.clear()
+        textures.draw_groups(groups)
+        renderer.present()
+
+    textured_ms = time_frames(textured)
+    same = pygame.image.tobytes(renderer.to_surface(), "RGB") == pygame.image.tobytes(screen, "RGB")
+    print(f"texture backend: {textured_ms:.3f} ms{'' if same else ' PIXELS DIFFER'} "
+          f"(the dummy driver only has a software renderer)")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,155 @@
+"""Compares the old pygame.sprite.spritecollideany collision path with the
+SpatialHash broadphase at different wave sizes, then checks how many hits
+fast bullets miss with end of frame checks compared to swept checks.
+
+    python -m benchmarks.collision
+"""
+
+import os
+import random
+import time
+
+# Benchmarks don't need a window or speakers
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from enemy import Grunt
+from spatial_hash import SpatialHash
+
+SCREEN_RECT = pygame.Rect(0, 0, 800, 800)
+WAVE_SIZES = (100, 1_000, 10_000)
+NUM_BULLETS = 50
+FRAMES = 20
+SWEEP_ENEMIES = 200
+
+
+def make_sprites(num: int, size: tuple[int, int], rng: random.Random) -> list[pygame.sprite.Sprite]:
+    sprites = []
+    for _ in range(num):
+        sprite = pygame.sprite.Sprite()
+        sprite.rect = pygame.Rect((0, 0), size)
+        sprite.rect.center = (rng.uniform(0, SCREEN_RECT.width), rng.uniform(0, SCREEN_RECT.height))
+        sprites.append(sprite)
+    return sprites
+
+
+def jiggle(sprites: list[pygame.sprite.Sprite], rng: random.Random) -> None:
+    """Moves every sprite a few pixels, like a frame of enemy movement."""
+
+    for sprite in sprites:
+        sprite.rect.move_ip(rng.randint(-2, 2), rng.randint(-2, 2))
+        sprite.rect.clamp_ip(SCREEN_RECT)
+
+
+def bench_spritecollideany(enemies: pygame.sprite.Group, enemy_list, probes, rng: random.Random) -> float:
+    """Average seconds per frame spent on collisions, the movement itself is
+    not timed.
+    """
+
+    elapsed = 0.0
+    for _ in range(FRAMES):
+        jiggle(enemy_list, rng)
+        start = time.perf_counter()
+        for probe in probes:
+            pygame.sprite.spritecollideany(probe, enemies)
+        elapsed += time.perf_counter() - start
+    return elapsed / FRAMES
+
+
+def bench_spatial_hash(enemies: pygame.sprite.Group, enemy_list, probes, rng: random.Random) -> tuple[float, float]:
+    """Average seconds per frame spent syncing the index and spent querying
+    it.
+    """
+
+    index = SpatialHash(SCREEN_RECT)
+    index.rebuild(enemies)
+    sync_time = 0.0
+    query_time = 0.0
+    for _ in range(FRAMES):
+        jiggle(enemy_list, rng)
+        start = time.perf_counter()
+        index.sync(enemies)
+        middle = time.perf_counter()
+        for probe in probes:
+            index.collide_any(probe)
+        query_time += time.perf_counter() - middle
+        sync_time += middle - start
+    return sync_time / FRAMES, query_time / FRAMES
+
+
+def bench_bullet_paths(enemies: SpatialHash, bullet_size: tuple[int, int], step: float,
+                       rng: random.Random) -> tuple[int, int, float, float]:
+    """Fires NUM_BULLETS * FRAMES bullets that each move `step` pixels and
+    returns (hits with collide_any at the end position, hits with sweep,
+    seconds per frame for collide_any, seconds per frame for sweep).
+    """
+
+    paths = []
+    for _ in range(NUM_BULLETS * FRAMES):
+        start = (rng.uniform(0, SCREEN_RECT.width), rng.uniform(0, SCREEN_RECT.height))
+        direction = pygame.math.Vector2(1, 0).rotate(rng.uniform(0, 360)) * step
+        paths.append((start, (start[0] + direction.x, start[1] + direction.y)))
+
+    probe = pygame.sprite.Sprite()
+    probe.rect = pygame.Rect((0, 0), bullet_size)
+    half_size = (bullet_size[0] / 2, bullet_size[1] / 2)
+
+    start_time = time.perf_counter()
+    end_hits = 0
+    for _, end in paths:
+        probe.rect.center = end
+        end_hits += enemies.collide_any(probe) is not None
+    end_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    swept_hits = 0
+    for start, end in paths:
+        swept_hits += enemies.sweep(start, end, half_size)[0] is not None
+    swept_time = time.perf_counter() - start_time
+
+    return end_hits, swept_hits, end_time / FRAMES, swept_time / FRAMES
+
+
+def run() -> None:
+    pygame.display.init()
+    pygame.display.set_mode(SCREEN_RECT.size)
+    enemy_size = Grunt((0, 0), SCREEN_RECT).rect.size
+
+    print(f"{NUM_BULLETS} bullets + player per frame, {FRAMES} frames per size")
+    print(f"{'enemies':>8} {'spritecollideany':>18} {'hash sync':>12} {'hash query':>12} {'speedup':>8}")
+    for num_enemies in WAVE_SIZES:
+        rng = random.Random(num_enemies)
+        enemy_list = make_sprites(num_enemies, enemy_size, rng)
+        enemies = pygame.sprite.Group(enemy_list)
+
+        # Bullets are tiny, so most of them will be sitting in empty space
+        # which is the worst case for spritecollideany (it has to check
+        # everything before giving up). The last probe stands in for the
+        # player.
+        probes = make_sprites(NUM_BULLETS, (2, 2), rng) + make_sprites(1, enemy_size, rng)
+
+        naive = bench_spritecollideany(enemies, enemy_list, probes, random.Random(0))
+        sync_time, query_time = bench_spatial_hash(enemies, enemy_list, probes, random.Random(0))
+        speedup = naive / (sync_time + query_time)
+        print(f"{num_enemies:>8} {naive * 1000:>15.3f} ms {sync_time * 1000:>9.3f} ms "
+              f"{query_time * 1000:>9.3f} ms {speedup:>7.1f}x")
+
+    # 1000 px/s bullets at 120, 60 and 30 frames per second. Bullets are
+    # 24 px lines, so a flat one is a 24x1 rect.
+    print()
+    print(f"{SWEEP_ENEMIES} enemies, {NUM_BULLETS} bullets per frame, hits counted over {FRAMES} frames")
+    print(f"{'step':>8} {'end hits':>10} {'swept hits':>11} {'end check':>12} {'swept':>12}")
+    index = SpatialHash(SCREEN_RECT)
+    index.rebuild(make_sprites(SWEEP_ENEMIES, enemy_size, random.Random(1)))
+    for step in (1000 / 120, 1000 / 60, 1000 / 30):
+        end_hits, swept_hits, end_time, swept_time = bench_bullet_paths(index, (24, 1), step, random.Random(2))
+        print(f"{step:>5.1f} px {end_hits:>10} {swept_hits:>11} {end_time * 1000:>9.3f} ms "
+              f"{swept_time * 1000:>9.3f} ms")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
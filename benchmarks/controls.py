@@ -0,0 +1,93 @@
+"""Cost of reading the controllers each frame, and how many memory blocks
+it leaves allocated. Two controllers are fed a stream of JOYAXISMOTION
+events (like a player wiggling both sticks) and the player is moved from
+the snapshot, analog and 8-way.
+
+    python -m benchmarks.controls
+
+No real joystick is needed, the controllers are made without one and the
+events are built by hand.
+"""
+
+import math
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from controls import Controls, Controller, LEFT_STICK, RIGHT_STICK
+from player import Player
+import main
+
+FRAMES = 20_000
+EVENTS_PER_FRAME = 4 # Both axes of both sticks
+
+
+def make_events(frames: int, instance_id: int) -> list[list[pygame.event.Event]]:
+    """Each frame's events for one controller, sticks going round in circles."""
+
+    events = []
+    for frame in range(frames):
+        angle = frame / 30
+        values = (math.cos(angle), math.sin(angle), math.cos(-angle), math.sin(-angle))
+        axes = LEFT_STICK + RIGHT_STICK
+        events.append([pygame.event.Event(pygame.JOYAXISMOTION, instance_id=instance_id, axis=axis, value=value)
+                       for axis, value in zip(axes, values)])
+    return events
+
+
+def play(controls: Controls, events: list[list[pygame.event.Event]]) -> tuple[float, float]:
+    """Returns (microseconds per frame, blocks still allocated per frame)."""
+
+    player = Player(main.SCREEN_RECT.center, main.SCREEN_RECT)
+    keys = [False] * 512
+    delta = 1 / 60
+    handle_event = controls.handle_event
+
+    def frame(frame_events: list[pygame.event.Event]) -> None:
+        for event in frame_events:
+            handle_event(event)
+        movement, shooting = controls.snapshot(0).vectors()
+        player.update(delta, keys, movement)
+
+    # Warm up, so anything made once up front isn't counted
+    for frame_events in events[:100]:
+        frame(frame_events)
+
+    start = time.perf_counter()
+    for frame_events in events:
+        frame(frame_events)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for frame_events in events:
+        frame(frame_events)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "lineno")
+                 if stat.traceback[0].filename != tracemalloc.__file__)
+    return elapsed / len(events) * 1e6, blocks / len(events)
+
+
+def run() -> None:
+    # Player 2's controller moves too, it just isn't read
+    events = [first + second for first, second in zip(make_events(FRAMES, 0), make_events(FRAMES, 1))]
+
+    for directions in (None, 8):
+        controls = Controls(players=2, directions=directions)
+        controls.add(Controller(0))
+        controls.add(Controller(1))
+        us, blocks = play(controls, events)
+        name = "analog" if directions is None else f"{directions}-way"
+        print(f"{name:>6}: {us:.2f} us/frame ({EVENTS_PER_FRAME * 2} events), "
+              f"{blocks:.3f} blocks left allocated per frame")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""Times Director.update with the per-sprite enemy / family updates against
+the numpy EntityStore, and checks that both end up in the same place. Then
+times whole displayed frames the way main.run plays them (two 120 Hz steps
+and a draw), where the store only writes the sprites back once.
+
+    python -m benchmarks.entity_store
+"""
+
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from director import Director
+from enemy import Grunt
+from family import FamilyMember
+from player import Player
+from entity_store import EntityStore
+import helper_funcs
+
+SCREEN_RECT = pygame.Rect(0, 0, 800, 800)
+WAVE_SIZES = (500, 5_000, 20_000)
+NUM_FAMILY = 50
+FRAMES = 60
+SIM_STEP = 1 / 120
+STEPS_PER_FRAME = 2 # 120 Hz simulation on a 60 Hz display
+
+
+def build_director(num_grunts: int, use_entity_store: bool) -> Director:
+    random.seed(num_grunts)
+    director = Director(SCREEN_RECT, use_entity_store=use_entity_store, headless=True, infinite_lives=True)
+    director.load_level({
+        Grunt: helper_funcs.generate_rand_coords(SCREEN_RECT, num_grunts),
+        FamilyMember: helper_funcs.generate_rand_coords(SCREEN_RECT, NUM_FAMILY, 0.2, 0.9),
+        Player: [SCREEN_RECT.center]
+    })
+    return director
+
+
+def run_frames(director: Director) -> float:
+    """Returns the average seconds per frame spent moving enemies and family
+    members (collisions and everything else in Director.update excluded).
+    """
+
+    random.seed(0)
+    delta = 1 / 60
+    elapsed = 0.0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        if director.entity_store is not None:
+            director.entity_store.update(delta, director.player.position, director.moving_enemy_group,
+                                         director.family_group)
+        else:
+            director.moving_enemy_group.update(delta, director.player.position)
+            director.family_group.update(delta)
+        elapsed += time.perf_counter() - start
+    return elapsed / FRAMES
+
+
+def displayed_frame(director: Director, surface: pygame.Surface) -> float:
+    """Returns the average ms per displayed frame, everything included."""
+
+    keys = [False] * 512
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        for step in range(STEPS_PER_FRAME):
+            if step == STEPS_PER_FRAME - 1:
+                director.save_previous_positions()
+            director.update(SIM_STEP, keys, (None, None))
+        director.draw(surface, 1.0, SIM_STEP)
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def max_difference(a: Director, b: Director) -> float:
+    worst = 0.0
+    for group_a, group_b in ((a.enemy_group, b.enemy_group), (a.family_group, b.family_group)):
+        for sprite_a, sprite_b in zip(group_a, group_b):
+            worst = max(worst, sprite_a.position.distance_to(sprite_b.position))
+    return worst
+
+
+def run() -> None:
+    if not EntityStore.available():
+        print("numpy is not installed, nothing to compare")
+        return
+
+    pygame.init()
+    pygame.display.set_mode(SCREEN_RECT.size)
+
+    print(f"{FRAMES} frames, {NUM_FAMILY} family members")
+    print(f"{'grunts':>8} {'per-sprite':>12} {'store':>10} {'speedup':>8} {'max diff':>10}")
+    for num_grunts in WAVE_SIZES:
+        sprites = build_director(num_grunts, use_entity_store=False)
+        store = build_director(num_grunts, use_entity_store=True)
+
+        per_sprite_time = run_frames(sprites)
+        store_time = run_frames(store)
+        difference = max_difference(sprites, store)
+        print(f"{num_grunts:>8} {per_sprite_time * 1000:>9.3f} ms {store_time * 1000:>7.3f} ms "
+              f"{per_sprite_time / store_time:>7.1f}x {difference:>10.2e}")
+
+    surface = pygame.display.get_surface()
+    print(f"whole frames, {STEPS_PER_FRAME} steps + draw (16.7 ms is 60 FPS)")
+    for num_grunts in WAVE_SIZES[:2]:
+        per_sprite_ms = displayed_frame(build_director(num_grunts, use_entity_store=False), surface)
+        store_ms = displayed_frame(build_director(num_grunts, use_entity_store=True), surface)
+        print(f"{num_grunts:>8} {per_sprite_ms:>9.3f} ms {store_ms:>7.3f} ms {per_sprite_ms / store_ms:>7.1f}x")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,131 @@
+"""Times moving homing enemies around obstacles with the flow field, per
+sprite and through the EntityStore, against heading straight for the
+player with no obstacles. The field is only recomputed when the player
+changes cells, so that cost is reported on its own. Also checks that no
+enemy ever steps into an obstacle, on a screen scattered with random ones.
+
+    python -m benchmarks.pathing
+"""
+
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from director import Director
+from enemy import Grunt
+from player import Player
+from entity_store import EntityStore
+from flow_field import FlowField
+import helper_funcs
+
+SCREEN_RECT = pygame.Rect(0, 0, 800, 800)
+WAVE_SIZES = (100, 1_000, 10_000)
+FRAMES = 60
+
+# Obstacle check, see count_trespassers()
+RANDOM_OBSTACLES = 60
+CHECK_GRUNTS = 200
+CHECK_SEEDS = 10
+CHECK_FRAMES = 600
+
+# A few walls between the edges of the screen and the player
+OBSTACLES = (pygame.Rect(150, 250, 500, 32), pygame.Rect(150, 550, 500, 32),
+             pygame.Rect(250, 150, 32, 500), pygame.Rect(550, 150, 32, 500))
+
+
+def build_director(num_grunts: int, use_entity_store: bool, obstacles: bool) -> Director:
+    director = Director(SCREEN_RECT, use_entity_store=use_entity_store, rng=random.Random(0), headless=True)
+    director.load_level({
+        Grunt: helper_funcs.generate_rand_coords(SCREEN_RECT, num_grunts, 0.7, 1.0, random.Random(num_grunts)),
+        Player: [SCREEN_RECT.center]
+    })
+    if obstacles:
+        for rect in OBSTACLES:
+            director.add_obstacle(rect)
+    return director
+
+
+def run_frames(director: Director) -> float:
+    """Average seconds per frame spent moving the enemies."""
+
+    delta = 1 / 60
+    elapsed = 0.0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        if director.entity_store is not None:
+            director.entity_store.update(delta, director.player.position, director.moving_enemy_group,
+                                         director.family_group, director.rng, director.flow_field)
+        else:
+            director.moving_enemy_group.update(delta, director.player.position, director.flow_field)
+        elapsed += time.perf_counter() - start
+    return elapsed / FRAMES
+
+
+def count_trespassers(seed: int, use_entity_store: bool) -> tuple[int, int]:
+    """Scatters random one cell obstacles (none on the player) and walks
+    a wave of Grunts at the player. Returns (how many ever stood in a
+    blocked cell, how many there were).
+    """
+
+    rng = random.Random(seed)
+    director = Director(SCREEN_RECT, use_entity_store=use_entity_store, rng=rng, headless=True)
+    player_cell = (SCREEN_RECT.centerx // 32, SCREEN_RECT.centery // 32)
+    for _ in range(RANDOM_OBSTACLES):
+        cell = (rng.randrange(SCREEN_RECT.width // 32), rng.randrange(SCREEN_RECT.height // 32))
+        if cell != player_cell:
+            director.add_obstacle(pygame.Rect(cell[0] * 32, cell[1] * 32, 32, 32))
+
+    field = director.flow_field
+    coords = [pos for pos in helper_funcs.generate_rand_coords(SCREEN_RECT, CHECK_GRUNTS, 0.3, 1.0, rng)
+              if not field.is_blocked(pos)]
+    director.load_level({Grunt: coords, Player: [SCREEN_RECT.center]})
+
+    trespassers = set()
+    for _ in range(CHECK_FRAMES // FRAMES):
+        run_frames(director)
+        trespassers.update(grunt for grunt in director.moving_enemy_group if field.is_blocked(grunt.position))
+    return len(trespassers), len(coords)
+
+
+def run() -> None:
+    pygame.init()
+    pygame.display.set_mode(SCREEN_RECT.size)
+
+    field = FlowField(SCREEN_RECT)
+    for rect in OBSTACLES:
+        field.add_obstacle(rect)
+    field.field(0) # Neighbour lists are built once per set of obstacles
+    start = time.perf_counter()
+    for index in range(1, 21):
+        field.field(index)
+    print(f"flow field recompute ({field.cols}x{field.rows} cells): "
+          f"{(time.perf_counter() - start) / 20 * 1000:.2f} ms")
+
+    use_store = EntityStore.available()
+    print(f"{FRAMES} frames per size")
+    print(f"{'grunts':>8} {'straight':>12} {'flow field':>12} {'store + field':>14}")
+    for num_grunts in WAVE_SIZES:
+        straight = run_frames(build_director(num_grunts, False, False))
+        flow = run_frames(build_director(num_grunts, False, True))
+        store = f"{run_frames(build_director(num_grunts, True, True)) * 1000:>11.3f} ms" if use_store else "-"
+        print(f"{num_grunts:>8} {straight * 1000:>9.3f} ms {flow * 1000:>9.3f} ms {store:>14}")
+
+    for use_entity_store in (False, True) if use_store else (False,):
+        trespassers = grunts = 0
+        for seed in range(CHECK_SEEDS):
+            seed_trespassers, seed_grunts = count_trespassers(seed, use_entity_store)
+            trespassers += seed_trespassers
+            grunts += seed_grunts
+        print(f"{'store' if use_entity_store else 'per sprite'}: {trespassers}/{grunts} grunts walked into "
+              f"an obstacle ({CHECK_SEEDS} layouts of {RANDOM_OBSTACLES} random obstacles)")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,91 @@
+"""Plays a long wave where enemies keep getting spawned (like Spheroids and
+Quarks will) and shot, with and without the spawner's enemy pools. Reports
+how many enemies had to be made, the pools' hit rate, the time per frame
+and how much memory is in use as the wave goes on (with tracemalloc).
+
+    python -m benchmarks.pooling
+"""
+
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from director import Director
+from enemy import Grunt
+from player import Player
+import helper_funcs
+
+SCREEN_RECT = pygame.Rect(0, 0, 800, 800)
+FRAMES = 1800 # Half a minute at 60 fps
+SPAWNS_PER_FRAME = 5
+ALIVE = 500 # Enemies on screen, one gets killed for every one spawned past this
+CHECKPOINTS = 4
+
+
+def build_director() -> Director:
+    director = Director(SCREEN_RECT, rng=random.Random(0), headless=True, infinite_lives=True)
+    director.load_level({
+        Grunt: helper_funcs.generate_rand_coords(SCREEN_RECT, ALIVE, 0.7, 1.0, random.Random(1)),
+        Player: [SCREEN_RECT.center]
+    })
+    return director
+
+
+def play_wave(pooled: bool, track_memory: bool) -> tuple[float, list[int], dict[str, int | float]]:
+    """Returns (seconds per frame, memory in use at each checkpoint, the
+    Grunt pool's stats). Without pooling every spawned enemy is left to
+    the garbage collector when it dies, like before the spawner.
+    """
+
+    director = build_director()
+    rng = random.Random(2)
+    delta = 1 / 60
+    no_keys = [False] * 512
+    memory = []
+
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        for _ in range(SPAWNS_PER_FRAME):
+            enemy = director.create_enemy(Grunt, (rng.uniform(0, SCREEN_RECT.width), rng.uniform(0, 100)))
+            if not pooled:
+                enemy.pool = None
+
+        # Stands in for the player's bullets, keeping the wave the same size
+        enemies = director.enemy_group.sprites()
+        for enemy in rng.sample(enemies, max(0, len(enemies) - ALIVE)):
+            enemy.kill()
+            director.enemy_index.remove(enemy)
+
+        director.update(delta, no_keys, (None, None))
+        if track_memory and (frame + 1) % (FRAMES // CHECKPOINTS) == 0:
+            memory.append(tracemalloc.get_traced_memory()[0])
+    elapsed = time.perf_counter() - start
+    if track_memory:
+        tracemalloc.stop()
+
+    return elapsed / FRAMES, memory, director.spawner.stats()["Grunt"]
+
+
+def run() -> None:
+    pygame.init()
+    pygame.display.set_mode(SCREEN_RECT.size)
+
+    print(f"{FRAMES} frames, {SPAWNS_PER_FRAME} spawns per frame, {ALIVE} enemies alive")
+    for pooled in (False, True):
+        frame_time, _, stats = play_wave(pooled, False)
+        _, memory, _ = play_wave(pooled, True)
+        print(f"{'pooled' if pooled else 'unpooled':>9}: {frame_time * 1000:.2f} ms/frame, "
+              f"{stats['created']} enemies made ({stats['hit_rate']:.0%} reused), memory in use "
+              + " -> ".join(f"{used / 1024:.0f} KiB" for used in memory))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,78 @@
+"""Frame time of the full screen renderer (background + draw everything +
+update the whole display) against the dirty rect renderer, on the stock
+level from main.py. Also checks that both end up with the same pixels on screen.
+
+    python -m benchmarks.rendering
+
+With the dummy video driver pygame.display.update doesn't push pixels
+anywhere, so on real hardware the gap will be bigger than this shows.
+"""
+
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from director import Director
+from headless import random_input
+import main
+
+FRAMES = 600
+DELTA = 1 / 60
+
+
+def play(dirty: bool, screen: pygame.Surface) -> tuple[float, float]:
+    """Plays the stock level and returns the average ms spent drawing per
+    frame and the average fraction of the screen pushed to the display.
+    """
+
+    rng = random.Random(0)
+    director = Director(main.SCREEN_RECT, rng=rng, headless=True, infinite_lives=True)
+    director.load_level(main.stock_level(rng))
+    director.set_dirty_rendering(dirty)
+    script = random_input(0, FRAMES)
+    screen_area = main.SCREEN_RECT.width * main.SCREEN_RECT.height
+
+    draw_time = 0.0
+    area = 0
+    for frame in range(FRAMES):
+        frame_input = script.frame(frame)
+        director.update(DELTA, frame_input.keys, (frame_input.movement, frame_input.shooting))
+
+        start = time.perf_counter()
+        if dirty:
+            rects = director.draw_dirty(screen)
+            pygame.display.update(rects)
+            area += sum(rect.width * rect.height for rect in rects)
+        else:
+            director.draw(screen)
+            pygame.display.update()
+            area += screen_area
+        draw_time += time.perf_counter() - start
+
+    return draw_time / FRAMES * 1000, area / FRAMES / screen_area
+
+
+def run() -> None:
+    pygame.display.init()
+    screen = pygame.display.set_mode(main.SCREEN_SIZE)
+
+    full_ms, full_area = play(False, screen)
+    full_pixels = pygame.image.tobytes(screen, "RGB")
+    dirty_ms, dirty_area = play(True, screen)
+    dirty_pixels = pygame.image.tobytes(screen, "RGB")
+
+    print(f"{FRAMES} frames of the stock level")
+    print(f"full screen: {full_ms:.3f} ms/frame, {full_area:.1%} of the screen updated")
+    print(f"dirty rects: {dirty_ms:.3f} ms/frame, {dirty_area:.1%} of the screen updated")
+    print("final frames match" if full_pixels == dirty_pixels else "FINAL FRAMES DIFFER")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,79 @@
+"""Shots per second with a brand new Bullet (and image) per shot, like
+Director.shoot used to do, against the pooled bullets with cached images.
+
+    python -m benchmarks.shooting
+"""
+
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from bullet import Bullet, BulletPool, BulletImageCache, FAITHFUL_DIRECTIONS, ANALOG_DIRECTIONS
+import helper_funcs
+
+SCREEN_RECT = pygame.Rect(0, 0, 800, 800)
+SHOTS = 50_000
+LIVE_BULLETS = 32 # About how many bullets are on screen at once
+
+
+def aim(shot: int) -> pygame.math.Vector2:
+    """Spins the aim around, like someone sweeping the right stick."""
+
+    return helper_funcs.vec2_from_polar(1, shot * 7.3)
+
+
+def bench_unpooled() -> float:
+    group = pygame.sprite.Group()
+    start = time.perf_counter()
+    for shot in range(SHOTS):
+        group.add(Bullet(SCREEN_RECT.center, aim(shot), SCREEN_RECT, None))
+        if len(group) >= LIVE_BULLETS:
+            for bullet in group.sprites():
+                bullet.kill()
+    return SHOTS / (time.perf_counter() - start)
+
+
+def bench_pooled(directions: int) -> tuple[float, int]:
+    """Returns the shots per second and how many bullet images were drawn
+    after warming up.
+    """
+
+    group = pygame.sprite.Group()
+    pool = BulletPool(SCREEN_RECT, None, BulletImageCache(directions))
+
+    # Warm up, every direction gets drawn once
+    for shot in range(1000):
+        group.add(pool.acquire(SCREEN_RECT.center, aim(shot)))
+    for bullet in group.sprites():
+        bullet.kill()
+    warm_misses = pool.image_cache.misses
+
+    start = time.perf_counter()
+    for shot in range(SHOTS):
+        group.add(pool.acquire(SCREEN_RECT.center, aim(shot)))
+        if len(group) >= LIVE_BULLETS:
+            for bullet in group.sprites():
+                bullet.kill()
+    return SHOTS / (time.perf_counter() - start), pool.image_cache.misses - warm_misses
+
+
+def run() -> None:
+    pygame.display.init()
+    pygame.display.set_mode(SCREEN_RECT.size)
+
+    before = bench_unpooled()
+    print(f"{'new Bullet per shot':>28}: {before:>10.0f} shots/s")
+    for directions in (FAITHFUL_DIRECTIONS, ANALOG_DIRECTIONS):
+        after, surfaces = bench_pooled(directions)
+        print(f"{f'pooled, {directions} directions':>28}: {after:>10.0f} shots/s "
+              f"({after / before:.1f}x, {surfaces} surfaces allocated after warm up)")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
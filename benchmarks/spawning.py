@@ -0,0 +1,58 @@
+"""Compares generate_rand_coords with the batched generate_spawn_coords at
+stress wave sizes, plus the cost of the spacing / exclusion constraints.
+
+    python -m benchmarks.spawning
+"""
+
+import os
+import random
+import time
+
+# Benchmarks don't need a window or speakers
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import helper_funcs
+
+SCREEN_RECT = pygame.Rect(0, 0, 800, 800)
+WAVE_SIZES = (1_000, 10_000, 50_000)
+REPEATS = 5
+
+
+def best_of(func) -> float:
+    """Fastest of REPEATS runs in seconds."""
+
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run() -> None:
+    if helper_funcs.np is None:
+        print("numpy isn't installed, generate_spawn_coords is using the plain Python path")
+
+    # Warm up numpy so its first-call setup isn't counted
+    helper_funcs.generate_spawn_coords(SCREEN_RECT, 10, rng=0)
+
+    print(f"{'spawns':>8} {'generate_rand_coords':>22} {'batched':>12} {'speedup':>8} {'constrained':>14}")
+    for num in WAVE_SIZES:
+        rng = random.Random(num)
+        naive = best_of(lambda: helper_funcs.generate_rand_coords(SCREEN_RECT, num, rng=rng))
+        batched = best_of(lambda: helper_funcs.generate_spawn_coords(SCREEN_RECT, num, rng=rng))
+
+        # Spacing small enough that the ring can actually fit `num` spawns
+        constrained = best_of(lambda: helper_funcs.generate_spawn_coords(
+            SCREEN_RECT, num, 0.1, 1.0, rng=rng, min_spacing=300 / num ** 0.5,
+            exclude_center=SCREEN_RECT.center, exclude_radius=60, area_uniform=True))
+
+        print(f"{num:>8} {naive * 1000:>19.2f} ms {batched * 1000:>9.2f} ms {naive / batched:>7.1f}x "
+              f"{constrained * 1000:>11.2f} ms")
+
+
+if __name__ == "__main__":
+    run()
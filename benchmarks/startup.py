@@ -0,0 +1,112 @@
+"""Times a cold start of the game: how long the imports take, and how long
+from launching Python until the first frame is on screen. Every run is a
+fresh interpreter, so nothing is cached from the one before.
+
+Also times what pygame.init() (every module, the way the game used to
+start) costs on top of only starting the display.
+
+    python -m benchmarks.startup
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+RUNS = 5
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child. Notes when the first frame gets pushed to the screen.
+FIRST_FRAME_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import pygame
+import main
+imported = time.perf_counter()
+first_frame = []
+update = pygame.display.update
+def timed_update(*args):
+    if not first_frame:
+        first_frame.append(time.perf_counter())
+    return update(*args)
+pygame.display.update = timed_update
+main.run(record=False, max_frames=1)
+print(json.dumps({"import": imported - start, "first_frame": first_frame[0] - start}))
+"""
+
+INIT_SCRIPT = """
+import json, time
+import pygame
+start = time.perf_counter()
+pygame.display.init()
+display = time.perf_counter() - start
+pygame.quit()
+start = time.perf_counter()
+pygame.init()
+everything = time.perf_counter() - start
+print(json.dumps({"display": display, "everything": everything}))
+"""
+
+
+def run_child(args: list[str]) -> tuple[float, str, str]:
+    """Runs Python with `args` from the repo root. Returns (seconds from
+    launch to exit, stdout, stderr).
+    """
+
+    # pygame prints a banner on import, keep it out of stdout
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True)
+    return time.perf_counter() - start, result.stdout, result.stderr
+
+
+def import_times(module: str) -> dict[str, float]:
+    """Cumulative import time in seconds of `module` and each top level
+    package it pulled in, from python -X importtime.
+    """
+
+    _, _, stderr = run_child(["-X", "importtime", "-c", f"import {module}"])
+    times = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if match is not None and len(match.group(2)) <= 3: # Only the top few levels
+            name = match.group(3)
+            times[name] = times.get(name, 0) + int(match.group(1)) / 1e6
+    return times
+
+
+def run() -> None:
+    print(f"median of {RUNS} fresh interpreters")
+
+    interpreter = statistics.median(run_child(["-c", "pass"])[0] for _ in range(RUNS))
+    print(f"{'python itself':>28}: {interpreter * 1000:8.1f} ms")
+
+    for module in ("helper_funcs", "director", "main"):
+        runs = [import_times(module) for _ in range(RUNS)]
+        total = statistics.median(times.get(module, 0.0) for times in runs)
+        pygame_time = statistics.median(times.get("pygame", 0.0) for times in runs)
+        print(f"{'import ' + module:>28}: {total * 1000:8.1f} ms ({pygame_time * 1000:.1f} ms of it pygame)")
+
+    inits = [json.loads(run_child(["-c", INIT_SCRIPT])[1]) for _ in range(RUNS)]
+    print(f"{'pygame.display.init()':>28}: {statistics.median(i['display'] for i in inits) * 1000:8.1f} ms")
+    print(f"{'pygame.init()':>28}: {statistics.median(i['everything'] for i in inits) * 1000:8.1f} ms")
+
+    launches = []
+    for _ in range(RUNS):
+        total, stdout, _ = run_child(["-c", FIRST_FRAME_SCRIPT])
+        launches.append((total, json.loads(stdout)))
+    first_frame = statistics.median(times["first_frame"] for _, times in launches)
+    whole_run = statistics.median(total for total, _ in launches)
+    print(f"{'launch to first frame':>28}: {first_frame * 1000:8.1f} ms (after the interpreter is up)")
+    print(f"{'launch, one frame and exit':>28}: {whole_run * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    run()
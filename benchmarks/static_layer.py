@@ -0,0 +1,83 @@
+"""Frame time of a wave of stationary Electrodes against an empty screen.
+With the static layer the Electrodes are drawn into the background once, so
+a screen full of them should cost about the same as no enemies at all. The
+old way (clear the screen, then update and blit every Electrode each frame)
+is timed too for comparison.
+
+    python -m benchmarks.static_layer
+"""
+
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from director import Director
+from enemy import Electrode
+from player import Player
+import helper_funcs
+import main
+
+FRAMES = 600
+ELECTRODES = 500
+DELTA = 1 / 60
+
+
+def make_director(electrodes: int) -> Director:
+    rng = random.Random(0)
+    director = Director(main.SCREEN_RECT, rng=rng, headless=True)
+    director.load_level({
+        # Kept away from the middle so the player (who stands still) is never hit
+        Electrode: helper_funcs.generate_rand_coords(main.SCREEN_RECT, electrodes, 0.3, 1.0, rng),
+        Player: [main.SCREEN_RECT.center]
+    })
+    return director
+
+
+def play(director: Director, screen: pygame.Surface, per_sprite: bool = False) -> float:
+    """Average ms per frame spent updating and drawing. per_sprite does it
+    the way it was done before the static layer.
+    """
+
+    keys = [False] * 512
+    elapsed = 0.0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        if per_sprite:
+            director.enemy_group.update(DELTA, director.player.position)
+            director.player_group.update(DELTA, keys, None)
+            screen.fill((0, 0, 0))
+            director.enemy_group.draw(screen)
+            director.player_group.draw(screen)
+        else:
+            director.update(DELTA, keys, (None, None))
+            director.draw(screen)
+        pygame.display.update()
+        elapsed += time.perf_counter() - start
+    return elapsed / FRAMES * 1000
+
+
+def run() -> None:
+    pygame.display.init()
+    screen = pygame.display.set_mode(main.SCREEN_SIZE)
+
+    empty_ms = play(make_director(0), screen)
+    director = make_director(ELECTRODES)
+    layered_ms = play(director, screen)
+    per_sprite_ms = play(make_director(ELECTRODES), screen, per_sprite=True)
+
+    print(f"{FRAMES} frames")
+    print(f"empty screen:                     {empty_ms:.3f} ms/frame")
+    print(f"{ELECTRODES} electrodes, static layer:    {layered_ms:.3f} ms/frame "
+          f"({director.static_layer.rebuilds} layer rebuilds)")
+    print(f"{ELECTRODES} electrodes, drawn per sprite: {per_sprite_ms:.3f} ms/frame")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
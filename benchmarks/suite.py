@@ -0,0 +1,342 @@
+"""Regression suite for the per-frame hot paths. Builds Director scenes at a
+few scales (enemies, electrodes, bullets, family members and debris) and
+plays them, timing each frame's movement updates, collisions (index sync,
+bullet sweeps and the player checks) and drawing, plus the memory the
+scene peaks at and how much each frame allocates on top of it.
+
+    python -m benchmarks.suite run                         # results/latest.json
+    python -m benchmarks.suite run --save-baseline         # results/baseline.json
+    python -m benchmarks.suite run --compare               # run, then compare to the baseline
+    python -m benchmarks.suite compare OLD.json NEW.json --threshold 0.15
+
+compare lists every metric that got worse by more than `threshold` (15% by
+default) and exits with status 1 if any did, so it can gate a CI job.
+Timings from different machines aren't comparable, keep a baseline per
+machine. Back to back runs on one machine can still differ by ~10%, use
+--repeat to keep the best of a few runs of each scene when that matters.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from director import Director
+from enemy import Electrode, Grunt
+from family import FamilyMember
+from player import Player
+from entity_store import EntityStore
+from profiler import FrameProfiler
+import helper_funcs
+
+SCREEN_RECT = pygame.Rect(0, 0, 800, 800)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+LATEST_PATH = os.path.join(RESULTS_DIR, "latest.json")
+
+WARMUP_FRAMES = 30
+FRAMES = 240
+MEMORY_FRAMES = 30 # tracemalloc slows everything down a lot, so fewer frames
+
+# Director.update phases (see its profiler.phase calls) that count as each part
+UPDATE_PHASES = ("player_group.update", "enemy_group.update", "family_group.update", "entity_store.update",
+                 "sync sprites", "debris.update")
+COLLISION_PHASES = ("collision index sync", "bullet_group.update", "player collisions")
+
+# Changes smaller than these are noise whatever the percentage
+MIN_CHANGE = {"ms": 0.02, "kib": 64, "per_frame": 0.05}
+
+
+class Scene:
+    """How much of everything to keep on screen. `debris` is how many
+    enemies blow up into debris every frame, on top of the ones that get
+    shot.
+    """
+
+    def __init__(self, enemies: int, electrodes: int, bullets: int, family: int, debris: int):
+        self.enemies = enemies
+        self.electrodes = electrodes
+        self.bullets = bullets
+        self.family = family
+        self.debris = debris
+
+    def scaled(self, scale: float) -> "Scene":
+        return Scene(*(max(0, round(value * scale))
+                       for value in (self.enemies, self.electrodes, self.bullets, self.family, self.debris)))
+
+    def as_dict(self) -> dict[str, int]:
+        return dict(vars(self))
+
+
+SCENES = {
+    "light": Scene(enemies=100, electrodes=20, bullets=10, family=10, debris=1),
+    "busy": Scene(enemies=1_000, electrodes=100, bullets=50, family=50, debris=5),
+    "swarm": Scene(enemies=5_000, electrodes=200, bullets=100, family=100, debris=20),
+}
+
+
+class ScenePlayer:
+    """Keeps a scene at its size while it plays: refills the enemies that got
+    shot, keeps `bullets` bullets in the air and blows up a few enemies
+    every frame for debris. None of that topping up is timed.
+    """
+
+    def __init__(self, scene: Scene, use_entity_store: bool, seed: int = 0):
+        self.scene = scene
+        self.rng = random.Random(seed)
+        self.director = Director(SCREEN_RECT, use_entity_store=use_entity_store, rng=random.Random(seed),
+                                 headless=True, infinite_lives=True)
+        self.director.spawner.budget = scene.enemies + scene.electrodes + 1
+        self.director.load_level({
+            Grunt: helper_funcs.generate_rand_coords(SCREEN_RECT, scene.enemies, 0.6, 1.0, self.rng),
+            Electrode: helper_funcs.generate_rand_coords(SCREEN_RECT, scene.electrodes, 0.3, 1.0, self.rng),
+            FamilyMember: helper_funcs.generate_rand_coords(SCREEN_RECT, scene.family, 0.1, 0.6, self.rng),
+            Player: [SCREEN_RECT.center]
+        })
+        self.profiler = self.director.profiler = FrameProfiler(window=1)
+        self.profiler.set_enabled(True)
+        self.keys = [False] * 512
+        self.surface = pygame.Surface(SCREEN_RECT.size)
+
+    def top_up(self) -> None:
+        director = self.director
+        rng = self.rng
+        for _ in range(self.scene.bullets - len(director.bullet_group)):
+            director.fire_bullet((rng.uniform(0, SCREEN_RECT.width), rng.uniform(0, SCREEN_RECT.height)))
+
+        grunts = [enemy for enemy in director.enemy_group if type(enemy) is Grunt]
+        for grunt in rng.sample(grunts, min(self.scene.debris, len(grunts))):
+            director.debris.emit(grunt.position, grunt.image, bool(rng.randint(0, 1)))
+            grunt.kill()
+            director.enemy_index.remove(grunt)
+
+        # Whatever got shot or blown up comes back, grunts in along the top edge
+        electrodes = len(director.enemy_group) - len(grunts) + min(self.scene.debris, len(grunts))
+        for _ in range(self.scene.electrodes - electrodes):
+            director.create_enemy(Electrode, (rng.uniform(0, SCREEN_RECT.width), rng.uniform(0, SCREEN_RECT.height)))
+        for _ in range(self.scene.enemies + self.scene.electrodes - len(director.enemy_group)):
+            director.create_enemy(Grunt, (rng.uniform(0, SCREEN_RECT.width), rng.uniform(0, 50)))
+
+    def frame(self) -> tuple[float, float, float, float]:
+        """Plays one frame. Returns the seconds spent on (update, collision,
+        draw, the whole frame).
+        """
+
+        self.top_up()
+        samples = self.profiler.samples
+        samples.clear()
+
+        start = time.perf_counter()
+        self.director.update(1 / 60, self.keys, (None, None))
+        self.director.sync_sprites() # Counted as part of the update, draw() would do it otherwise
+        updated = time.perf_counter()
+        self.director.draw(self.surface)
+        end = time.perf_counter()
+
+        update = sum(samples[name][-1] for name in UPDATE_PHASES if name in samples)
+        collision = sum(samples[name][-1] for name in COLLISION_PHASES if name in samples)
+        return update, collision, end - updated, end - start
+
+
+def measure(scene: Scene, use_entity_store: bool) -> dict[str, float]:
+    player = ScenePlayer(scene, use_entity_store)
+    for _ in range(WARMUP_FRAMES):
+        player.frame()
+
+    blocks_before = sys.getallocatedblocks()
+    frames = [player.frame() for _ in range(FRAMES)]
+    blocks_after = sys.getallocatedblocks()
+
+    # Memory gets its own run, tracemalloc would throw the timings off
+    player = ScenePlayer(scene, use_entity_store)
+    for _ in range(WARMUP_FRAMES):
+        player.frame()
+    tracemalloc.start()
+    frame_allocs = []
+    peak = 0
+    for _ in range(MEMORY_FRAMES):
+        tracemalloc.reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        player.frame()
+        _, frame_peak = tracemalloc.get_traced_memory()
+        frame_allocs.append(frame_peak - start_bytes)
+        peak = max(peak, frame_peak)
+    tracemalloc.stop()
+
+    def median_ms(column: int) -> float:
+        return statistics.median(frame[column] for frame in frames) * 1000
+
+    frame_times = sorted(frame[3] for frame in frames)
+    return {
+        "update_ms": median_ms(0),
+        "collision_ms": median_ms(1),
+        "draw_ms": median_ms(2),
+        "frame_ms": median_ms(3),
+        "frame_p95_ms": frame_times[round((len(frame_times) - 1) * 0.95)] * 1000,
+        # Memory allocated (by Python) while playing, on top of the scene
+        # itself
+        "peak_kib": peak / 1024,
+        # Blocks still allocated after a frame (should be ~0, more is a leak)
+        "net_blocks_per_frame": (blocks_after - blocks_before) / FRAMES,
+        # The most a frame has allocated at once on top of what was already
+        # there when it started, i.e. the short lived vectors, tuples and
+        # lists it makes (the median frame)
+        "alloc_kib_per_frame": statistics.median(frame_allocs) / 1024
+    }
+
+
+def best_of(runs: list[dict[str, float]]) -> dict[str, float]:
+    """The lowest value of every metric across repeated runs. Anything
+    slowing a run down (other processes, the CPU clocking down) only ever
+    adds time, so the lowest is the closest to the code's real cost.
+    """
+
+    return {metric: min(run[metric] for run in runs) for metric in runs[0]}
+
+
+def run_suite(scene_names: list[str], scale: float, use_entity_store: bool, repeat: int = 1) -> dict:
+    pygame.display.init()
+    pygame.display.set_mode(SCREEN_RECT.size)
+
+    results = {}
+    for name in scene_names:
+        scene = SCENES[name].scaled(scale)
+        metrics = best_of([measure(scene, use_entity_store) for _ in range(max(1, repeat))])
+        results[name] = {"scene": scene.as_dict(), "metrics": metrics}
+        metrics = results[name]["metrics"]
+        print(f"{name:>8}: update {metrics['update_ms']:.3f} ms, collision {metrics['collision_ms']:.3f} ms, "
+              f"draw {metrics['draw_ms']:.3f} ms, frame {metrics['frame_ms']:.3f} ms "
+              f"(p95 {metrics['frame_p95_ms']:.3f}), peak {metrics['peak_kib']:.0f} KiB, "
+              f"{metrics['alloc_kib_per_frame']:.1f} KiB allocated/frame")
+
+    pygame.quit()
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": EntityStore.available(),
+            "entity_store": use_entity_store,
+            "machine": platform.platform(),
+            "frames": FRAMES,
+            "repeat": repeat,
+            "scale": scale
+        },
+        "results": results
+    }
+
+
+def min_change(metric: str) -> float:
+    for suffix, change in MIN_CHANGE.items():
+        if metric.endswith(suffix):
+            return change
+    return 0.0
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[str]:
+    """Lines describing every metric in `new` that's more than `threshold`
+    (a fraction) worse than in `old`. Lower is better for all of them.
+    """
+
+    regressions = []
+    if old["meta"].get("machine") != new["meta"].get("machine"):
+        print("warning: the results are from different machines")
+
+    for name, result in new["results"].items():
+        old_result = old["results"].get(name)
+        if old_result is None:
+            continue
+        if old_result["scene"] != result["scene"]:
+            print(f"warning: {name} was a different size in the baseline, skipping it")
+            continue
+
+        for metric, value in result["metrics"].items():
+            old_value = old_result["metrics"].get(metric)
+            if old_value is None or metric == "net_blocks_per_frame":
+                continue
+            if value - old_value > max(abs(old_value) * threshold, min_change(metric)):
+                change = f"+{(value / old_value - 1):.0%}" if old_value > 0 else "new"
+                regressions.append(f"{name} {metric}: {old_value:.3f} -> {value:.3f} ({change})")
+
+        # A leak isn't relative to anything
+        leak = result["metrics"].get("net_blocks_per_frame", 0)
+        if leak > max(old_result["metrics"].get("net_blocks_per_frame", 0), 0) + 1:
+            regressions.append(f"{name} net_blocks_per_frame: {leak:.1f} blocks kept per frame")
+    return regressions
+
+
+def save(results: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"saved {path}")
+
+
+def load(path: str) -> dict:
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def report(old: dict, new: dict, threshold: float) -> int:
+    regressions = compare(old, new, threshold)
+    if not regressions:
+        print(f"no regressions past {threshold:.0%}")
+        return 0
+    print(f"{len(regressions)} regression(s) past {threshold:.0%}:")
+    for line in regressions:
+        print(f"  {line}")
+    return 1
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame hot paths and catch regressions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_command = commands.add_parser("run", help="play every scene and save the results")
+    run_command.add_argument("--scenes", default=",".join(SCENES),
+                             help=f"comma separated scenes to run (default {','.join(SCENES)})")
+    run_command.add_argument("--scale", type=float, default=1.0, help="multiply every scene's counts by this")
+    run_command.add_argument("--repeat", type=int, default=1, help="run each scene this many times, keep the best")
+    run_command.add_argument("--entity-store", action="store_true", help="move entities with the numpy store")
+    run_command.add_argument("--out", default=LATEST_PATH, help="where to save the results")
+    run_command.add_argument("--save-baseline", action="store_true", help="also save them as the baseline")
+    run_command.add_argument("--compare", action="store_true", help="compare them against the baseline")
+    run_command.add_argument("--threshold", type=float, default=0.15)
+
+    compare_command = commands.add_parser("compare", help="compare two saved results")
+    compare_command.add_argument("old", nargs="?", default=BASELINE_PATH)
+    compare_command.add_argument("new", nargs="?", default=LATEST_PATH)
+    compare_command.add_argument("--threshold", type=float, default=0.15)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(report(load(args.old), load(args.new), args.threshold))
+
+    scene_names = [name.strip() for name in args.scenes.split(",") if name.strip()]
+    for name in scene_names:
+        if name not in SCENES:
+            parser.error(f"unknown scene {name!r}, pick from {', '.join(SCENES)}")
+    if args.entity_store and not EntityStore.available():
+        parser.error("--entity-store needs numpy")
+
+    results = run_suite(scene_names, args.scale, args.entity_store, args.repeat)
+    save(results, args.out)
+    if args.save_baseline:
+        save(results, BASELINE_PATH)
+    if args.compare:
+        sys.exit(report(load(BASELINE_PATH), results, args.threshold))
+
+
+if __name__ == "__main__":
+    run()
@@ -1,7 +1,74 @@
 import random
 import pygame
 import helper_funcs
-from destroyed_entity import DestroyedEntityFactory
+from audio import AudioManager, NullAudio
+from destroyed_entity import DebrisPool
+from score import Scoreboard, ENEMY_KILLED
+from spatial_hash import SpatialHash
+
+# 8 directions is what the arcade game had (see ideas.txt). Analog aiming
+# looks better with more.
+FAITHFUL_DIRECTIONS = 8
+ANALOG_DIRECTIONS = 64
+
+def render_bullet_image(direction: pygame.math.Vector2) -> pygame.Surface:
+    """Create an image and align it along the direction the bullet
+    is traveling. `direction` should be normalized.
+    """
+
+    # Create an image large enough to hold the rotated bullet
+    length = 24 # pixels
+    w = max(abs(direction.x * length), 1)
+    h = max(abs(direction.y * length), 1)
+    bullet_image = pygame.Surface((w, h))
+
+    # Calculate the coordinates of the start and end of the line
+    # by starting in the center and going half the length in the direction
+    # and the -direction directions.
+    start_vec = pygame.math.Vector2((w / 2, h / 2))
+    offset_vec = direction * (length / 2)
+
+    # I take back what I said about pygame not supporting vectors in their
+    # built-in's. So glad I don't have to do this manually
+    pygame.draw.line(bullet_image, (255, 255, 255),
+                     start_vec - offset_vec, start_vec + offset_vec)
+    return bullet_image
+
+
+class BulletImageCache:
+    """Bullet images only depend on the direction they're flying in, so the
+    directions get rounded to one of `directions` evenly spaced angles and
+    each one is only drawn once.
+    """
+
+    def __init__(self, directions: int = ANALOG_DIRECTIONS):
+        self.directions = directions
+        self.bucket_angle = 360 / directions
+        self.images: dict[int, pygame.Surface] = {}
+        self.misses = 0 # Number of images that had to be drawn
+
+    def bucket(self, direction: pygame.math.Vector2) -> int:
+        _, angle = direction.as_polar()
+        return round(angle / self.bucket_angle) % self.directions
+
+    def get(self, direction: pygame.math.Vector2) -> pygame.Surface:
+        return self.get_bucket(self.bucket(direction))
+
+    def get_bucket(self, bucket: int) -> pygame.Surface:
+        image = self.images.get(bucket)
+        if image is None:
+            self.misses += 1
+            image = render_bullet_image(helper_funcs.vec2_from_polar(1, bucket * self.bucket_angle))
+            self.images[bucket] = image
+        return image
+
+    def prerender(self) -> list[pygame.Surface]:
+        """Draws the image for every direction up front (so they can all go
+        in the sprite atlas) and returns them.
+        """
+
+        return [self.get_bucket(bucket) for bucket in range(self.directions)]
+
 
 class Bullet(pygame.sprite.Sprite):
     """Bullet fired from the player. Travels at a constant speed in a
@@ -9,27 +76,50 @@ class Bullet(pygame.sprite.Sprite):
     enemy.
     """
 
-    def __init__(self, pos: helper_funcs.CoordType, vel: pygame.math.Vector2, 
-                 screen_rect: pygame.Rect, explosion_sound: pygame.mixer.Sound):
+    def __init__(self, pos: helper_funcs.CoordType, vel: pygame.math.Vector2,
+                 screen_rect: pygame.Rect, audio: AudioManager | NullAudio | None,
+                 image_cache: BulletImageCache | None = None, pool: "BulletPool | None" = None):
         pygame.sprite.Sprite.__init__(self)
 
+        self.speed = 1000
+
+        # Rectangle representing the bounds of the screen
+        self.screen_rect = screen_rect
+
+        self.audio = audio
+        self.image_cache = image_cache
+
+        # Dead bullets go back to this pool (if there is one) to be reused
+        self.pool = pool
+
+        self.reset(pos, vel)
+
+    def reset(self, pos: helper_funcs.CoordType, vel: pygame.math.Vector2) -> None:
+        """Puts the bullet at `pos` heading in the direction of `vel`. Used
+        both for new bullets and ones coming back out of the pool.
+        """
+
         # TODO: Maybe make pos and vel the same type to avoid confusion
         self.position = pygame.math.Vector2(pos)
-        self.velocity = vel
-        self.speed = 1000
+        self.velocity = pygame.math.Vector2(vel)
+        if self.velocity.length_squared() != 0:
+            self.velocity.normalize_ip()
 
-        self.image = self.get_bullet_image()
+        # Pixels moved per second. Worked out once here instead of every frame.
+        self.step = self.velocity * self.speed
+
+        if self.image_cache is not None:
+            self.image = self.image_cache.get(self.velocity)
+        else:
+            self.image = render_bullet_image(self.velocity)
 
         self.rect = self.image.get_rect()
         self.rect.center = self.position
 
-        # Rectangle representing the bounds of the screen
-        self.screen_rect = screen_rect
-
-        self.explosion_sound = explosion_sound
-
-    def update(self, delta: float, enemies: pygame.sprite.Group, destroyed_group: pygame.sprite.Group) -> None:
-        self.position += self.velocity * self.speed * delta
+    def update(self, delta: float, enemies: SpatialHash, debris: DebrisPool,
+               rng: random.Random = random, scoreboard: Scoreboard | None = None) -> None:
+        start = (self.position.x, self.position.y)
+        self.position += self.step * delta
         self.rect.center = self.position
 
         # If we are not colliding with the screen rectangle, we are outside of
@@ -37,34 +127,65 @@ class Bullet(pygame.sprite.Sprite):
         if not self.screen_rect.colliderect(self.rect):
             self.kill()
 
-        # Check if we collide with any enemies. Walrus operator here returns
-        # what collided_enemy is set to, which is None in the event of no 
-        # collision or an enemy sprite if there is one.
-        if (collided_enemy := pygame.sprite.spritecollideany(self, enemies)) is not None:
-            DestroyedEntityFactory.create_destroyed_entities(destroyed_group, collided_enemy.position, collided_enemy.image, self.screen_rect, bool(random.randint(0, 1)))
+        # At 1000 pixels a second a bullet can jump clean over an enemy in
+        # one slow frame, so check the whole path it took this frame and not
+        # just where it ended up. Only the enemies in the cells along the
+        # path get checked.
+        collided_enemy, _ = enemies.sweep(start, (self.position.x, self.position.y),
+                                          (self.rect.width / 2, self.rect.height / 2))
+        if collided_enemy is not None:
+            debris.emit(collided_enemy.position, collided_enemy.image, bool(rng.randint(0, 1)))
             collided_enemy.kill()
+            enemies.remove(collided_enemy)
+            if scoreboard is not None:
+                scoreboard.push(ENEMY_KILLED, collided_enemy.reward, (collided_enemy.position.x,
+                                                                      collided_enemy.position.y))
             self.kill()
-            self.explosion_sound.play()
+            if self.audio is not None:
+                self.audio.play("explosion")
 
-    def get_bullet_image(self) -> pygame.Surface:
-        """Create an image and align it along the direction the bullet
-        is traveling
-        """
+    def kill(self) -> None:
+        # A bullet can be "killed" twice in one frame (off screen and hitting
+        # something), so only hand it back to the pool once.
+        if self.pool is not None and self.alive():
+            pygame.sprite.Sprite.kill(self)
+            self.pool.release(self)
+        else:
+            pygame.sprite.Sprite.kill(self)
+
+
+class BulletPool:
+    """Keeps dead bullets around so firing reuses them instead of making new
+    sprites (and images) for every shot.
+    """
+
+    def __init__(self, screen_rect: pygame.Rect, audio: AudioManager | NullAudio | None,
+                 image_cache: BulletImageCache | None = None):
+        self.screen_rect = screen_rect
+        self.audio = audio
+        self.image_cache = image_cache if image_cache is not None else BulletImageCache()
+        self.free: list[Bullet] = []
+
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, pos: helper_funcs.CoordType, vel: pygame.math.Vector2) -> Bullet:
+        if self.free:
+            self.reused += 1
+            bullet = self.free.pop()
+            bullet.reset(pos, vel)
+            return bullet
+
+        self.created += 1
+        return Bullet(pos, vel, self.screen_rect, self.audio, self.image_cache, self)
+
+    def release(self, bullet: Bullet) -> None:
+        self.free.append(bullet)
 
-        # Create an image large enough to hold the rotated bullet
-        length = 24 # pixels
-        w = max(abs(self.velocity.x * length), 1)
-        h = max(abs(self.velocity.y * length), 1)
-        bullet_image = pygame.Surface((w, h))
-
-        # Calculate the coordinates of the start and end of the line
-        # by starting in the center and going half the length in the self.velocity
-        # and the -self.velocity directions.
-        start_vec = pygame.math.Vector2((w / 2, h / 2))
-        offset_vec = self.velocity * (length / 2)
-        
-        # I take back what I said about pygame not supporting vectors in their
-        # built-in's. So glad I don't have to do this manually
-        pygame.draw.line(bullet_image, (255, 255, 255), 
-                         start_vec - offset_vec, start_vec + offset_vec) 
-        return bullet_image
+    def stats(self) -> dict[str, int]:
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "free": len(self.free),
+            "images": len(self.image_cache.images)
+        }
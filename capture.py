@@ -0,0 +1,209 @@
+"""Screenshots and frame recording that don't hold up the game loop.
+
+Grabbing a frame only blits the screen into one of a few preallocated
+surfaces and queues it. Turning it into a PNG (or raw RGB) and writing it
+out happens on a worker thread, and the slow parts of that (zlib and file
+writes) release the GIL so the game keeps running at full speed. If the
+worker falls behind, frames are dropped and counted instead of making the
+game wait.
+"""
+
+import json
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import pygame
+
+# -- Formats --
+PNG = "png" # One PNG per frame
+RAW = "raw" # Every frame appended to one file of packed RGB bytes
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_HEADER = struct.Struct(">IIBBBBB")
+PNG_CHUNK = struct.Struct(">I4s")
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return PNG_CHUNK.pack(len(data), kind) + data + struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)))
+
+
+def encode_png(rgb: bytes, width: int, height: int, level: int = 6) -> bytes:
+    """Encodes packed 8 bit RGB pixels as a PNG. Done by hand (rather than
+    pygame.image.save) so the compression runs without the GIL.
+    """
+
+    stride = width * 3
+    view = memoryview(rgb)
+    # Every row starts with a filter type byte, 0 = no filtering
+    rows = b"".join(b"\x00" + view[y * stride:(y + 1) * stride] for y in range(height))
+    return b"".join((PNG_SIGNATURE,
+                     png_chunk(b"IHDR", PNG_HEADER.pack(width, height, 8, 2, 0, 0, 0)),
+                     png_chunk(b"IDAT", zlib.compress(rows, level)),
+                     png_chunk(b"IEND", b"")))
+
+
+class FrameCapture:
+    """Call screenshot() for a single image, or start_recording() and then
+    capture_frame() once per frame to save every `every`th frame. Frames
+    are copied into one of `max_queue` reusable surfaces (made the first
+    time they're needed), so nothing new gets allocated per frame on the
+    game's side once they exist, and that's also what bounds the queue:
+    when every surface is waiting on the worker, the frame is dropped.
+    """
+
+    def __init__(self, size: tuple[int, int], max_queue: int = 8, png_level: int = 1):
+        self.size = tuple(size)
+        self.png_level = png_level # Fast compression for recordings, they can be big
+        # Buffers (and the worker) are only made once something is captured,
+        # most sessions never take a screenshot
+        self.max_queue = max_queue
+        self.buffers_made = 0
+        self.free_buffers: queue.SimpleQueue[pygame.Surface] = queue.SimpleQueue()
+        self.jobs: queue.SimpleQueue[tuple] = queue.SimpleQueue()
+
+        self.recording = False
+        self.directory: str | None = None
+        self.format = PNG
+        self.every = 1
+        self.frame_num = 0
+        self.raw_file = None
+
+        self.captured = 0 # Frames copied and queued
+        self.written = 0  # Frames the worker has finished with
+        self.dropped = 0  # Frames skipped because the worker was behind
+        self.errors = 0
+        self.last_error: Exception | None = None
+
+        self.worker: threading.Thread | None = None
+
+    def screenshot(self, surface: pygame.Surface, path: str, level: int = 6) -> bool:
+        """Queues `surface` to be saved as a PNG at `path`. Returns False if
+        it had to be dropped.
+        """
+
+        return self.queue_frame(surface, ("png", path, level))
+
+    def start_recording(self, directory: str, every: int = 1, format: str = PNG) -> None:
+        """Starts saving every `every`th frame passed to capture_frame() into
+        `directory`, either as numbered PNGs or as one raw RGB stream
+        (frames.rgb, with its size described in frames.json).
+        """
+
+        if format not in (PNG, RAW):
+            raise ValueError(f"Unknown capture format {format!r}")
+        if self.recording:
+            self.stop_recording()
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.every = max(1, every)
+        self.format = format
+        self.frame_num = 0
+        if format == RAW:
+            with open(os.path.join(directory, "frames.json"), "w") as info_file:
+                json.dump({"width": self.size[0], "height": self.size[1], "format": "RGB", "every": self.every},
+                          info_file)
+            self.raw_file = open(os.path.join(directory, "frames.rgb"), "wb")
+        self.recording = True
+
+    def stop_recording(self) -> None:
+        if not self.recording:
+            return
+        self.recording = False
+        if self.raw_file is not None:
+            # The worker closes it once it gets here, after any frames still
+            # queued for it
+            if self.worker is None:
+                self.raw_file.close()
+            else:
+                self.jobs.put(("close", self.raw_file, None, None))
+            self.raw_file = None
+
+    def capture_frame(self, surface: pygame.Surface) -> None:
+        """Call once per frame after drawing. Does nothing unless recording."""
+
+        if not self.recording:
+            return
+
+        frame_num = self.frame_num
+        self.frame_num += 1
+        if frame_num % self.every:
+            return
+
+        if self.format == RAW:
+            self.queue_frame(surface, ("raw", self.raw_file, None))
+        else:
+            path = os.path.join(self.directory, f"frame_{frame_num:06d}.png")
+            self.queue_frame(surface, ("png", path, self.png_level))
+
+    def queue_frame(self, surface: pygame.Surface, job: tuple) -> bool:
+        try:
+            buffer = self.free_buffers.get_nowait()
+        except queue.Empty:
+            if self.buffers_made >= self.max_queue:
+                self.dropped += 1
+                return False
+            buffer = pygame.Surface(self.size, 0, 24)
+            self.buffers_made += 1
+
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.work, name="frame-capture", daemon=True)
+            self.worker.start()
+
+        buffer.blit(surface, (0, 0))
+        self.jobs.put(job + (buffer,))
+        self.captured += 1
+        return True
+
+    def work(self) -> None:
+        while True:
+            kind, target, level, buffer = self.jobs.get()
+            try:
+                if kind == "stop":
+                    return
+                if kind == "close":
+                    target.close()
+                    continue
+
+                width, height = buffer.get_size()
+                try:
+                    rgb = pygame.image.tobytes(buffer, "RGB")
+                finally:
+                    self.free_buffers.put(buffer) # Copied out, the game can have it back
+
+                if kind == "raw":
+                    target.write(rgb)
+                else:
+                    with open(target, "wb") as image_file:
+                        image_file.write(encode_png(rgb, width, height, level))
+                self.written += 1
+
+            # Anything at all, not just the usual disk / pygame errors. If
+            # the worker died every frame after it would quietly be dropped
+            # (and its buffers never handed back).
+            except Exception as error:
+                self.errors += 1
+                self.last_error = error
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "captured": self.captured,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self.jobs.qsize(),
+            "errors": self.errors
+        }
+
+    def close(self) -> None:
+        """Finishes writing everything still queued and stops the worker.
+        This one does block, it's meant for when the game is closing.
+        """
+
+        self.stop_recording()
+        if self.worker is None:
+            return
+        self.jobs.put(("stop", None, None, None))
+        self.worker.join()
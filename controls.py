@@ -0,0 +1,199 @@
+import math
+
+import pygame
+
+# How far a stick has to be pushed (0 to 1) before it counts, to avoid
+# drift / jitter from sticks that don't quite center
+DEADZONE = 0.32
+
+# Xbox controller layout (see ideas.txt)
+LEFT_STICK = (0, 1)  # Movement
+RIGHT_STICK = (2, 3) # Shooting
+
+
+def direction_table(directions: int) -> list[tuple[float, float]]:
+    """Unit vectors for `directions` evenly spaced angles, starting at 0
+    degrees (right). Values that should be 0 are exactly 0, so 8-way
+    movement doesn't drift sideways.
+    """
+
+    table = []
+    for i in range(directions):
+        angle = math.tau * i / directions
+        x, y = math.cos(angle), math.sin(angle)
+        table.append((0.0 if abs(x) < 1e-9 else x, 0.0 if abs(y) < 1e-9 else y))
+    return table
+
+
+class InputSnapshot:
+    """What one player's controller is doing this frame: a direction to move
+    in and a direction to shoot in, each a unit vector or nothing. The
+    vectors are made once and updated in place, and vectors() hands out one
+    of four tuples made up front, so reading the input every frame doesn't
+    allocate anything.
+
+    to_list() / load() turn it into plain lists and back, in the same form
+    InputFrame (headless.py) takes for scripted input.
+    """
+
+    __slots__ = ("movement", "shooting", "moving", "firing", "tuples")
+
+    def __init__(self):
+        self.movement = pygame.math.Vector2()
+        self.shooting = pygame.math.Vector2()
+        self.moving = False
+        self.firing = False
+
+        # (movement, shooting) for each combination of moving / firing
+        self.tuples = ((None, None), (None, self.shooting), (self.movement, None), (self.movement, self.shooting))
+
+    def vectors(self) -> tuple[pygame.math.Vector2 | None, pygame.math.Vector2 | None]:
+        """(movement, shooting), either of which may be None. Same form as
+        Director.update's joystick_vecs. The vectors change in place next
+        frame, so copy them to keep them around.
+        """
+
+        return self.tuples[self.moving * 2 + self.firing]
+
+    def clear(self) -> None:
+        self.moving = False
+        self.firing = False
+
+    def to_list(self) -> list[list[float] | None]:
+        return [[self.movement.x, self.movement.y] if self.moving else None,
+                [self.shooting.x, self.shooting.y] if self.firing else None]
+
+    def load(self, data: list[list[float] | None]) -> None:
+        movement, shooting = data
+        self.moving = movement is not None
+        if self.moving:
+            self.movement.update(movement)
+        self.firing = shooting is not None
+        if self.firing:
+            self.shooting.update(shooting)
+
+
+class Controller:
+    """One plugged in controller. Its axes are kept up to date from
+    JOYAXISMOTION events rather than asked for every frame.
+    """
+
+    def __init__(self, instance_id: int, num_axes: int = 4, joystick: pygame.joystick.JoystickType | None = None):
+        self.instance_id = instance_id
+        self.joystick = joystick # Kept so it doesn't get closed
+        self.axes = [0.0] * max(num_axes, max(LEFT_STICK + RIGHT_STICK) + 1)
+
+    @classmethod
+    def from_joystick(cls, joystick: pygame.joystick.JoystickType) -> "Controller":
+        controller = cls(joystick.get_instance_id(), joystick.get_numaxes(), joystick)
+        # Only polled this once, in case a stick is already held when it's plugged in
+        for axis in range(joystick.get_numaxes()):
+            controller.axes[axis] = joystick.get_axis(axis)
+        return controller
+
+    def axis_motion(self, axis: int, value: float) -> bool:
+        """Returns True if the axis actually moved."""
+
+        if axis >= len(self.axes) or self.axes[axis] == value:
+            return False
+        self.axes[axis] = value
+        return True
+
+
+class Controls:
+    """Keeps track of every plugged in controller and turns them into one
+    InputSnapshot per player. Controllers are handed to players in the order
+    they were plugged in, and if one is unplugged the ones after it move up
+    (so unplugging player 1's controller hands player 1 the next one).
+
+    Feed every event to handle_event(). The snapshots are only worked out
+    again when an axis actually moved, and no later than the next time one
+    is asked for, so input is never more than the current frame behind.
+
+    `directions` rounds both sticks to that many directions (8 for the
+    arcade game), otherwise they're analog.
+    """
+
+    def __init__(self, players: int = 1, deadzone: float = DEADZONE, directions: int | None = None):
+        self.deadzone = deadzone
+        self.directions = directions
+        self.table = direction_table(directions) if directions else None
+
+        self.controllers: dict[int, Controller] = {} # Instance id -> controller, in the order they were plugged in
+        self.snapshots = [InputSnapshot() for _ in range(players)]
+        self.changed = False
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """Updates the controllers from a pygame event. Returns True if it
+        was a controller event.
+        """
+
+        if event.type == pygame.JOYAXISMOTION:
+            controller = self.controllers.get(event.instance_id)
+            if controller is not None and controller.axis_motion(event.axis, event.value):
+                self.changed = True
+            return True
+
+        if event.type == pygame.JOYDEVICEADDED:
+            self.add(Controller.from_joystick(pygame.joystick.Joystick(event.device_index)))
+            return True
+
+        if event.type == pygame.JOYDEVICEREMOVED:
+            self.remove(event.instance_id)
+            return True
+
+        return False
+
+    def add(self, controller: Controller) -> None:
+        # The same controller can be reported twice (e.g. already plugged in
+        # when the joystick module starts), keep the first one
+        if controller.instance_id not in self.controllers:
+            self.controllers[controller.instance_id] = controller
+            self.changed = True
+
+    def remove(self, instance_id: int) -> None:
+        if self.controllers.pop(instance_id, None) is not None:
+            self.changed = True
+
+    def __len__(self) -> int:
+        return len(self.controllers)
+
+    def stick(self, vec: pygame.math.Vector2, x: float, y: float) -> bool:
+        """Points `vec` (in place) the way a stick at (x, y) is pushed, as a
+        unit vector. Returns False if the stick is inside the deadzone.
+        """
+
+        if x * x + y * y < self.deadzone * self.deadzone:
+            return False
+
+        if self.table is None:
+            vec.update(x, y)
+            vec.normalize_ip()
+        else:
+            directions = self.directions
+            vec.update(self.table[round(math.atan2(y, x) / math.tau * directions) % directions])
+        return True
+
+    def poll(self) -> None:
+        """Works the snapshots out again if any axis moved (or a controller
+        came or went) since the last time.
+        """
+
+        if not self.changed:
+            return
+        self.changed = False
+
+        controllers = iter(self.controllers.values())
+        for snapshot in self.snapshots:
+            controller = next(controllers, None)
+            if controller is None:
+                snapshot.clear()
+                continue
+
+            axes = controller.axes
+            snapshot.moving = self.stick(snapshot.movement, axes[LEFT_STICK[0]], axes[LEFT_STICK[1]])
+            snapshot.firing = self.stick(snapshot.shooting, axes[RIGHT_STICK[0]], axes[RIGHT_STICK[1]])
+
+    def snapshot(self, player: int = 0) -> InputSnapshot:
+        self.poll()
+        return self.snapshots[player]
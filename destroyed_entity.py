@@ -1,59 +1,211 @@
+from array import array
+
 import pygame
 import helper_funcs
+from atlas import SpriteAtlas
 
-class Destroyed(pygame.sprite.Sprite):
-
-    def __init__(self, position: helper_funcs.CoordType, velocity: pygame.math.Vector2, image: pygame.Surface, screen_rect: pygame.Rect):
-        pygame.sprite.Sprite.__init__(self)
-        self.position = position.copy()
-        self.image = image
-        self.velocity = velocity
-        self.rect = self.image.get_rect()
-        self.rect.center = self.position
-
-        self.screen_rect = screen_rect
-        self.speed = 150
-        self.lifetime = 0.5 # Maximum lifetime of the sprite, will kill itself after this many seconds
-
-    def update(self, delta):
-        self.position += self.velocity * self.speed * delta
-        self.rect.center = self.position
 
-        # If we are not colliding with the screen rectangle, we are outside of
-        # it, and thus the bullet can despawn
-        if not self.screen_rect.colliderect(self.rect):
-            self.kill()
+class SliceCache:
+    """When an entity in robotron is destroyed, it splits apart into slices
+    that spread apart on the screen. Cutting the slices out of an image is the
+    same every time, so this keeps the subsurfaces (and the direction each one
+    flies off in) for every image / orientation that has been destroyed.
+    """
 
-        self.lifetime -= delta
-        if self.lifetime <= 0:
-            self.kill()
+    slice_size = 4 #px/row
 
+    def __init__(self):
+        self.slices: dict[tuple[pygame.Surface, bool], list[tuple[pygame.Surface, float, float]]] = {}
+        # Which (image, horizontal, slice index) each slice was cut from
+        self.origins: dict[pygame.Surface, tuple[pygame.Surface, bool, int]] = {}
 
-class DestroyedEntityFactory:
-    """When an entity in robotron is destroyed, it splits apart into slices
-    that spread apart on the screen. This factory class is designed to help
-    facilitate generating the slices."""
+    def get(self, image: pygame.Surface, horizontal: bool) -> list[tuple[pygame.Surface, float, float]]:
+        """Returns a list of (subsurface, velocity x, velocity y) for each
+        slice of the image.
+        """
 
+        key = (image, horizontal)
+        slices = self.slices.get(key)
+        if slices is not None:
+            return slices
 
-    @staticmethod
-    def create_destroyed_entities(output: pygame.sprite.Group, position: helper_funcs.CoordType,
-                                  image: pygame.Surface, screen_rect: pygame.Rect,
-                                  horizontal: bool = True):
-        slice_size = 4 #px/row
+        slice_size = self.slice_size
         image_size = image.get_size()
         if horizontal:
             dimension = image_size[0]
         else:
             dimension = image_size[1]
 
+        slices = []
         num_slices = dimension // slice_size
         for slice_index in range(num_slices):
             if horizontal:
                 subsurf_rect = pygame.Rect(0, slice_index * slice_size, image_size[0], slice_size)
-                vel = pygame.math.Vector2(0, num_slices / 2 - (slice_index + 0.5))
+                vel = (0, num_slices / 2 - (slice_index + 0.5))
 
             else:
                 subsurf_rect = pygame.Rect(slice_index * slice_size, 0, slice_size, image_size[1])
-                vel = pygame.math.Vector2(num_slices / 2 - (slice_index + 0.5), 0)
+                vel = (num_slices / 2 - (slice_index + 0.5), 0)
+
+            slice_image = image.subsurface(subsurf_rect)
+            self.origins[slice_image] = (image, horizontal, slice_index)
+            slices.append((slice_image, vel[0], vel[1]))
+
+        self.slices[key] = slices
+        return slices
+
+
+class DebrisPool:
+    """Fixed size pool of the slices flying away from destroyed entities.
+    All of the state lives in preallocated arrays, and live particles are
+    kept packed at the front so update / draw only loop over those. Killing
+    an enemy doesn't allocate any sprites, rects or vectors anymore.
+
+    If the pool is full new slices are dropped (and counted in `overflow`)
+    rather than growing it.
+    """
+
+    def __init__(self, screen_rect: pygame.Rect, capacity: int = 2048, speed: float = 150, lifetime: float = 0.5):
+        self.screen_rect = screen_rect
+        self.capacity = capacity
+        self.speed = speed
+        self.lifetime = lifetime # Maximum lifetime of a slice, removed after this many seconds
+
+        self.x = array("d", bytes(8 * capacity))
+        self.y = array("d", bytes(8 * capacity))
+        self.vx = array("d", bytes(8 * capacity))
+        self.vy = array("d", bytes(8 * capacity))
+        self.life = array("d", bytes(8 * capacity))
+        self.images: list[pygame.Surface | None] = [None] * capacity
+
+        self.count = 0 # Number of live particles, all stored in [0, count)
+        self.overflow = 0 # Slices dropped because the pool was full
+        self.peak = 0
+
+        self.slice_cache = SliceCache()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def emit(self, position: helper_funcs.CoordType, image: pygame.Surface, horizontal: bool = True) -> None:
+        """Breaks `image` into slices centered at position and sends them
+        flying apart.
+        """
+
+        px, py = position[0], position[1]
+        for slice_image, vx, vy in self.slice_cache.get(image, horizontal):
+            i = self.count
+            if i == self.capacity:
+                self.overflow += 1
+                continue
+
+            self.x[i] = px
+            self.y[i] = py
+            self.vx[i] = vx * self.speed
+            self.vy[i] = vy * self.speed
+            self.life[i] = self.lifetime
+            self.images[i] = slice_image
+            self.count += 1
+
+        self.peak = max(self.peak, self.count)
+
+    def update(self, delta: float) -> None:
+        """Moves every live slice and removes the ones that have expired or
+        left the screen.
+        """
+
+        x, y, vx, vy, life, images = self.x, self.y, self.vx, self.vy, self.life, self.images
+        for i in range(self.count):
+            x[i] += vx[i] * delta
+            y[i] += vy[i] * delta
+            life[i] -= delta
+
+        screen = self.screen_rect
+        left, top, right, bottom = screen.left, screen.top, screen.right, screen.bottom
+        i = 0
+        while i < self.count:
+            image = images[i]
+            half_w = image.get_width() / 2
+            half_h = image.get_height() / 2
+            on_screen = (x[i] - half_w < right and x[i] + half_w > left and
+                         y[i] - half_h < bottom and y[i] + half_h > top)
+            if life[i] > 0 and on_screen:
+                i += 1
+                continue
+
+            # Swap the last live slice into this slot so the live ones stay
+            # packed together. Don't advance i, the swapped in slice still
+            # needs checking.
+            last = self.count - 1
+            x[i] = x[last]
+            y[i] = y[last]
+            vx[i] = vx[last]
+            vy[i] = vy[last]
+            life[i] = life[last]
+            images[i] = images[last]
+            images[last] = None
+            self.count -= 1
+
+    def draw(self, surface: pygame.Surface, rewind: float = 0.0, atlas: SpriteAtlas | None = None) -> list[pygame.Rect]:
+        """Draws every live slice with a single blits call. Returns the rects
+        that were drawn to. Slices move in straight lines, so `rewind` draws
+        them where they were that many seconds ago (for render interpolation).
+        With an atlas the slices are blitted from it instead of their own
+        subsurfaces.
+        """
+
+        x, y, images = self.x, self.y, self.images
+        live = images[:self.count]
+        sources = map(atlas.source, live) if atlas is not None else ((image, None) for image in live)
+        if rewind:
+            vx, vy = self.vx, self.vy
+            return surface.blits([(source, (round(x[i] - vx[i] * rewind) - live[i].get_width() // 2,
+                                            round(y[i] - vy[i] * rewind) - live[i].get_height() // 2), area)
+                                  for i, (source, area) in enumerate(sources)])
+
+        return surface.blits([(source, (round(x[i]) - live[i].get_width() // 2,
+                                        round(y[i]) - live[i].get_height() // 2), area)
+                              for i, (source, area) in enumerate(sources)])
+
+    def snapshot(self, source_names: dict[pygame.Surface, str]) -> list[list]:
+        """Every live slice as [x, y, vx, vy, life, source, horizontal, slice
+        index], where source is `source_names[image it was cut from]`.
+        """
+
+        rows = []
+        for i in range(self.count):
+            image, horizontal, slice_index = self.slice_cache.origins[self.images[i]]
+            rows.append([self.x[i], self.y[i], self.vx[i], self.vy[i], self.life[i],
+                         source_names[image], horizontal, slice_index])
+        return rows
+
+    def restore(self, rows: list[list], source_images: dict[str, pygame.Surface]) -> None:
+        """Puts back the slices saved by snapshot(). `source_images` maps the
+        source names back to images.
+        """
+
+        self.clear()
+        for x, y, vx, vy, life, source, horizontal, slice_index in rows[:self.capacity]:
+            i = self.count
+            self.x[i] = x
+            self.y[i] = y
+            self.vx[i] = vx
+            self.vy[i] = vy
+            self.life[i] = life
+            self.images[i] = self.slice_cache.get(source_images[source], horizontal)[slice_index][0]
+            self.count += 1
+        self.peak = max(self.peak, self.count)
+
+    def clear(self) -> None:
+        for i in range(self.count):
+            self.images[i] = None
+        self.count = 0
 
-            output.add(Destroyed(position, vel, image.subsurface(subsurf_rect), screen_rect))
\ No newline at end of file
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "live": self.count,
+            "capacity": self.capacity,
+            "occupancy": self.count / self.capacity,
+            "peak": self.peak,
+            "overflow": self.overflow
+        }
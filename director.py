@@ -1,11 +1,25 @@
 from typing import Mapping, get_args
+import glob
+import random
 
 import pygame
 
 from player import Player
 from family import FamilyMember
-from bullet import Bullet
+from bullet import BulletPool, BulletImageCache, ANALOG_DIRECTIONS
 from enemy import Electrode, Grunt, BaseEnemy
+from assets import library
+from spatial_hash import SpatialHash
+from destroyed_entity import DebrisPool
+from profiler import FrameProfiler
+from entity_store import EntityStore
+from flow_field import FlowField
+from spawner import Spawner
+from audio import AudioManager, NullAudio, make_audio
+from score import Scoreboard
+from static_layer import StaticGroup, StaticLayer
+from atlas import SpriteAtlas
+from controls import Controls
 import helper_funcs
 
 # I haven't done this before, but I'm learning type annotation in Python.
@@ -25,21 +39,44 @@ Typically dictionary in the form:
     Player: [(250, 250)]
 }
 """
+GameState = dict[str, object]
 
 class Director:
     """The director holds the state of the game internally, and handles
     storing, updating, and drawing all game components."""
 
-    def __init__(self, screen_rect: pygame.Rect):
+    def __init__(self, screen_rect: pygame.Rect, use_entity_store: bool = False,
+                 rng: random.Random | None = None, headless: bool = False,
+                 bullet_directions: int = ANALOG_DIRECTIONS, use_flow_field: bool = False,
+                 controls: Controls | None = None, infinite_lives: bool = False):
         self.level_num = 0
-        self.score = 0
-        self.lives = 0
 
-        self.enemy_group = pygame.sprite.Group()
-        self.family_group = pygame.sprite.Group()
-        self.player_group = pygame.sprite.Group()
-        self.bullet_group = pygame.sprite.Group()
-        self.destroyed_group = pygame.sprite.Group()
+        # Entities start_level() has queued up that continue_level() hasn't
+        # made yet, and how far through them it is
+        self.level_queue: list[tuple[type, helper_funcs.CoordType]] = []
+        self.level_queued = 0
+
+        # Score, lives and the rescue bonus. Kills, rescues and deaths are
+        # queued up during update and added up at the end of it. With
+        # infinite_lives the game never ends (benchmarks, long headless runs).
+        self.scoreboard = Scoreboard(infinite_lives=infinite_lives)
+
+        # RenderUpdates groups work exactly like Groups, but also keep track
+        # of where each sprite was last drawn for the dirty rect renderer.
+        self.enemy_group = pygame.sprite.RenderUpdates()
+        self.family_group = pygame.sprite.RenderUpdates()
+        self.player_group = pygame.sprite.RenderUpdates()
+        self.bullet_group = pygame.sprite.RenderUpdates()
+
+        # Every enemy is in enemy_group (collisions, counting, snapshots) and
+        # also in one of these two. Stationary ones (Electrodes) are never
+        # updated and are drawn into static_layer instead of every frame.
+        self.moving_enemy_group = pygame.sprite.RenderUpdates()
+        self.static_enemy_group = StaticGroup()
+
+        # Slices of destroyed entities. These used to be sprites, but a chain
+        # of kills made thousands of them, so they live in a fixed size pool.
+        self.debris = DebrisPool(screen_rect)
 
         # Spawn the player in the center even if no level is loaded (for debug purposes)
         self.player: Player = Player(screen_rect.center, screen_rect)
@@ -47,152 +84,650 @@ class Director:
 
         self.screen_rect = screen_rect
 
-        self.joystick = None
+        # When dirty rendering is on, only the parts of the screen that changed
+        # get cleared (by copying from the background) and redrawn.
+        self.dirty_rendering = False
+        self.background = pygame.Surface(screen_rect.size)
+        self.background.fill((0, 0, 0))
+        self.full_redraw = True
+        self.debris_rects: list[pygame.Rect] = []
+
+        # The background with the stationary enemies already on it. Each
+        # frame starts with one blit of it instead of a fill, and it's only
+        # redrawn when a stationary enemy shows up or is destroyed.
+        self.static_layer = StaticLayer(self.background)
+
+        # Every image that gets drawn packed into one surface, so the sprites
+        # are all drawn with a single blits call. Built on the first draw,
+        # headless directors never need it.
+        self.atlas = SpriteAtlas()
+
+        # Where each sprite was before the latest simulation step. With a
+        # fixed timestep the display usually lands between two steps, so
+        # draw() places sprites part way between there and where they are now.
+        self.previous_positions: dict[pygame.sprite.Sprite, tuple[int, int]] = {}
+
+        # Times each part of update / draw when it's turned on (F4 in main.run)
+        self.profiler = FrameProfiler()
+
+        # Broadphase indexes for the collision checks. They get brought up
+        # to date every frame after their group has moved.
+        self.enemy_index = SpatialHash(screen_rect)
+        self.family_index = SpatialHash(screen_rect)
+
+        # Optional numpy-backed store that moves every enemy and family member
+        # in one go instead of calling update on each sprite. Falls back to
+        # the per-sprite path if numpy isn't installed.
+        self.entity_store: EntityStore | None = None
+        if use_entity_store and EntityStore.available():
+            self.entity_store = EntityStore(screen_rect)
+            # Sprites are only written back once per drawn frame (see
+            # sync_sprites), collision checks bring the ones they look at
+            # up to date themselves
+            self.enemy_index.refresh = self.entity_store.flush_sprite
+            self.family_index.refresh = self.entity_store.flush_sprite
+
+        # Steers homing enemies around obstacles. Made on demand by
+        # add_obstacle, without obstacles enemies just head straight for
+        # the player.
+        self.flow_field: FlowField | None = FlowField(screen_rect) if use_flow_field else None
+
+        # Every enemy comes out of the spawner's per-type pools, and killed
+        # ones go back in to be reused. Generator enemies spawning a steady
+        # stream of others go through create_enemy, which also enforces the
+        # spawner's budget and rate limits.
+        self.spawner = Spawner(screen_rect, self.enemy_group, self.add_enemy)
+
+        # Every plugged in controller, kept up to date from joystick events
+        # (main.run passes them all to controls.handle_event). Player 1 is
+        # moved by whichever was plugged in first.
+        self.controls = controls if controls is not None else Controls()
 
         self.reload_timer = 0
         self.reload_timer_max = 0.20 # How many seconds before the player can shoot again
 
+        # Everything random in the game goes through self.rng. Give it a
+        # seeded random.Random and the same inputs will always play out the
+        # same way. Defaults to the global `random` module like before.
+        self.rng = rng if rng is not None else random
+
+        # Headless directors (batch runs, training) never touch the mixer.
+        self.headless = headless
+        self.player_hit = False
+        self.kills = 0
+
+        # Sounds are only asked for during update, and the audio manager
+        # plays them when main.run calls audio.flush() once a frame. The
+        # mixer isn't started until then either.
+        self.audio: AudioManager | NullAudio = make_audio(not headless)
         self.init_sounds()
 
+        # Fired bullets are recycled, and their images are drawn once per
+        # direction (pass FAITHFUL_DIRECTIONS for 8-way arcade bullets).
+        self.bullet_pool = BulletPool(screen_rect, self.audio, BulletImageCache(bullet_directions))
+
+        # An InputRecorder (see replay.py) that logs every update's input
+        # while recording is on.
+        self.recorder = None
+
     def init_sounds(self) -> None:
-        # TODO: Compress these to mp3 to save space
-        self.sound_library = {
-            "explosion": pygame.mixer.Sound("sounds/explode.wav"),
-            "shoot": pygame.mixer.Sound("sounds/shoot.wav")
-        }
+        # Nothing is loaded until the audio manager starts, and then the wav
+        # files (stored at their real 22 kHz, see sound_format.py) are shared
+        # through the asset library so another Director doesn't load them
+        # again. Explosions matter more than shots when there aren't enough
+        # channels for both.
+        self.audio.register("explosion", "sounds/explode.wav", priority=2, max_voices=4)
+        self.audio.register("shoot", "sounds/shoot.wav", priority=1, max_voices=2)
+
+    def update(self, delta: float, pressed_keys: list[bool],
+               joystick_vecs: tuple[pygame.math.Vector2 | None, pygame.math.Vector2 | None] | None = None) -> None:
+        """Moves the game forward `delta` seconds. joystick_vecs can be used
+        to feed in the (movement, shooting) vectors directly instead of
+        reading the controllers, e.g. for scripted input.
+        """
+
+        profiler = self.profiler
+        if joystick_vecs is None:
+            with profiler.phase("get_joystick_vecs"):
+                joystick_vecs = self.get_joystick_vecs()
+        movement_vec, shooting_vec = joystick_vecs
+
+        if self.recorder is not None:
+            self.recorder.record_frame(delta, pressed_keys, movement_vec, shooting_vec)
+
+        if self.scoreboard.game_over:
+            # Everything stands still, but enemies killed on the last frame
+            # still have to make it back to their pools
+            self.spawner.update(delta)
+            if self.recorder is not None:
+                self.recorder.end_frame(self)
+            return
+
+        with profiler.phase("player_group.update"):
+            self.player_group.update(delta, pressed_keys, movement_vec)
+
+        if self.entity_store is not None:
+            with profiler.phase("entity_store.update"):
+                self.entity_store.update(delta, self.player.position, self.moving_enemy_group, self.family_group,
+                                         self.rng, self.flow_field, write_back=False)
+        else:
+            with profiler.phase("enemy_group.update"):
+                self.moving_enemy_group.update(delta, self.player.position, self.flow_field)
+            with profiler.phase("family_group.update"):
+                self.family_group.update(delta, self.rng)
+
+        with profiler.phase("collision index sync"):
+            if self.entity_store is not None:
+                # The sprites haven't been written back, go by the arrays
+                store = self.entity_store
+                self.enemy_index.sync(self.enemy_group, store.cell_moves(self.enemy_index.cell_size, family=False))
+                self.family_index.sync(self.family_group, store.cell_moves(self.family_index.cell_size, family=True))
+            else:
+                self.enemy_index.sync(self.enemy_group)
+                self.family_index.sync(self.family_group)
+
+        # Bullets check their own collisions as they move
+        with profiler.phase("bullet_group.update"):
+            enemies_before = len(self.enemy_group)
+            self.bullet_group.update(delta, self.enemy_index, self.debris, self.rng, self.scoreboard)
+            killed = enemies_before - len(self.enemy_group)
+            self.kills += killed
+            if killed and self.entity_store is not None:
+                self.entity_store.mark_dirty()
 
-    def update(self, delta: float, pressed_keys: list[bool]) -> None:
-        movement_vec, shooting_vec = self.get_joystick_vecs()
-        self.player_group.update(delta, pressed_keys, movement_vec)
-        self.bullet_group.update(delta, self.enemy_group, self.destroyed_group)
-        self.enemy_group.update(delta, self.player.position)
-        self.family_group.update(delta)
-        self.destroyed_group.update(delta)
+        with profiler.phase("debris.update"):
+            self.debris.update(delta)
 
         if shooting_vec is not None and self.reload_timer <= 0:
-            self.shoot(self.player.position + shooting_vec)
+            self.fire_bullet(self.player.position + shooting_vec)
             self.reload_timer = self.reload_timer_max
 
         self.reload_timer -= delta
 
         # Resolve player colisions here now that everything is done moving
-        if (collided_enemy := pygame.sprite.spritecollideany(self.player, self.enemy_group)) is not None:
-            # main_player.kill()
-            print("YOU DIED")
+        with profiler.phase("player collisions"):
+            self.player_hit = self.enemy_index.collide_any(self.player) is not None
+            rescued = self.family_index.collide_any(self.player)
+
+        if self.player_hit:
+            self.scoreboard.player_died((self.player.position.x, self.player.position.y))
+        elif rescued is not None:
+            self.rescue(rescued)
+
+        self.scoreboard.apply()
+        if self.player_hit and not self.scoreboard.game_over:
+            self.restart_wave()
+
+        # Enemies killed this update become reusable once everything that
+        # keeps track of them has had a chance to drop them
+        self.spawner.update(delta)
+
+        profiler.count("enemies", len(self.enemy_group))
+        profiler.count("family", len(self.family_group))
+        profiler.count("bullets", len(self.bullet_group))
+        profiler.count("debris", len(self.debris))
+
+        if self.recorder is not None:
+            self.recorder.end_frame(self)
+
+    def rescue(self, family_member: FamilyMember) -> None:
+        """The player picked up a family member, take them off the field."""
+
+        family_member.kill()
+        self.family_index.remove(family_member)
+        if self.entity_store is not None:
+            self.entity_store.mark_dirty()
+        self.scoreboard.rescue((family_member.position.x, family_member.position.y))
+
+    def restart_wave(self) -> None:
+        """After the player dies, the wave starts over with whatever is left
+        of it: the player back in the middle, every enemy somewhere new away
+        from them, and no bullets.
+        """
+
+        self.sync_sprites() # Family members are kept where they are, so they need writing back
+        self.player.position.update(self.screen_rect.center)
+        self.player.rect.center = self.player.position
+        for bullet in self.bullet_group.sprites():
+            bullet.kill()
+
+        enemies = self.enemy_group.sprites()
+        coords = helper_funcs.generate_rand_coords(self.screen_rect, len(enemies), 0.6, 1.0, self.rng)
+        for enemy, coord in zip(enemies, coords):
+            enemy.position.update(coord)
+            enemy.rect.center = enemy.position
+
+        self.enemy_index.rebuild(enemies)
+        self.previous_positions.clear()
+        self.static_layer.invalidate() # The stationary ones moved too
+        self.full_redraw = True
+        if self.entity_store is not None:
+            self.entity_store.rebuild()
 
     def load_level(self, level_dict: LevelType, clear=True) -> bool:
         """Handle instanciating game components into memory given a
         mapping of types to sets of coordinates. Returns True if loading
         is successful, False otherwise.
         """
+
+        if not self.start_level(level_dict, clear):
+            return False
+        self.continue_level()
+        return True
+
+    def start_level(self, level_dict: LevelType, clear=True) -> bool:
+        """The first part of load_level. Checks the level, clears out the
+        old one and puts the player in, and queues everything else up for
+        continue_level(). A wave of thousands of enemies can then be brought
+        in a chunk per frame instead of stalling one. Don't update() until
+        continue_level() says it's done. Returns False (and changes nothing)
+        if the level can't be loaded.
+        """
+
         if len(level_dict.get(Player, [])) != 1: # There must be exactly one player
             return False
+        enemy_types = get_args(EnemyType) # get_args returns what types make up the Union
+        for obj_type in level_dict:
+            if obj_type is not Player and obj_type is not FamilyMember and obj_type not in enemy_types:
+                return False # Unsupported class type
+
+        self.sync_sprites() # In case anything is kept (clear=False)
 
+        self.level_num += 1
+        self.scoreboard.new_level()
         if clear:
-            self.enemy_group.empty()
+            for enemy in self.enemy_group.sprites():
+                enemy.kill() # Hands it back to its pool
+            self.spawner.recycle_all()
             self.family_group.empty()
             self.player_group.empty()
-            self.bullet_group.empty()
-            self.destroyed_group.empty()
+            for bullet in self.bullet_group.sprites():
+                bullet.kill() # Hands it back to the bullet pool
+            self.debris.clear()
+            self.previous_positions.clear()
             del self.player # should this be `self.player = None`?
 
-        # Loop through each instanciable type in the dict and handle instanciating them. 
-        for obj_type in level_dict:
-            group: pygame.sprite.Group = None
-            if obj_type is Player:
-                # Have to handle this specially because we need to populate self.player
-                coord = level_dict[Player][0]
-                self.player = obj_type(coord, self.screen_rect) 
-                self.player_group.add(self.player)
-                continue
+        # Decode every image the level needs up front (once), so the
+        # constructors in continue_level only ever hit the cache.
+        library.preload_images(obj_type.image_path for obj_type in level_dict
+                                if getattr(obj_type, "image_path", None) is not None)
 
-            elif obj_type in get_args(EnemyType): # get_args returns what types make up the Union
-                group = self.enemy_group
+        # Have to handle this specially because we need to populate self.player
+        self.player = Player(level_dict[Player][0], self.screen_rect)
+        self.player_group.add(self.player)
 
-            elif obj_type is FamilyMember:
-                group = self.family_group
+        # New entities are added to the indexes as they're made, which ends
+        # up the same as rebuilding them once everything is in
+        self.enemy_index.rebuild(self.enemy_group)
+        self.family_index.rebuild(self.family_group)
 
-            # Unsupported class type
-            else:
-                return False
+        self.level_queue = [(obj_type, coord) for obj_type, coords in level_dict.items() if obj_type is not Player
+                            for coord in coords]
+        self.level_queued = 0
+        self.full_redraw = True
+        return True
 
-            # If it wasn't the player instanciate whatever was chosen and add them to their respective group.
-            for coord in level_dict[obj_type]:
-                new_instance = obj_type(coord, self.screen_rect)
-                group.add(new_instance)
+    def continue_level(self, limit: int | None = None) -> bool:
+        """Makes up to `limit` (by default all) more of the entities
+        start_level() queued up. Returns True once the whole level is in.
+        """
 
+        queue = self.level_queue
+        start = self.level_queued
+        end = len(queue) if limit is None else min(len(queue), start + limit)
+        for index in range(start, end):
+            obj_type, coord = queue[index]
+            if obj_type is FamilyMember:
+                member = FamilyMember(coord, self.screen_rect)
+                self.family_group.add(member)
+                self.family_index.insert(member)
+            else:
+                enemy = self.spawner.acquire(obj_type, coord)
+                self.file_enemy(enemy)
+                self.enemy_index.insert(enemy)
+        self.level_queued = end
+        if end < len(queue):
+            return False
+
+        self.level_queue = []
+        self.level_queued = 0
+        self.full_redraw = True
+        if self.entity_store is not None:
+            # Picked up again on the next update, so any tweaks made to the
+            # new entities before then (e.g. their speed) are kept.
+            self.entity_store.rebuild()
+        if self.recorder is not None:
+            self.recorder.level_loaded(self)
         return True
 
-    def draw(self, surface: pygame.Surface):
-        self.destroyed_group.draw(surface)
-        self.enemy_group.draw(surface)
-        self.family_group.draw(surface)
-        self.player_group.draw(surface)
-        self.bullet_group.draw(surface)
+    def sync_sprites(self) -> None:
+        """Writes back whatever the entity store has moved since the last
+        time. update() leaves that for draw() (and the other methods here
+        that look at every sprite), call it before reading enemy or family
+        positions from outside between updates.
+        """
+
+        if self.entity_store is not None and self.entity_store.stale():
+            with self.profiler.phase("sync sprites"):
+                self.entity_store.flush()
+
+    def save_previous_positions(self) -> None:
+        """Call right before the last simulation step of a frame, so draw()
+        can interpolate between that step and the one before it.
+        """
+
+        previous = self.previous_positions
+        previous.clear()
+        groups = (self.moving_enemy_group, self.family_group, self.player_group, self.bullet_group)
+        if self.entity_store is not None:
+            # Straight from the store, writing everything back here as well
+            # would double the cost of leaving it to draw()
+            previous.update(self.entity_store.rect_topleft_items(self.moving_enemy_group, self.family_group))
+            groups = (self.player_group, self.bullet_group)
+        for group in groups:
+            for sprite in group:
+                previous[sprite] = sprite.rect.topleft
+
+    def interpolate(self, alpha: float) -> list[tuple[pygame.Rect, tuple[int, int]]]:
+        """Moves every sprite's rect `alpha` of the way from its previous
+        position to its current one. Returns what's needed to put them back
+        afterwards with restore_positions().
+        """
+
+        moved = []
+        previous = self.previous_positions
+        if alpha >= 1 or not previous:
+            return moved
+
+        for group in (self.moving_enemy_group, self.family_group, self.player_group, self.bullet_group):
+            for sprite in group:
+                prev = previous.get(sprite)
+                if prev is None: # Spawned this step, nothing to blend from
+                    continue
+
+                rect = sprite.rect
+                current = rect.topleft
+                if prev == current:
+                    continue
+                moved.append((rect, current))
+                rect.topleft = (round(prev[0] + (current[0] - prev[0]) * alpha),
+                                round(prev[1] + (current[1] - prev[1]) * alpha))
+        return moved
 
-    def create_enemy(self, type: type[EnemyType], pos: helper_funcs.CoordType) -> EnemyType:
-        new_enemy = type(pos)
-        self.add_enemy(new_enemy)
+    @staticmethod
+    def restore_positions(moved: list[tuple[pygame.Rect, tuple[int, int]]]) -> None:
+        for rect, topleft in moved:
+            rect.topleft = topleft
+
+    def draw(self, surface: pygame.Surface, alpha: float = 1.0, step: float = 0.0):
+        """Draws everything, over the top of whatever was on `surface`
+        (there's no need to clear it first). With a fixed timestep, `alpha` is how far the
+        display is between the previous simulation step and the latest one,
+        and `step` is the length of a step in seconds. The default draws
+        everything exactly where it is.
+        """
+
+        self.sync_sprites()
+        with self.profiler.phase("draw"):
+            self.prepare_atlas()
+            self.static_layer.refresh(self.static_enemy_group)
+            surface.blit(self.static_layer.image, (0, 0)) # Clears the screen too
+            moved = self.interpolate(alpha)
+            self.debris_rects = self.debris.draw(surface, (1 - alpha) * step, self.atlas)
+            self.atlas.draw_groups(surface, (self.moving_enemy_group, self.family_group, self.player_group,
+                                             self.bullet_group), dirty=False)
+            self.restore_positions(moved)
+
+    def draw_dirty(self, surface: pygame.Surface, alpha: float = 1.0, step: float = 0.0) -> list[pygame.Rect]:
+        """Erases everything drawn last frame by copying the background over
+        it, draws everything again and returns the rects that changed, ready
+        to be passed to pygame.display.update. The first frame (or the first
+        after set_dirty_rendering / load_level) redraws the whole screen.
+        """
+
+        groups = (self.moving_enemy_group, self.family_group, self.player_group, self.bullet_group)
+
+        self.sync_sprites()
+        if self.full_redraw:
+            self.full_redraw = False
+            self.draw(surface, alpha, step)
+            return [surface.get_rect()]
+
+        # Everything has to be cleared before anything is drawn, otherwise
+        # clearing one group could erase part of another. Clearing copies
+        # from the static layer, so stationary enemies under a moving sprite
+        # come back with it. Wherever one was added or destroyed gets copied
+        # over as well.
+        with self.profiler.phase("clear"):
+            static_rects = self.static_layer.refresh(self.static_enemy_group)
+            background = self.static_layer.image
+            for rect in static_rects:
+                surface.blit(background, rect, rect)
+            for rect in self.debris_rects:
+                surface.blit(background, rect, rect)
+            for group in groups:
+                group.clear(surface, background)
+
+        with self.profiler.phase("draw"):
+            # The groups remember the interpolated rects, which is what has
+            # to be erased next frame.
+            self.prepare_atlas()
+            moved = self.interpolate(alpha)
+            dirty = static_rects
+            dirty.extend(self.debris_rects)
+            self.debris_rects = self.debris.draw(surface, (1 - alpha) * step, self.atlas)
+            dirty.extend(self.debris_rects)
+            dirty.extend(self.atlas.draw_groups(surface, groups))
+            self.restore_positions(moved)
+        return dirty
+
+    def set_dirty_rendering(self, enabled: bool) -> None:
+        self.dirty_rendering = enabled
+        self.full_redraw = True
+
+    def prepare_atlas(self) -> None:
+        """Builds the sprite atlas the first time something is drawn: every
+        png in imgs/, the solid color placeholders and a bullet for every
+        direction. After that it's only rebuilt if an image that isn't in it
+        turned up in the last frame.
+        """
+
+        atlas = self.atlas
+        if atlas.surface is None:
+            library.preload_images(sorted(glob.glob("imgs/*.png")))
+            images = [*library.images.values(), *library.solids.values(), *self.bullet_pool.image_cache.prerender()]
+            for image in images:
+                atlas.add(image)
+            atlas.build()
+        elif atlas.missing:
+            atlas.build()
+
+    def background_image(self) -> pygame.Surface:
+        """What's behind the sprites, stationary enemies included. Use it to
+        erase anything drawn over the game (overlays, the HUD).
+        """
+
+        return self.static_layer.image
+
+    def create_enemy(self, type: type[EnemyType], pos: helper_funcs.CoordType) -> EnemyType | None:
+        """Spawns an enemy mid-game, reusing a dead one if there is one.
+        Returns None if the spawner's budget or rate limit refused it.
+        """
+
+        return self.spawner.spawn(type, pos)
+
+    def add_obstacle(self, rect: pygame.Rect) -> None:
+        """Marks an area homing enemies have to path around."""
+
+        if self.flow_field is None:
+            self.flow_field = FlowField(self.screen_rect)
+        self.flow_field.add_obstacle(rect)
 
     def add_enemy(self, enemy: EnemyType):
+        # Pooled enemies could still have a position from their last life
+        self.previous_positions.pop(enemy, None)
+        self.file_enemy(enemy)
+        self.enemy_index.insert(enemy)
+        if self.entity_store is not None:
+            self.entity_store.added(enemy)
+
+    def file_enemy(self, enemy: EnemyType) -> None:
+        """Adds an enemy to enemy_group and whichever of the moving / static
+        groups it belongs in.
+        """
+
         self.enemy_group.add(enemy)
+        if enemy.stationary:
+            self.static_enemy_group.add(enemy)
+        else:
+            self.moving_enemy_group.add(enemy)
 
     def shoot(self, pos: helper_funcs.CoordType):
+        """Fires a bullet from the player towards `pos`, for shots that come
+        from outside of update (mouse clicks). Gets recorded if there's a
+        recorder.
+        """
+
+        if self.recorder is not None:
+            self.recorder.record_shot(pos)
+        self.fire_bullet(pos)
+
+    def fire_bullet(self, pos: helper_funcs.CoordType):
         """Given a coordinate, get the components for a bullet fired
         from the player towards said coordinate, spawn it, add it to
         the group, and play the shot fired sound.
         """
 
         pos, vel = helper_funcs.shoot_at(self.player.position, pos)
-        new_bullet = Bullet(pos, vel, self.screen_rect, self.sound_library['explosion'])
+        new_bullet = self.bullet_pool.acquire(pos, vel)
+        # Pooled bullets could still have a position from their last life
+        self.previous_positions.pop(new_bullet, None)
         self.bullet_group.add(new_bullet)
-        self.sound_library['shoot'].play()
+        self.play_sound('shoot')
 
-    @staticmethod
-    def init_joystick(id: int) -> pygame.joystick.Joystick:
-        return pygame.joystick.Joystick(id) 
+    def start_recording(self, recorder) -> None:
+        self.recorder = recorder
+        recorder.start(self)
 
-    def set_joystick(self, joystick: pygame.joystick.Joystick) -> None:
-        self.joystick = joystick
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.stop(self)
+        return recorder
 
-    def remove_joystick(self) -> None:
-        self.joystick = None
+    def debris_sources(self) -> dict[str, pygame.Surface]:
+        """The image each kind of enemy breaks into, by type name."""
 
-    def init_and_set_joystick(self, id: int):
-        self.set_joystick(Director.init_joystick(id))
+        return {enemy_type.__name__: enemy_type.shared_image() for enemy_type in get_args(EnemyType)}
+
+    def snapshot(self) -> GameState:
+        """Everything needed to carry on the game from this exact point, as
+        plain lists and numbers (so it can be saved as JSON). Used by replays
+        to seek without playing from the start.
+        """
+
+        self.sync_sprites()
+        enemies = list(self.enemy_group)
+        family = list(self.family_group)
+        enemy_ids = {sprite: i for i, sprite in enumerate(enemies)}
+        family_ids = {sprite: i for i, sprite in enumerate(family)}
+        source_names = {image: name for name, image in self.debris_sources().items()}
+
+        return {
+            "level_num": self.level_num,
+            "scoreboard": self.scoreboard.snapshot(),
+            "kills": self.kills,
+            "reload_timer": self.reload_timer,
+            "rng": self.rng.getstate(),
+            "player": [self.player.position.x, self.player.position.y, *self.player.rect.topleft],
+            "enemies": [[type(enemy).__name__, enemy.position.x, enemy.position.y, *enemy.rect.topleft, enemy.speed]
+                        for enemy in enemies],
+            "family": [[member.position.x, member.position.y, *member.rect.topleft, member.speed,
+                        member.velocity.x, member.velocity.y, member.direction_timer, member.direction_timer_max]
+                       for member in family],
+            "bullets": [[bullet.position.x, bullet.position.y, bullet.velocity.x, bullet.velocity.y,
+                         bullet.step.x, bullet.step.y] for bullet in self.bullet_group],
+            "debris": self.debris.snapshot(source_names),
+            "enemy_cells": self.enemy_index.cell_order(enemy_ids),
+            "family_cells": self.family_index.cell_order(family_ids)
+        }
+
+    def restore(self, state: GameState) -> None:
+        """Puts the game back to a snapshot() exactly, so the same inputs
+        from here on play out the same way they did the first time.
+        """
+
+        self.level_num = state["level_num"]
+        self.scoreboard.restore(state["scoreboard"])
+        self.kills = state["kills"]
+        self.reload_timer = state["reload_timer"]
+
+        # JSON turns the tuples in the state into lists
+        version, internal, gauss = state["rng"]
+        self.rng.setstate((version, tuple(internal), gauss))
+
+        for enemy in self.enemy_group.sprites():
+            enemy.kill()
+        self.spawner.recycle_all()
+        self.family_group.empty()
+        self.player_group.empty()
+        for bullet in self.bullet_group.sprites():
+            bullet.kill()
+        self.previous_positions.clear()
+
+        x, y, left, top = state["player"]
+        self.player = Player((x, y), self.screen_rect)
+        self.player.rect.topleft = (left, top)
+        self.player_group.add(self.player)
+
+        enemy_types = {enemy_type.__name__: enemy_type for enemy_type in get_args(EnemyType)}
+        enemies = []
+        for type_name, x, y, left, top, speed in state["enemies"]:
+            enemy = self.spawner.acquire(enemy_types[type_name], (x, y))
+            enemy.rect.topleft = (left, top)
+            enemy.speed = speed
+            enemies.append(enemy)
+            self.file_enemy(enemy)
+
+        family = []
+        for x, y, left, top, speed, vel_x, vel_y, timer, timer_max in state["family"]:
+            member = FamilyMember((x, y), self.screen_rect)
+            member.rect.topleft = (left, top)
+            member.speed = speed
+            member.velocity = pygame.math.Vector2(vel_x, vel_y)
+            member.direction_timer = timer
+            member.direction_timer_max = timer_max
+            family.append(member)
+        self.family_group.add(family)
+
+        for x, y, vel_x, vel_y, step_x, step_y in state["bullets"]:
+            bullet = self.bullet_pool.acquire((x, y), (vel_x, vel_y))
+            bullet.velocity.update(vel_x, vel_y)
+            bullet.step.update(step_x, step_y)
+            self.bullet_group.add(bullet)
+
+        self.debris.restore(state["debris"], self.debris_sources())
+        self.enemy_index.restore_cell_order(state["enemy_cells"], enemies)
+        self.family_index.restore_cell_order(state["family_cells"], family)
+        self.full_redraw = True
+        if self.entity_store is not None:
+            self.entity_store.rebuild()
+
+    def play_sound(self, name: str) -> None:
+        """Asks for one of the registered sounds to be played this frame.
+        Does nothing when headless.
+        """
+
+        self.audio.play(name)
 
     def get_joystick_vecs(self) -> tuple[pygame.math.Vector2 | None, pygame.math.Vector2 | None]:
         """Robotron is typically a "twin-stick" game, where one stick controls
         the movement while the other controls the shooting. This code currently
         works on an xbox one controller, as that is what I have for testing.
-        
+
         Returns a tuple with two Vector2 instances, either of which may be None
-        if the magnitude is small enough (to avoid jitter).
-        """
-
-        if self.joystick is None:
-            return (None, None)
-
-        joy = self.joystick
-        left_x_axis = joy.get_axis(0)
-        left_y_axis = joy.get_axis(1)
-        right_x_axis = joy.get_axis(2)
-        right_y_axis = joy.get_axis(3)
-    
-        # Adjust this min_value to avoid drift / jitter with the inputs.
-        min_value = 0.1
-
-        # Movement with the left analog stick, shooting with the right
-        movement_vec = None
-        movement_magnitude = (left_x_axis * left_x_axis) + (left_y_axis * left_y_axis) # Hypotenuse (x^2 + y^2)
-        if movement_magnitude >= min_value:
-            movement_vec = pygame.math.Vector2(left_x_axis, left_y_axis)
-            movement_vec.normalize_ip()    
-
-        shooting_vec = None
-        shooting_magnitude = (right_x_axis * right_x_axis) + (right_y_axis * right_y_axis)
-        if shooting_magnitude >= min_value:
-            shooting_vec = pygame.math.Vector2(right_x_axis, right_y_axis)
-            shooting_vec.normalize_ip()
-
-        return (movement_vec, shooting_vec)
+        if the stick is in its deadzone (to avoid jitter). They belong to the
+        controls and change in place, so copy them to keep them.
+        """
+
+        return self.controls.snapshot(0).vectors()
@@ -1,29 +1,83 @@
 import pygame
 import helper_funcs
+from assets import library
+from flow_field import FlowField
 
 class BaseEnemy(pygame.sprite.Sprite):
 
     reward: int = 0
+    speed: int = 50 # pixels / second
+    image_path: str = "imgs/Enemy.png"
+
+    # Stationary enemies never get update() called on them, and are drawn
+    # once into the Director's static layer rather than every frame.
+    stationary: bool = False
+
+    # Where to head relative to the player. Enforcers will aim for a spot
+    # near the player rather than right at them.
+    target_offset: tuple[float, float] = (0, 0)
 
     def __init__(self, pos: helper_funcs.CoordType, screen_rect: pygame.Rect):
         pygame.sprite.Sprite.__init__(self)
 
-        # TODO: Don't load the images each time an enemy is instantiated. Load them once elsewhere and pass them in.
-        self.image: pygame.Surface = pygame.image.load("imgs/Enemy.png").convert()
+        # Images are shared between every instance through the asset library,
+        # so a wave of 500 grunts only decodes the png once.
+        self.image: pygame.Surface = self.shared_image()
 
         self.position = pygame.math.Vector2(pos)
-        self.speed: int = 50
 
         self.rect = self.image.get_rect()
         self.rect.center = self.position
 
         self.screen_rect = screen_rect
 
-    def update(self, delta: float, target_pos: helper_funcs.CoordType) -> None:
-        """Updates the position of the enemy. Moves towards target_pos."""
+        # Killed enemies go back to this pool (if there is one) to be reused
+        self.pool = None
+
+    @classmethod
+    def shared_image(cls) -> pygame.Surface:
+        """The image every enemy of this type uses, straight from the asset
+        library (no need to make an enemy to get it).
+        """
+
+        return library.image(cls.image_path)
+
+    def reset(self, pos: helper_funcs.CoordType) -> None:
+        """Puts an enemy coming back out of a pool at `pos`, as if it had
+        just been made. Anything that changes while an enemy is alive should
+        be set back here (subclasses with more state should extend it).
+        """
 
-        # Move directly towards the player's current position
-        vel = (target_pos - self.position).normalize()
+        self.position.update(pos)
+        self.rect.center = self.position
+        self.speed = type(self).speed # In case it was changed (sweep.py does)
+
+    def kill(self) -> None:
+        # Only hand it back to the pool once, however many times it's killed
+        if self.pool is not None and self.alive():
+            pygame.sprite.Sprite.kill(self)
+            self.pool.release(self)
+        else:
+            pygame.sprite.Sprite.kill(self)
+
+    def update(self, delta: float, target_pos: helper_funcs.CoordType, flow_field: FlowField | None = None) -> None:
+        """Updates the position of the enemy. Moves towards target_pos (plus
+        target_offset), following the flow field around any obstacles.
+        """
+
+        target = target_pos
+        if self.target_offset != (0, 0):
+            target = target_pos + pygame.math.Vector2(self.target_offset)
+
+        direction = None
+        if flow_field is not None:
+            direction = flow_field.direction(self.position, target)
+
+        if direction is None:
+            # Move directly towards the player's current position
+            vel = (target - self.position).normalize()
+        else:
+            vel = pygame.math.Vector2(direction)
         self.position += vel * self.speed * delta
 
         self.rect.center = self.position
@@ -33,12 +87,13 @@ class Electrode(BaseEnemy):
     """Stationary. Can be destroyed by player by shooting."""
 
     reward = 100
+    speed = 0
+    stationary = True
 
-    def __init__(self, pos: helper_funcs.CoordType, screen_rect: pygame.Rect):
-        BaseEnemy.__init__(self, pos, screen_rect)
-        self.speed = 0
-        self.image = pygame.Surface(self.image.get_size())
-        self.image.fill((255, 255, 255))
+    @classmethod
+    def shared_image(cls) -> pygame.Surface:
+        # No art yet, a white block the size of the enemy image
+        return library.solid(library.image(cls.image_path).get_size(), (255, 255, 255))
 
 class Grunt(BaseEnemy):
     """Moves towards player in a straight line. Can be destroyed by
@@ -46,8 +101,5 @@ class Grunt(BaseEnemy):
     """
 
     reward = 200
-
-    def __init__(self, pos: helper_funcs.CoordType, screen_rect: pygame.Rect):
-        BaseEnemy.__init__(self, pos, screen_rect)
-        self.speed = 100
+    speed = 100
 
@@ -0,0 +1,389 @@
+import random
+
+import pygame
+
+from family import FamilyMember
+from flow_field import FlowField
+
+# numpy is optional. Without it the Director just keeps updating every sprite
+# on its own like it always has.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HOMING = 0
+WANDERING = 1
+
+# Never a real cell, so new entities always get filed
+UNKNOWN_CELL = (-2 ** 62, -2 ** 62)
+
+
+class EntityStore:
+    """Structure-of-arrays version of BaseEnemy.update and FamilyMember.update.
+    Positions, speeds and velocities for every enemy and family member live in
+    contiguous numpy arrays so homing, wandering and clamping to the screen
+    can be done for the whole wave at once. The sprites' position / rect are
+    written back afterwards so collisions and drawing work like normal.
+
+    Writing back is most of the cost, so update(write_back=False) leaves it
+    for later: flush() writes back everything that moved since it was last
+    called, and flush_sprite() just the one sprite (SpatialHash.refresh does
+    that for each sprite a collision check looks at). cell_moves() hands the
+    collision indexes whatever changed cells, straight from the arrays. With
+    a fixed timestep that's one full write back per rendered frame however
+    many steps it ran.
+
+    The math is done in the same order as the per-sprite code, so the results
+    match it to within floating point tolerance (and rect rounding works the
+    same way pygame's does).
+
+    Sprites are picked up from their groups the first time update() sees
+    them, including their speed at that moment. Call added() for every
+    sprite put in a group mid-game and mark_dirty() after killing any, since
+    a kill and an add in the same frame leave the groups the same size. If
+    something moves an entity or changes its speed behind the store's back,
+    call flush() first and rebuild() after.
+    """
+
+    def __init__(self, screen_rect: pygame.Rect, capacity: int = 256):
+        if np is None:
+            raise ImportError("EntityStore requires numpy")
+
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.sprites: list[pygame.sprite.Sprite] = []
+        self.rows: dict[pygame.sprite.Sprite, int] = {} # Sprite -> its index in the arrays
+        self.count = 0
+        self._allocate(capacity)
+
+        # Set when sprites were added or killed since the last sync. Sprites
+        # in `fresh` are read again even if the store already has them, since
+        # pooled enemies come back as the same object. It's a dict used as an
+        # ordered set so they're added in the order they joined the groups.
+        self.dirty = False
+        self.fresh: dict[pygame.sprite.Sprite, None] = {}
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _allocate(self, capacity: int) -> None:
+        old_count = self.count
+        old = getattr(self, "position", None)
+
+        self.capacity = capacity
+        position = np.zeros((capacity, 2))
+        velocity = np.zeros((capacity, 2))
+        speed = np.zeros(capacity)
+        size = np.zeros((capacity, 2), dtype=np.int64)
+        kind = np.zeros(capacity, dtype=np.int8)
+        direction_timer = np.zeros(capacity)
+        direction_timer_max = np.zeros(capacity)
+        target_offset = np.zeros((capacity, 2))
+        topleft = np.zeros((capacity, 2), dtype=np.int64) # Where the rect is (or will be once written back)
+        cell = np.zeros((capacity, 2), dtype=np.int64) # The collision index cell cell_moves() last reported
+        pending = np.zeros(capacity, dtype=bool) # Moved since it was last written back
+
+        if old is not None:
+            position[:old_count] = self.position[:old_count]
+            velocity[:old_count] = self.velocity[:old_count]
+            speed[:old_count] = self.speed[:old_count]
+            size[:old_count] = self.size[:old_count]
+            kind[:old_count] = self.kind[:old_count]
+            direction_timer[:old_count] = self.direction_timer[:old_count]
+            direction_timer_max[:old_count] = self.direction_timer_max[:old_count]
+            target_offset[:old_count] = self.target_offset[:old_count]
+            topleft[:old_count] = self.topleft[:old_count]
+            cell[:old_count] = self.cell[:old_count]
+            pending[:old_count] = self.pending[:old_count]
+
+        self.position = position
+        self.velocity = velocity
+        self.speed = speed
+        self.size = size
+        self.kind = kind
+        self.direction_timer = direction_timer
+        self.direction_timer_max = direction_timer_max
+        self.target_offset = target_offset
+        self.topleft = topleft
+        self.cell = cell
+        self.pending = pending
+
+    def add(self, sprite: pygame.sprite.Sprite) -> None:
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        i = self.count
+        self.position[i] = (sprite.position.x, sprite.position.y)
+        self.speed[i] = sprite.speed
+        self.size[i] = sprite.rect.size
+        self.topleft[i] = sprite.rect.topleft
+        self.cell[i] = UNKNOWN_CELL
+        self.pending[i] = False
+        if isinstance(sprite, FamilyMember):
+            self.kind[i] = WANDERING
+            self.velocity[i] = (sprite.velocity.x, sprite.velocity.y)
+            self.direction_timer[i] = sprite.direction_timer
+            self.direction_timer_max[i] = sprite.direction_timer_max
+        else:
+            self.kind[i] = HOMING
+            self.velocity[i] = (0, 0)
+            self.target_offset[i] = sprite.target_offset
+
+        self.sprites.append(sprite)
+        self.rows[sprite] = i
+        self.count += 1
+
+    def added(self, sprite: pygame.sprite.Sprite) -> None:
+        """`sprite` was just put in one of the groups (or back in, out of a
+        pool), so read it on the next update.
+        """
+
+        self.fresh[sprite] = None
+        self.dirty = True
+
+    def mark_dirty(self) -> None:
+        """Sprites were killed, drop them on the next update."""
+
+        self.dirty = True
+
+    def rebuild(self, *groups: pygame.sprite.AbstractGroup) -> None:
+        """Re-reads every sprite in `groups` from scratch."""
+
+        self.sprites = []
+        self.rows = {}
+        self.count = 0
+        self.fresh.clear()
+        self.dirty = True
+        for group in groups:
+            for sprite in group:
+                self.add(sprite)
+
+    def sync(self, *groups: pygame.sprite.AbstractGroup) -> None:
+        """Drops sprites that were killed and picks up ones that were added
+        since the last frame, keeping everything else in the same order.
+        """
+
+        total = sum(len(group) for group in groups)
+        if not self.dirty and total == self.count:
+            return
+
+        # One set lookup per sprite is a lot quicker than calling alive()
+        members = set().union(*(group.spritedict for group in groups))
+        fresh = self.fresh
+        alive = [i for i, sprite in enumerate(self.sprites) if sprite in members and sprite not in fresh]
+        self.fresh = {}
+        self.dirty = False
+        if len(alive) != self.count:
+            keep = np.array(alive, dtype=np.int64)
+            n = len(alive)
+            self.position[:n] = self.position[keep]
+            self.velocity[:n] = self.velocity[keep]
+            self.speed[:n] = self.speed[keep]
+            self.size[:n] = self.size[keep]
+            self.kind[:n] = self.kind[keep]
+            self.direction_timer[:n] = self.direction_timer[keep]
+            self.direction_timer_max[:n] = self.direction_timer_max[keep]
+            self.target_offset[:n] = self.target_offset[keep]
+            self.topleft[:n] = self.topleft[keep]
+            self.cell[:n] = self.cell[keep]
+            self.pending[:n] = self.pending[keep]
+            self.sprites = [self.sprites[i] for i in alive]
+            self.rows = {sprite: i for i, sprite in enumerate(self.sprites)}
+            self.count = n
+
+        # Sprites added through added() are known, only go looking through
+        # the groups for ones that weren't
+        for sprite in fresh:
+            if sprite in members:
+                self.add(sprite)
+
+        if self.count != total:
+            known = set(self.sprites)
+            for group in groups:
+                for sprite in group:
+                    if sprite not in known:
+                        self.add(sprite)
+
+    def update(self, delta: float, target_pos: pygame.math.Vector2,
+               enemy_group: pygame.sprite.AbstractGroup, family_group: pygame.sprite.AbstractGroup,
+               rng: random.Random = random, flow_field: FlowField | None = None,
+               write_back: bool = True) -> None:
+        """Does BaseEnemy.update for every enemy and FamilyMember.update for
+        every family member, then copies the results back to the sprites
+        (unless `write_back` is False, see flush()).
+        """
+
+        self.sync(enemy_group, family_group)
+        n = self.count
+        if n == 0:
+            return
+
+        position = self.position[:n]
+        velocity = self.velocity[:n]
+        speed = self.speed[:n]
+        homing = self.kind[:n] == HOMING
+        wandering = ~homing
+
+        # -- Homing (BaseEnemy.update) --
+        # vel = (target_pos - position).normalize(). Anything sitting exactly
+        # on the target stays put instead of raising like Vector2 would.
+        if homing.any():
+            target = np.array((target_pos[0], target_pos[1])) + self.target_offset[:n][homing]
+            homing_position = position[homing]
+            diff = target - homing_position
+            length = np.sqrt(diff[:, 0] * diff[:, 0] + diff[:, 1] * diff[:, 1])
+            length[length == 0] = np.inf
+            direction = diff / length[:, None]
+            if flow_field is not None and flow_field.obstacles:
+                self._follow_flow_field(flow_field, homing_position, target, direction)
+            velocity[homing] = direction
+
+        # -- Wandering (FamilyMember.update) --
+        if wandering.any():
+            timer = self.direction_timer[:n]
+            timer[wandering] -= delta
+
+            # Only a few family members pick a new direction on any given
+            # frame, and the random numbers have to be drawn in the same order
+            # as the sprite version, so this part stays a plain loop.
+            for i in np.flatnonzero(wandering & (timer <= 0)).tolist():
+                new_velocity = rng.choice(FamilyMember.VELOCITY_OPTS)
+                velocity[i] = (new_velocity.x, new_velocity.y)
+                timer[i] = self.direction_timer_max[i] + rng.random()
+                self.sprites[i].velocity = new_velocity
+
+        position += velocity * speed[:, None] * delta
+
+        # -- Rect syncing and affix_to_screen --
+        # Rects round half away from zero when given a float center.
+        center = np.where(position >= 0, np.floor(position + 0.5), -np.floor(-position + 0.5)).astype(np.int64)
+        size = self.size[:n]
+        topleft = center - size // 2
+
+        screen = self.screen_rect
+        low = np.array(screen.topleft)
+        high = np.array(screen.bottomright) - size
+        clamped = np.minimum(np.maximum(topleft, low), high)
+
+        # Same as affix_to_screen, only snap the position to the rect if the
+        # clamp actually moved it.
+        moved = (clamped != topleft).any(axis=1)
+        if moved.any():
+            position[moved] = clamped[moved] + size[moved] // 2
+
+        # Stationary entities (Electrodes) never need writing back
+        changed = np.flatnonzero((speed != 0) | moved)
+        self.topleft[changed] = clamped[changed]
+        self.pending[changed] = True
+        if write_back:
+            self.flush()
+
+    def stale(self) -> bool:
+        """Whether anything moved that hasn't been written back yet."""
+
+        return bool(self.pending[:self.count].any())
+
+    def flush(self) -> None:
+        """Writes back every sprite that moved since the last time."""
+
+        pending = np.flatnonzero(self.pending[:self.count])
+        if self.fresh:
+            # Pooled enemies that came back are already where they should be
+            fresh = self.fresh
+            sprites = self.sprites
+            pending = np.array([i for i in pending.tolist() if sprites[i] not in fresh], dtype=np.int64)
+        self._write_back(pending, self.topleft[pending])
+        self.pending[pending] = False
+
+    def flush_sprite(self, sprite: pygame.sprite.Sprite) -> None:
+        """Writes back one sprite, if it moved since it was last written."""
+
+        i = self.rows.get(sprite)
+        if i is None or not self.pending[i] or sprite in self.fresh:
+            return
+        self.pending[i] = False
+        position = sprite.position
+        position.x = self.position.item(i, 0)
+        position.y = self.position.item(i, 1)
+        sprite.rect.topleft = (self.topleft.item(i, 0), self.topleft.item(i, 1))
+        if self.kind[i] == WANDERING:
+            sprite.direction_timer = self.direction_timer.item(i)
+
+    def rect_topleft_items(self, *groups: pygame.sprite.AbstractGroup) -> zip:
+        """(sprite, rect topleft) for every sprite in `groups`, from the
+        arrays, so it's right whether or not they've been written back.
+        """
+
+        self.sync(*groups)
+        n = self.count
+        return zip(self.sprites, zip(self.topleft[:n, 0].tolist(), self.topleft[:n, 1].tolist()))
+
+    def cell_moves(self, cell_size: int, family: bool) -> list[tuple[pygame.sprite.Sprite, tuple[int, int]]]:
+        """(sprite, cell) for every enemy (or family member) whose rect's
+        center moved into a different `cell_size` cell since the last call,
+        for SpatialHash.sync. Works from the arrays, so it doesn't matter
+        whether they've been written back yet.
+        """
+
+        n = self.count
+        cells = (self.topleft[:n] + self.size[:n] // 2) // cell_size
+        changed = (cells != self.cell[:n]).any(axis=1) & (self.kind[:n] == (WANDERING if family else HOMING))
+        indices = np.flatnonzero(changed)
+        if not len(indices):
+            return []
+
+        self.cell[indices] = cells[indices]
+        sprites = self.sprites
+        return [(sprites[i], (x, y)) for i, x, y in
+                zip(indices.tolist(), cells[indices, 0].tolist(), cells[indices, 1].tolist())]
+
+    @staticmethod
+    def _cell_index(flow_field: FlowField, points):
+        # Same as FlowField.cell_index for a whole array of points
+        bounds = flow_field.bounds
+        col = np.clip((points[:, 0] - bounds.left) // flow_field.cell_size, 0, flow_field.cols - 1)
+        row = np.clip((points[:, 1] - bounds.top) // flow_field.cell_size, 0, flow_field.rows - 1)
+        return row.astype(np.int64) * flow_field.cols + col.astype(np.int64)
+
+    def _follow_flow_field(self, flow_field: FlowField, position, target, direction) -> None:
+        """Swaps the straight line directions in `direction` for the flow
+        field's wherever it has one, like FlowField.direction does for each
+        sprite.
+        """
+
+        cells = self._cell_index(flow_field, position)
+        target_cells = self._cell_index(flow_field, target)
+        for target_index in np.unique(target_cells).tolist():
+            dir_x, dir_y = flow_field.field(target_index)
+            heading_here = target_cells == target_index
+            field_x = np.frombuffer(dir_x)[cells]
+            field_y = np.frombuffer(dir_y)[cells]
+            use_field = heading_here & (cells != target_index) & ((field_x != 0) | (field_y != 0))
+            direction[use_field, 0] = field_x[use_field]
+            direction[use_field, 1] = field_y[use_field]
+            # NaN where the target can't be reached, they wait
+            direction[use_field & np.isnan(field_x)] = 0.0
+
+    def _write_back(self, indices, topleft) -> None:
+        # This loop is most of the cost of the store, so it sticks to flat
+        # lists and plain attribute sets (Vector2.update and nested tolist()
+        # calls are several times slower).
+        sprites = self.sprites
+        changed_sprites = [sprites[i] for i in indices.tolist()]
+        xs = self.position[indices, 0].tolist()
+        ys = self.position[indices, 1].tolist()
+        lefts = topleft[:, 0].tolist()
+        tops = topleft[:, 1].tolist()
+        for sprite, x, y, left, top in zip(changed_sprites, xs, ys, lefts, tops):
+            position = sprite.position
+            position.x = x
+            position.y = y
+            sprite.rect.topleft = (left, top)
+
+        timer = self.direction_timer
+        for i in indices[self.kind[indices] == WANDERING].tolist():
+            sprites[i].direction_timer = float(timer[i])
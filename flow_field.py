@@ -0,0 +1,311 @@
+import heapq
+import math
+from array import array
+
+import pygame
+
+SQRT2 = math.sqrt(2)
+DIAGONAL = 1 / SQRT2
+
+# Corners of a cell, pulled in a little (see FlowField.line_of_sight)
+CORNERS = ((1e-6, 1e-6), (1 - 1e-6, 1e-6), (1e-6, 1 - 1e-6), (1 - 1e-6, 1 - 1e-6))
+
+STAND_STILL = (0.0, 0.0)
+
+# (column step, row step, cost) to each of a cell's 8 neighbours
+NEIGHBOURS = ((-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+              (-1, -1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (1, 1, SQRT2))
+
+
+class FlowField:
+    """Grid over the play area that tells homing enemies which way to go to
+    reach a target while walking around obstacles. The path from every cell
+    to the target cell is worked out in one go (Dijkstra outwards from the
+    target), so each enemy only has to look up the cell it's standing in and
+    the cost of pathing doesn't depend on how many enemies there are.
+
+    Fields are cached per target cell and only recomputed when the target
+    moves into a different cell (or the obstacles change). Enemies heading
+    for a point near the player instead of the player (like Enforcers) just
+    ask for a different target, and get their own cached field.
+
+    Cells with a clear line of sight to the target cell store a direction
+    of (0, 0), which means "head straight for the target". That keeps
+    movement in the open exactly like it was, the field only takes over
+    around obstacles. Cells that can't reach the target at all (it's
+    walled in) store NaN, and enemies there wait rather than walk through
+    the wall.
+    """
+
+    def __init__(self, bounds: pygame.Rect, cell_size: int = 32, max_cached: int = 8):
+        self.bounds = pygame.Rect(bounds)
+        self.cell_size = cell_size
+        self.cols = max(1, math.ceil(self.bounds.width / cell_size))
+        self.rows = max(1, math.ceil(self.bounds.height / cell_size))
+        self.blocked = bytearray(self.cols * self.rows)
+        self.obstacles: list[pygame.Rect] = []
+
+        # target cell -> (x directions, y directions), oldest first
+        self.max_cached = max_cached
+        self.fields: dict[int, tuple[array, array]] = {}
+        self.neighbour_lists: list[list[tuple[int, float, int, int]]] | None = None
+        self.blocked_sums: list[int] | None = None
+        self.recomputes = 0
+        self.last_target: tuple[float, float] | None = None
+        self.last_field: tuple[int, array, array] | None = None
+
+    def cell_index(self, x: float, y: float) -> int:
+        """Index of the cell holding (x, y). Points outside the bounds use
+        the nearest cell on the edge.
+        """
+
+        col = min(max(int((x - self.bounds.left) // self.cell_size), 0), self.cols - 1)
+        row = min(max(int((y - self.bounds.top) // self.cell_size), 0), self.rows - 1)
+        return row * self.cols + col
+
+    def add_obstacle(self, rect: pygame.Rect) -> None:
+        """Blocks every cell `rect` touches."""
+
+        rect = pygame.Rect(rect)
+        self.obstacles.append(rect)
+        size = self.cell_size
+        first_col = max((rect.left - self.bounds.left) // size, 0)
+        last_col = min((rect.right - 1 - self.bounds.left) // size, self.cols - 1)
+        first_row = max((rect.top - self.bounds.top) // size, 0)
+        last_row = min((rect.bottom - 1 - self.bounds.top) // size, self.rows - 1)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                self.blocked[row * self.cols + col] = 1
+        self.invalidate()
+
+    def clear_obstacles(self) -> None:
+        self.obstacles.clear()
+        self.blocked = bytearray(self.cols * self.rows)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self.fields.clear()
+        self.neighbour_lists = None
+        self.blocked_sums = None
+        self.last_target = None
+
+    def is_blocked(self, pos: tuple[float, float]) -> bool:
+        return bool(self.blocked[self.cell_index(pos[0], pos[1])])
+
+    def field(self, target_index: int) -> tuple[array, array]:
+        """The (x, y) direction arrays for a target cell, computing them if
+        they aren't cached. Both are indexed by cell index.
+        """
+
+        field = self.fields.get(target_index)
+        if field is None:
+            if len(self.fields) >= self.max_cached:
+                del self.fields[next(iter(self.fields))]
+            field = self.fields[target_index] = self.compute(target_index)
+        return field
+
+    def direction(self, pos: tuple[float, float], target: tuple[float, float]) -> tuple[float, float] | None:
+        """Unit vector to move along from `pos` to reach `target`, (0, 0)
+        if there's no way there, or None if the enemy should head straight
+        at it.
+        """
+
+        if not self.obstacles:
+            return None
+
+        # Every enemy asks about the same target in a frame, so remember
+        # which field it was
+        target_key = (target[0], target[1])
+        if target_key == self.last_target:
+            target_index, dir_x, dir_y = self.last_field
+        else:
+            target_index = self.cell_index(target[0], target[1])
+            dir_x, dir_y = self.field(target_index)
+            self.last_target = target_key
+            self.last_field = (target_index, dir_x, dir_y)
+
+        size = self.cell_size
+        col = min(max(int((pos[0] - self.bounds.left) // size), 0), self.cols - 1)
+        row = min(max(int((pos[1] - self.bounds.top) // size), 0), self.rows - 1)
+        index = row * self.cols + col
+        if index == target_index:
+            return None
+
+        x, y = dir_x[index], dir_y[index]
+        if x == 0 and y == 0:
+            return None
+        if x != x: # NaN, can't get there from here
+            return STAND_STILL
+        return (x, y)
+
+    def can_step(self, col: int, row: int, step_col: int, step_row: int) -> bool:
+        """Whether the move from (col, row) to its neighbour is allowed.
+        Diagonal moves can't cut the corner of a blocked cell.
+        """
+
+        new_col = col + step_col
+        new_row = row + step_row
+        if not (0 <= new_col < self.cols and 0 <= new_row < self.rows):
+            return False
+
+        blocked = self.blocked
+        cols = self.cols
+        if blocked[new_row * cols + new_col]:
+            return False
+        if step_col and step_row and (blocked[row * cols + new_col] or blocked[new_row * cols + col]):
+            return False
+        return True
+
+    def neighbours(self) -> list[list[tuple[int, float, int, int]]]:
+        """For every cell, (neighbour index, cost, column step, row step) of
+        each neighbour it can step to. Only changes with the obstacles, so
+        it's worked out once instead of on every compute().
+        """
+
+        if self.neighbour_lists is None:
+            self.neighbour_lists = [
+                [(index + step_row * self.cols + step_col, cost, step_col, step_row)
+                 for step_col, step_row, cost in NEIGHBOURS
+                 if self.can_step(index % self.cols, index // self.cols, step_col, step_row)]
+                for index in range(self.cols * self.rows)]
+        return self.neighbour_lists
+
+    def blocked_count(self, col0: int, row0: int, col1: int, row1: int) -> int:
+        """How many blocked cells are in the box with corner cells (col0,
+        row0) and (col1, row1), from a summed area table that's only worked
+        out again when the obstacles change.
+        """
+
+        if self.blocked_sums is None:
+            width = self.cols + 1
+            sums = [0] * (width * (self.rows + 1))
+            for row in range(self.rows):
+                running = 0
+                for col in range(self.cols):
+                    running += self.blocked[row * self.cols + col]
+                    sums[(row + 1) * width + col + 1] = sums[row * width + col + 1] + running
+            self.blocked_sums = sums
+
+        sums = self.blocked_sums
+        width = self.cols + 1
+        left, right = min(col0, col1), max(col0, col1) + 1
+        top, bottom = min(row0, row1), max(row0, row1) + 1
+        return (sums[bottom * width + right] - sums[top * width + right]
+                - sums[bottom * width + left] + sums[top * width + left])
+
+    def line_of_sight(self, col: int, row: int, target_col: int, target_row: int) -> bool:
+        """Whether every straight line from anywhere in cell (col, row) to
+        anywhere in the target cell stays out of blocked cells. Those lines
+        sweep out the cell dragged along to the target, whose two long edges
+        join matching corners of the cells. A blocked cell is as wide across
+        that sweep as the sweep itself, so it can't fit inside without
+        crossing an edge, and walking the two edges is enough (the corners
+        are pulled in a hair so running along a blocked cell doesn't count).
+        """
+
+        # Nothing blocked in the box around both cells is the common case
+        if not self.blocked_count(col, row, target_col, target_row):
+            return True
+
+        # The two corners furthest to either side of the line between them
+        across = target_col - col
+        down = target_row - row
+        sides = sorted(CORNERS, key=lambda corner: corner[1] * across - corner[0] * down)
+        for corner_x, corner_y in (sides[0], sides[-1]):
+            if not self.clear_line(col + corner_x, row + corner_y, target_col + corner_x, target_row + corner_y):
+                return False
+        return True
+
+    def clear_line(self, x0: float, y0: float, x1: float, y1: float) -> bool:
+        """Walks every cell the segment between two points (in cell units)
+        passes through, one grid line crossing at a time, and returns False
+        if any of them is blocked.
+        """
+
+        blocked = self.blocked
+        cols = self.cols
+        col, row = int(x0), int(y0)
+        end_col, end_row = int(x1), int(y1)
+        dx = x1 - x0
+        dy = y1 - y0
+
+        # How far along the segment the next vertical / horizontal grid
+        # line is, and how far apart they are
+        step_col = 1 if dx > 0 else -1
+        step_row = 1 if dy > 0 else -1
+        next_x = (col + (dx > 0) - x0) / dx if dx else math.inf
+        next_y = (row + (dy > 0) - y0) / dy if dy else math.inf
+        gap_x = abs(1 / dx) if dx else math.inf
+        gap_y = abs(1 / dy) if dy else math.inf
+
+        # Exactly one step per grid line between the end cells, so rounding
+        # can't walk it past the end. Through a corner exactly one of the
+        # cells beside it gets checked too, which only errs on the safe side.
+        for _ in range(abs(end_col - col) + abs(end_row - row)):
+            if blocked[row * cols + col]:
+                return False
+            if row == end_row or (col != end_col and next_x <= next_y):
+                col += step_col
+                next_x += gap_x
+            else:
+                row += step_row
+                next_y += gap_y
+        return not blocked[row * cols + col]
+
+    def compute(self, target_index: int) -> tuple[array, array]:
+        self.recomputes += 1
+        cols = self.cols
+        count = cols * self.rows
+        blocked = self.blocked
+        neighbour_lists = self.neighbours()
+
+        # -- Distances to the target, Dijkstra outwards from it --
+        dist = [math.inf] * count
+        dist[target_index] = 0.0
+        heap = [(0.0, target_index)]
+        while heap:
+            cell_dist, index = heapq.heappop(heap)
+            if cell_dist > dist[index]:
+                continue
+
+            for neighbour, cost, _, _ in neighbour_lists[index]:
+                new_dist = cell_dist + cost
+                if new_dist < dist[neighbour]:
+                    dist[neighbour] = new_dist
+                    heapq.heappush(heap, (new_dist, neighbour))
+
+        # -- Directions, downhill to the closest neighbour --
+        dir_x = array("d", bytes(8 * count))
+        dir_y = array("d", bytes(8 * count))
+        target_row, target_col = divmod(target_index, cols)
+        for index in range(count):
+            cell_dist = dist[index]
+            if blocked[index] or index == target_index:
+                continue
+            if cell_dist == math.inf:
+                dir_x[index] = dir_y[index] = math.nan
+                continue
+
+            # If nothing is in the way the enemy can just head straight for
+            # the target. A path as short as on an empty grid is a quick way
+            # to rule that out, but a detour can cost the same as the
+            # straight line, so it still has to be checked.
+            row, col = divmod(index, cols)
+            across = abs(col - target_col)
+            down = abs(row - target_row)
+            if (cell_dist <= max(across, down) + (SQRT2 - 1) * min(across, down) + 1e-9
+                    and self.line_of_sight(col, row, target_col, target_row)):
+                continue
+
+            best_dist = cell_dist
+            best_step = None
+            for neighbour, _, step_col, step_row in neighbour_lists[index]:
+                if dist[neighbour] < best_dist:
+                    best_dist = dist[neighbour]
+                    best_step = (step_col, step_row)
+
+            if best_step is not None:
+                scale = DIAGONAL if best_step[0] and best_step[1] else 1.0
+                dir_x[index] = best_step[0] * scale
+                dir_y[index] = best_step[1] * scale
+        return dir_x, dir_y
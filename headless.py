@@ -0,0 +1,197 @@
+"""Runs the game without a window, speakers or a clock. Every frame advances
+by the same fixed delta, all randomness comes from one seeded random.Random
+and the player's input comes from a script, so the same seed and inputs
+always produce exactly the same game. Used for batch runs / AI training.
+
+    python headless.py --seed 42 --frames 36000
+"""
+
+import argparse
+import hashlib
+import random
+import struct
+import time
+from typing import Callable, Iterable
+
+import pygame
+
+from director import Director, LevelType
+import main
+
+# -- Types --
+VecLike = tuple[float, float] | pygame.math.Vector2
+LevelFactory = Callable[[random.Random], LevelType]
+
+
+class KeyState:
+    """Stands in for pygame.key.get_pressed(). Indexing it with a key
+    constant returns whether that key is being held.
+    """
+
+    def __init__(self, held: Iterable[int] = ()):
+        self.held = frozenset(held)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.held
+
+
+class InputFrame:
+    """Everything the player does on a single frame: the keys held down, the
+    joystick movement / shooting vectors and any mouse clicks (shots fired at
+    a position).
+    """
+
+    def __init__(self, keys: Iterable[int] = (), movement: VecLike | None = None,
+                 shooting: VecLike | None = None, shots: Iterable[VecLike] = ()):
+        self.keys = KeyState(keys)
+        self.movement = None if movement is None else pygame.math.Vector2(movement)
+        self.shooting = None if shooting is None else pygame.math.Vector2(shooting)
+        self.shots = tuple(shots)
+
+
+# What the player is doing when nobody is doing anything
+IDLE = InputFrame()
+
+
+class ScriptedInput:
+    """Hands out a pre-made InputFrame for each frame. Once the script runs
+    out the player stands still, unless `loop` is set.
+    """
+
+    def __init__(self, frames: list[InputFrame], loop: bool = False):
+        self.frames = frames
+        self.loop = loop
+
+    def frame(self, frame_num: int) -> InputFrame:
+        if frame_num < len(self.frames):
+            return self.frames[frame_num]
+
+        if self.loop and self.frames:
+            return self.frames[frame_num % len(self.frames)]
+
+        return IDLE
+
+
+class HeadlessGame:
+    """Drives a Director with a fixed timestep and no display or mixer."""
+
+    def __init__(self, seed: int, level: LevelType | LevelFactory = main.stock_level,
+                 input_source: ScriptedInput | None = None, delta: float = 1 / 60,
+                 screen_rect: pygame.Rect = main.SCREEN_RECT, use_entity_store: bool = False,
+                 infinite_lives: bool = False):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.delta = delta
+        self.input_source = input_source
+
+        self.director = Director(screen_rect, use_entity_store=use_entity_store, rng=self.rng, headless=True,
+                                 infinite_lives=infinite_lives)
+
+        # Levels can be passed in ready made, or as a function that builds one
+        # from the game's rng (so the layout is seeded too).
+        if callable(level):
+            level = level(self.rng)
+        if not self.director.load_level(level):
+            raise ValueError("Level could not be loaded")
+
+        self.frame = 0
+        self.time = 0.0
+
+    def step(self) -> None:
+        """Advances the game by one frame."""
+
+        frame_input = IDLE
+        if self.input_source is not None:
+            frame_input = self.input_source.frame(self.frame)
+
+        for shot in frame_input.shots:
+            self.director.shoot(shot)
+        self.director.update(self.delta, frame_input.keys, (frame_input.movement, frame_input.shooting))
+        # Nothing gets drawn, so every frame writes back whatever the
+        # entity store moved for anything looking at the sprites
+        self.director.sync_sprites()
+
+        self.frame += 1
+        self.time += self.delta
+
+    def run(self, frames: int, until: Callable[["HeadlessGame"], bool] | None = None) -> int:
+        """Steps `frames` times, or until `until(game)` returns True. Returns
+        how many frames were actually run.
+        """
+
+        for i in range(frames):
+            self.step()
+            if until is not None and until(self):
+                return i + 1
+        return frames
+
+    def state_digest(self) -> str:
+        """Hash of everything that makes up the game state. Two games that
+        were given the same seed and inputs have the same digest on every
+        frame.
+        """
+
+        director = self.director
+        digest = hashlib.sha256()
+        digest.update(struct.pack("<qdd", self.frame, self.time, director.reload_timer))
+        for group in (director.player_group, director.enemy_group, director.family_group,
+                      director.bullet_group):
+            digest.update(struct.pack("<q", len(group)))
+            for sprite in group:
+                digest.update(type(sprite).__name__.encode())
+                digest.update(struct.pack("<dd", sprite.position.x, sprite.position.y))
+
+        debris = director.debris
+        digest.update(struct.pack("<q", debris.count))
+        digest.update(debris.x[:debris.count].tobytes())
+        digest.update(debris.y[:debris.count].tobytes())
+        digest.update(repr(self.rng.getstate()).encode())
+        return digest.hexdigest()
+
+
+def random_input(seed: int, frames: int, hold_frames: int = 30) -> ScriptedInput:
+    """Makes a script where the player wanders around and shoots in random
+    directions, changing what they're doing every `hold_frames` frames.
+    """
+
+    rng = random.Random(seed)
+    script = []
+    for _ in range(0, frames, hold_frames):
+        frame_input = InputFrame(movement=pygame.math.Vector2(1, 0).rotate(rng.uniform(0, 360)),
+                                 shooting=pygame.math.Vector2(1, 0).rotate(rng.uniform(0, 360)))
+        script.extend([frame_input] * hold_frames)
+    return ScriptedInput(script)
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Run the game headless with a fixed timestep.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--delta", type=float, default=1 / 60, help="seconds per frame")
+    parser.add_argument("--entity-store", action="store_true", help="use the numpy entity store")
+    parser.add_argument("--check", action="store_true", help="run twice and make sure the results match")
+    parser.add_argument("--finite-lives", action="store_true",
+                        help="end the game when the player runs out of lives, instead of playing every frame")
+    args = parser.parse_args()
+
+    def play() -> tuple[HeadlessGame, float]:
+        game = HeadlessGame(args.seed, input_source=random_input(args.seed, args.frames),
+                            delta=args.delta, use_entity_store=args.entity_store,
+                            infinite_lives=not args.finite_lives)
+        start = time.perf_counter()
+        game.run(args.frames)
+        return game, time.perf_counter() - start
+
+    game, elapsed = play()
+    print(f"{game.frame} frames ({game.time:.1f}s of game time) in {elapsed:.2f}s, "
+          f"{game.frame / elapsed:.0f} frames/s, {game.time / elapsed:.1f}x real time")
+    print(f"state digest: {game.state_digest()}")
+
+    if args.check:
+        again, _ = play()
+        match = again.state_digest() == game.state_digest()
+        print("deterministic" if match else "MISMATCH between identical runs")
+
+
+if __name__ == "__main__":
+    run()
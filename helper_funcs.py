@@ -1,8 +1,23 @@
+import math
 import random
 import pygame
 
+# numpy is optional, generate_spawn_coords falls back to plain Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 CoordType = tuple[int, int] | tuple[float, float] | pygame.math.Vector2
 
+# generate_spawn_coords gives up on spacing once this many candidates in a
+# row fit less than 1 in SPAWN_GIVE_UP_RATE times. Batches are never smaller
+# than SPAWN_MIN_BATCH, so the last few spawns of a crowded ring still get
+# a fair number of tries before max_batches runs out.
+SPAWN_GIVE_UP_WINDOW = 2000
+SPAWN_GIVE_UP_RATE = 500
+SPAWN_MIN_BATCH = 256
+
 def affix_to_screen(sprite_obj: pygame.sprite.Sprite) -> None:
     """Prevents a sprite from wandering off screen. Keeps track of the
     old rectangle so we only update the position if the clamp modified
@@ -32,13 +47,15 @@ def shoot_at(start_pos: CoordType, aiming_pos: CoordType) -> tuple[pygame.math.V
 
     return pos, vel
 
-def random_radial_coord(center: CoordType, min_radius: float, max_radius: float) -> pygame.math.Vector2:
+def random_radial_coord(center: CoordType, min_radius: float, max_radius: float,
+                        rng: random.Random = random) -> pygame.math.Vector2:
     """Returns a random coordinate between min_radius and max_radius
-    pixels away from center
+    pixels away from center. Pass a seeded random.Random as rng to get the
+    same coordinates every time.
     """
 
-    random_angle = random.uniform(0, 360) # random angle on unit circle
-    random_dist = random.uniform(min_radius, max_radius) # Random distance away
+    random_angle = rng.uniform(0, 360) # random angle on unit circle
+    random_dist = rng.uniform(min_radius, max_radius) # Random distance away
     return pygame.math.Vector2(center) + vec2_from_polar(random_dist, random_angle)
 
 def vec2_from_polar(r: float, phi: float):
@@ -48,7 +65,8 @@ def vec2_from_polar(r: float, phi: float):
     vec.from_polar((r, phi))
     return vec
 
-def generate_rand_coords(spawn_rect: pygame.Rect, num: int, min_percent: float = 0.5, max_percent: float = 1.0) -> list[tuple[float, float]]:
+def generate_rand_coords(spawn_rect: pygame.Rect, num: int, min_percent: float = 0.5, max_percent: float = 1.0,
+                         rng: random.Random = random) -> list[tuple[float, float]]:
     """Generates `num` coords within spawn_rect, centered around the center of
     the rect. min_percent and max_percent control the range they will spawn 
     radially in the rect.
@@ -58,4 +76,148 @@ def generate_rand_coords(spawn_rect: pygame.Rect, num: int, min_percent: float =
     min_dim = min(spawn_rect.width, spawn_rect.height)
     min_radius = min_dim * min_percent / 2
     max_radius = min_dim * max_percent / 2
-    return [random_radial_coord(spawn_rect.center, min_radius, max_radius) for _ in range(num)]
\ No newline at end of file
+    return [random_radial_coord(spawn_rect.center, min_radius, max_radius, rng) for _ in range(num)]
+
+def generate_spawn_coords(spawn_rect: pygame.Rect, num: int, min_percent: float = 0.5, max_percent: float = 1.0,
+                          rng: "random.Random | np.random.Generator | int | None" = None,
+                          min_spacing: float = 0.0, exclude_center: CoordType | None = None,
+                          exclude_radius: float = 0.0, area_uniform: bool = False,
+                          max_batches: int = 64) -> list[tuple[float, float]]:
+    """Bulk version of generate_rand_coords for big waves. Samples every
+    coordinate in one vectorized call (when numpy is installed) and supports
+    a few constraints on where things can spawn:
+
+      - min_spacing: no two spawns closer than this many pixels
+      - exclude_center / exclude_radius: nothing spawns within exclude_radius
+        of exclude_center (e.g. the player)
+      - area_uniform: spread spawns evenly over the ring's area. By default
+        the distance from the center is uniform, which bunches spawns up
+        near the middle.
+
+    Spacing is checked against a grid of already accepted spawns, not every
+    pair. rng can be a numpy Generator, a seed, or a random.Random (which
+    seeds a Generator, so seeded games stay reproducible). If the
+    constraints can't all be met, fewer than `num` coordinates come back.
+    """
+
+    min_dim = min(spawn_rect.width, spawn_rect.height)
+    min_radius = min_dim * min_percent / 2
+    max_radius = min_dim * max_percent / 2
+    center_x, center_y = spawn_rect.center
+
+    if np is None:
+        python_rng = rng if isinstance(rng, random.Random) else random.Random(rng)
+        sample = _spawn_sampler_python(python_rng, center_x, center_y, min_radius, max_radius, area_uniform)
+    else:
+        if isinstance(rng, random.Random):
+            rng = np.random.default_rng(rng.getrandbits(64))
+        elif not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        sample = _spawn_sampler_numpy(rng, center_x, center_y, min_radius, max_radius, area_uniform)
+
+    if exclude_center is not None and exclude_radius > 0:
+        exclude_x, exclude_y = exclude_center[0], exclude_center[1]
+        exclude_sq = exclude_radius * exclude_radius
+    else:
+        exclude_x = exclude_y = exclude_sq = None
+
+    accepted: list[tuple[float, float]] = []
+    grid = _SpacingGrid(min_spacing) if min_spacing > 0 else None
+    tried = fitted = 0 # Candidates since the fit rate was last checked
+    for _ in range(max_batches):
+        remaining = num - len(accepted)
+        if remaining <= 0:
+            break
+
+        # Oversample a little since some candidates will be rejected
+        count = remaining + remaining // 4 + 8
+        if grid is None:
+            xs, ys = sample(count, exclude_x, exclude_y, exclude_sq)
+            accepted.extend(zip(xs[:remaining], ys[:remaining]))
+            continue
+
+        xs, ys = sample(max(count, SPAWN_MIN_BATCH), exclude_x, exclude_y, exclude_sq)
+        before = len(accepted)
+        for x, y in zip(xs, ys):
+            if grid.try_add(x, y):
+                accepted.append((x, y))
+                if len(accepted) == num:
+                    break
+
+        # One unlucky batch doesn't mean the ring is full, so only give up
+        # once a good few thousand candidates have hardly fit at all. Then
+        # it's about as full as the spacing allows and more batches would
+        # just be wasted time.
+        tried += len(xs)
+        fitted += len(accepted) - before
+        if tried >= SPAWN_GIVE_UP_WINDOW:
+            if fitted * SPAWN_GIVE_UP_RATE < tried:
+                break
+            tried = fitted = 0
+
+    return accepted
+
+def _spawn_sampler_numpy(rng, center_x: float, center_y: float, min_radius: float, max_radius: float,
+                         area_uniform: bool):
+    def sample(count: int, exclude_x, exclude_y, exclude_sq) -> tuple[list[float], list[float]]:
+        angles = rng.uniform(0, 2 * math.pi, count)
+        if area_uniform:
+            dists = np.sqrt(rng.uniform(min_radius * min_radius, max_radius * max_radius, count))
+        else:
+            dists = rng.uniform(min_radius, max_radius, count)
+        xs = center_x + dists * np.cos(angles)
+        ys = center_y + dists * np.sin(angles)
+
+        if exclude_sq is not None:
+            keep = (xs - exclude_x) ** 2 + (ys - exclude_y) ** 2 >= exclude_sq
+            xs = xs[keep]
+            ys = ys[keep]
+        return xs.tolist(), ys.tolist()
+
+    return sample
+
+def _spawn_sampler_python(rng: random.Random, center_x: float, center_y: float, min_radius: float,
+                          max_radius: float, area_uniform: bool):
+    def sample(count: int, exclude_x, exclude_y, exclude_sq) -> tuple[list[float], list[float]]:
+        xs = []
+        ys = []
+        for _ in range(count):
+            angle = rng.uniform(0, 2 * math.pi)
+            if area_uniform:
+                dist = math.sqrt(rng.uniform(min_radius * min_radius, max_radius * max_radius))
+            else:
+                dist = rng.uniform(min_radius, max_radius)
+            x = center_x + dist * math.cos(angle)
+            y = center_y + dist * math.sin(angle)
+            if exclude_sq is not None and (x - exclude_x) ** 2 + (y - exclude_y) ** 2 < exclude_sq:
+                continue
+            xs.append(x)
+            ys.append(y)
+        return xs, ys
+
+    return sample
+
+class _SpacingGrid:
+    """Grid of accepted spawn points for the min_spacing check. Cells are
+    min_spacing / sqrt(2) wide so each one can only ever hold one point, and
+    a new point only has to be checked against the 5x5 block of cells around
+    it.
+    """
+
+    def __init__(self, min_spacing: float):
+        self.min_spacing_sq = min_spacing * min_spacing
+        self.cell_size = min_spacing / math.sqrt(2)
+        self.cells: dict[tuple[int, int], tuple[float, float]] = {}
+
+    def try_add(self, x: float, y: float) -> bool:
+        cell_x = int(x // self.cell_size)
+        cell_y = int(y // self.cell_size)
+        cells = self.cells
+        for other_y in range(cell_y - 2, cell_y + 3):
+            for other_x in range(cell_x - 2, cell_x + 3):
+                other = cells.get((other_x, other_y))
+                if other is not None and (other[0] - x) ** 2 + (other[1] - y) ** 2 < self.min_spacing_sq:
+                    return False
+
+        cells[(cell_x, cell_y)] = (x, y)
+        return True
@@ -0,0 +1,105 @@
+import pygame
+
+from score import Scoreboard, RESCUED, EXTRA_LIFE
+
+TEXT_COLOR = (255, 255, 255)
+POPUP_COLOR = (255, 255, 0)
+POPUP_TIME = 1.0 # Seconds a "+400" stays up where a family member was rescued
+
+
+class Hud:
+    """Draws the score and lives in the top right corner, points popping up
+    where family members were rescued and GAME OVER at the end.
+
+    font.render is slow, so text is only rendered when it changes. The score
+    and lives each keep the value their image was made from, and popups are
+    cached per text since the same few values come up over and over.
+    """
+
+    def __init__(self, screen_rect: pygame.Rect, font_size: int = 28):
+        self.screen_rect = screen_rect
+        self.font_size = font_size
+        self.font: pygame.font.Font | None = None
+
+        self.score_value: int | None = None
+        self.score_image: pygame.Surface | None = None
+        self.lives_value: int | None = None
+        self.lives_image: pygame.Surface | None = None
+        self.game_over_image: pygame.Surface | None = None
+
+        self.popup_images: dict[str, pygame.Surface] = {}
+        self.popups: list[list] = [] # [image, center, seconds left]
+
+        self.renders = 0 # How many times font.render was called
+        self.drawn_rects: list[pygame.Rect] = []
+
+    def render(self, text: str, color: tuple[int, int, int]) -> pygame.Surface:
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.Font(None, self.font_size)
+        self.renders += 1
+        return self.font.render(text, True, color)
+
+    def update(self, delta: float, scoreboard: Scoreboard) -> None:
+        """Picks up the scoreboard's events and ages the popups. Call once a
+        frame, before drawing.
+        """
+
+        for event in scoreboard.take_recent():
+            if event.kind == RESCUED:
+                text = f"+{event.points}"
+            elif event.kind == EXTRA_LIFE:
+                text = "EXTRA LIFE"
+            else:
+                continue
+
+            image = self.popup_images.get(text)
+            if image is None:
+                image = self.popup_images[text] = self.render(text, POPUP_COLOR)
+            self.popups.append([image, event.position, POPUP_TIME])
+
+        if self.popups:
+            for popup in self.popups:
+                popup[2] -= delta
+            self.popups = [popup for popup in self.popups if popup[2] > 0]
+
+        if scoreboard.score != self.score_value:
+            self.score_value = scoreboard.score
+            self.score_image = self.render(f"{scoreboard.score:,}", TEXT_COLOR)
+        if scoreboard.lives != self.lives_value:
+            self.lives_value = scoreboard.lives
+            self.lives_image = self.render(f"LIVES {scoreboard.lives}", TEXT_COLOR)
+        if scoreboard.game_over and self.game_over_image is None:
+            self.game_over_image = self.render("GAME OVER", TEXT_COLOR)
+
+    def clear(self, surface: pygame.Surface, background: pygame.Surface) -> list[pygame.Rect]:
+        """Erases what draw() drew last time, for the dirty rect renderer.
+        Returns the rects that were erased.
+        """
+
+        for rect in self.drawn_rects:
+            surface.blit(background, rect, rect)
+        return self.drawn_rects
+
+    def draw(self, surface: pygame.Surface, game_over: bool = False) -> list[pygame.Rect]:
+        """Draws the HUD on top of everything else and returns the rects it
+        drew to.
+        """
+
+        rects = []
+        for image, center, _ in self.popups:
+            rects.append(surface.blit(image, image.get_rect(center=center).clamp(self.screen_rect)))
+
+        right = self.screen_rect.right - 8
+        top = self.screen_rect.top + 8
+        if self.score_image is not None:
+            rects.append(surface.blit(self.score_image, self.score_image.get_rect(topright=(right, top))))
+            top = rects[-1].bottom + 2
+        if self.lives_image is not None:
+            rects.append(surface.blit(self.lives_image, self.lives_image.get_rect(topright=(right, top))))
+        if game_over and self.game_over_image is not None:
+            rects.append(surface.blit(self.game_over_image,
+                                      self.game_over_image.get_rect(center=self.screen_rect.center)))
+
+        self.drawn_rects = rects
+        return rects
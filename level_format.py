@@ -0,0 +1,278 @@
+"""Compact binary format for levels / waves, so big scripted waves don't have
+to be generated with Python-level random_radial_coord calls at load time.
+
+File layout (everything little-endian):
+
+    header      b"R2085LVL", uint16 version, uint16 wave count, uint32 reserved
+    wave table  one (uint64 offset, uint32 length) per wave
+    waves       uint16 group count, uint16 reserved, then for each group
+                uint8 type id, 3 reserved bytes, uint32 count, and `count`
+                (x, y) float32 pairs
+
+Files are memory-mapped and the coordinates are read straight out of the
+mapped buffer, so opening a file with hundreds of waves costs nothing until
+a wave is actually used.
+
+    python level_format.py pack waves.lvl --waves 10 --grunts 500
+    python level_format.py info waves.lvl
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame
+
+from director import LevelType
+from enemy import Electrode, Grunt
+from family import FamilyMember
+from player import Player
+import helper_funcs
+
+MAGIC = b"R2085LVL"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHI")
+WAVE_ENTRY = struct.Struct("<QI")
+WAVE_HEADER = struct.Struct("<HH")
+GROUP_HEADER = struct.Struct("<B3xI")
+
+# Type ids stored in the file. Never reuse a number, old files depend on them.
+TYPE_IDS: dict[type, int] = {
+    Player: 1,
+    FamilyMember: 2,
+    Electrode: 3,
+    Grunt: 4
+}
+TYPES_BY_ID = {type_id: obj_type for obj_type, type_id in TYPE_IDS.items()}
+
+
+class PackedCoords:
+    """Read-only sequence of (x, y) tuples backed by a flat buffer of floats.
+    Director.load_level only needs len(), indexing and iteration, so it can
+    be handed one of these in place of a list of tuples.
+    """
+
+    def __init__(self, floats):
+        self.floats = floats
+
+    def __len__(self) -> int:
+        return len(self.floats) // 2
+
+    def __getitem__(self, index: int) -> tuple[float, float]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("coordinate index out of range")
+        return (self.floats[2 * index], self.floats[2 * index + 1])
+
+    def __iter__(self):
+        floats = self.floats
+        return zip(floats[0::2], floats[1::2])
+
+
+def encode_wave(level: LevelType) -> bytes:
+    """Packs one level dict into the binary wave format."""
+
+    chunks = [WAVE_HEADER.pack(len(level), 0)]
+    for obj_type, coords in level.items():
+        if obj_type not in TYPE_IDS:
+            raise ValueError(f"{obj_type.__name__} has no type id")
+
+        floats = array("f", (value for coord in coords for value in (coord[0], coord[1])))
+        if sys.byteorder != "little":
+            floats.byteswap()
+        chunks.append(GROUP_HEADER.pack(TYPE_IDS[obj_type], len(coords)))
+        chunks.append(floats.tobytes())
+    return b"".join(chunks)
+
+
+def decode_wave(buffer, copy: bool = False) -> LevelType:
+    """Turns an encoded wave back into a level dict. Without `copy` the
+    coordinates are views into `buffer`, so it has to stay open (and
+    unchanged) for as long as the level is being used.
+    """
+
+    view = memoryview(buffer)
+    group_count, _ = WAVE_HEADER.unpack_from(view, 0)
+    offset = WAVE_HEADER.size
+
+    level = {}
+    for _ in range(group_count):
+        type_id, count = GROUP_HEADER.unpack_from(view, offset)
+        offset += GROUP_HEADER.size
+        size = count * 8
+
+        if copy or sys.byteorder != "little":
+            floats = array("f")
+            floats.frombytes(view[offset:offset + size])
+            if sys.byteorder != "little":
+                floats.byteswap()
+        else:
+            floats = view[offset:offset + size].cast("f")
+        offset += size
+
+        if type_id not in TYPES_BY_ID:
+            raise ValueError(f"Unknown type id {type_id}")
+        level[TYPES_BY_ID[type_id]] = PackedCoords(floats)
+    return level
+
+
+def write_waves(path: str, waves: list[LevelType]) -> None:
+    encoded = [encode_wave(wave) for wave in waves]
+
+    offset = HEADER.size + WAVE_ENTRY.size * len(encoded)
+    table = []
+    for data in encoded:
+        table.append(WAVE_ENTRY.pack(offset, len(data)))
+        offset += len(data)
+
+    with open(path, "wb") as level_file:
+        level_file.write(HEADER.pack(MAGIC, VERSION, len(encoded), 0))
+        level_file.writelines(table)
+        level_file.writelines(encoded)
+
+
+class LevelFile:
+    """A memory-mapped file of waves. Use as a context manager (or call
+    close()) when done with it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, wave_count, _ = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a level file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is version {version}, only version {VERSION} is supported")
+
+        self.waves = [WAVE_ENTRY.unpack_from(self.buffer, HEADER.size + i * WAVE_ENTRY.size)
+                      for i in range(wave_count)]
+
+    def __len__(self) -> int:
+        return len(self.waves)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def wave_bytes(self, index: int) -> memoryview:
+        offset, length = self.waves[index]
+        return memoryview(self.buffer)[offset:offset + length]
+
+    def wave(self, index: int, copy: bool = False) -> LevelType:
+        """Decodes wave `index`. Without `copy` the coordinates are read from
+        the mapped file, which must stay open while they're used.
+        """
+
+        return decode_wave(self.wave_bytes(index), copy)
+
+    def close(self) -> None:
+        # Zero-copy waves still pointing into the map would make closing it
+        # fail, in which case it's left for the garbage collector.
+        try:
+            self.buffer.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+
+class WaveStream:
+    """Plays through the waves of a LevelFile in order. While one wave is
+    being played the next one is decoded on a background thread (copied out
+    of the map, which is what pulls it in from disk), so switching waves
+    never waits on the file.
+    """
+
+    def __init__(self, level_file: LevelFile, loop: bool = False):
+        self.level_file = level_file
+        self.loop = loop
+        self.next_index = 0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wave-prefetch")
+        self.pending: Future | None = None
+        self.prefetch()
+
+    def prefetch(self) -> None:
+        index = self.next_index
+        if index >= len(self.level_file):
+            if not self.loop or len(self.level_file) == 0:
+                self.pending = None
+                return
+            index = self.next_index = 0
+        self.pending = self.executor.submit(self.level_file.wave, index, True)
+
+    def next_wave(self) -> LevelType | None:
+        """Returns the next wave (decoding it now if the prefetch hasn't
+        finished) and starts prefetching the one after. Returns None once
+        there are no waves left.
+        """
+
+        if self.pending is None:
+            return None
+
+        wave = self.pending.result()
+        self.next_index += 1
+        self.prefetch()
+        return wave
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+def random_wave(screen_rect: pygame.Rect, rng: random.Random, grunts: int, electrodes: int,
+                family: int) -> LevelType:
+    return {
+        Player:       [screen_rect.center],
+        Electrode:    helper_funcs.generate_rand_coords(screen_rect, electrodes, rng=rng),
+        Grunt:        helper_funcs.generate_spawn_coords(screen_rect, grunts, rng=rng),
+        FamilyMember: helper_funcs.generate_rand_coords(screen_rect, family, rng=rng)
+    }
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Create or inspect binary level files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack = commands.add_parser("pack", help="generate random waves into a level file")
+    pack.add_argument("path")
+    pack.add_argument("--waves", type=int, default=10)
+    pack.add_argument("--grunts", type=int, default=10, help="grunts in the first wave")
+    pack.add_argument("--growth", type=float, default=1.5, help="grunt multiplier per wave")
+    pack.add_argument("--electrodes", type=int, default=10)
+    pack.add_argument("--family", type=int, default=5)
+    pack.add_argument("--size", type=int, nargs=2, default=(800, 800))
+    pack.add_argument("--seed", type=int, default=0)
+
+    info = commands.add_parser("info", help="list the waves in a level file")
+    info.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "pack":
+        rng = random.Random(args.seed)
+        screen_rect = pygame.Rect((0, 0), args.size)
+        waves = [random_wave(screen_rect, rng, round(args.grunts * args.growth ** i), args.electrodes, args.family)
+                 for i in range(args.waves)]
+        write_waves(args.path, waves)
+
+    with LevelFile(args.path) as level_file:
+        print(f"{args.path}: {len(level_file)} waves")
+        for i in range(len(level_file)):
+            wave = level_file.wave(i, copy=True)
+            counts = ", ".join(f"{len(coords)} {obj_type.__name__}" for obj_type, coords in wave.items())
+            print(f"  wave {i + 1}: {counts}")
+
+
+if __name__ == "__main__":
+    run()
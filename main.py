@@ -1,10 +1,21 @@
 from datetime import datetime
+import argparse
+import os
+import random
 import pygame
 
 from enemy import Electrode, Grunt
 from family import FamilyMember
-from director import Director, EnemyType
+from director import Director, EnemyType, LevelType
 from player import Player
+from render_target import RenderTarget, ARCADE_SIZE, INTEGER, SMOOTH
+from level_format import LevelFile, WaveStream
+from timestep import FixedTimestep
+from replay import InputRecorder
+from capture import FrameCapture, PNG, RAW
+from hud import Hud
+from controls import Controls
+from bullet import ANALOG_DIRECTIONS, FAITHFUL_DIRECTIONS
 
 import helper_funcs
 
@@ -12,36 +23,111 @@ import helper_funcs
 SCREEN_SIZE = WIDTH, HEIGHT = (800, 800)
 SCREEN_RECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
 
-def run() -> None:
-    """Put the main game logic in a function, to make it more `pythonic`"""
+# How many enemies / family members of a new wave get made per frame. A
+# 5000 Grunt wave comes in over 10 frames (about 3 ms each) instead of
+# stalling one for around 30 ms.
+LEVEL_LOAD_PER_FRAME = 500
+
+def stock_level(rng: random.Random = random, screen_rect: pygame.Rect = SCREEN_RECT) -> LevelType:
+    """The level the game starts on. Pass a seeded rng to get the same
+    layout every time.
+    """
+
+    return {
+        Electrode:    helper_funcs.generate_rand_coords(screen_rect, 10, rng=rng),
+        Grunt:        helper_funcs.generate_rand_coords(screen_rect, 10, rng=rng),
+        Player:       [screen_rect.center],
+        FamilyMember: helper_funcs.generate_rand_coords(screen_rect, 5, rng=rng)
+    }
+
+def run(logical_size: tuple[int, int] = SCREEN_SIZE, scale_mode: str = INTEGER,
+        waves_path: str | None = None, sim_rate: float = 120, fps: int = 60,
+        record: bool = True, capture_every: int = 2, capture_format: str = PNG,
+        max_frames: int | None = None, eight_way: bool = False) -> None:
+    """Put the main game logic in a function, to make it more `pythonic`
+
+    The game is played on a `logical_size` surface which gets scaled up to
+    fit the window (see render_target.py). By default it's the same size as
+    the window so no scaling happens.
+
+    If `waves_path` points at a level file (see level_format.py) its waves
+    are played in order instead of the stock level, moving on to the next
+    one whenever every enemy is dead. A file with no waves in it gets the
+    stock level.
+
+    The game simulates `sim_rate` steps per second no matter what the frame
+    rate is (capped at `fps`), and draws everything interpolated between
+    the last two steps so movement stays smooth.
+
+    Unless `record` is False the session is saved to replays/ on exit, see
+    replay.py for playing it back.
+
+    F2 saves a screenshot and F6 starts / stops recording every
+    `capture_every`th frame to captures/ (see capture.py). Neither waits for
+    the images to be written.
+
+    Only the display is started up front. The mixer and joysticks are
+    started once the first frame is on screen, so they don't hold it up.
+    `max_frames` quits after that many frames (benchmarks/startup.py uses
+    it to time a cold start).
+
+    With `eight_way` the controller sticks and bullets only go in 8
+    directions, like the arcade game.
+    """
 
     # -- Setup --
-    pygame.init()
-    pygame.joystick.init()
+    # pygame.init() would start every module (mixer, joysticks, ...) before
+    # anything shows up, most of which aren't needed yet
+    pygame.display.init()
 
     screen = pygame.display.set_mode(SCREEN_SIZE)
     pygame.display.set_caption("ROBOTRON: 2085")
 
+    # Everything gets drawn to render_target.surface, then scaled to the window
+    render_target = RenderTarget(screen, logical_size, scale_mode)
+    play_rect = render_target.get_rect()
+
+    # Screenshots and recordings get encoded and saved on a background thread
+    frame_capture = FrameCapture(SCREEN_SIZE)
+
     clock = pygame.time.Clock()
+    timestep = FixedTimestep(sim_rate)
     done = False
 
     # Game director holds the state of the game, and handles the major functions.
-    game_director = Director(SCREEN_RECT)
+    # It gets its own rng so nothing else using `random` can throw off replays.
+    game_director = Director(play_rect, rng=random.Random(),
+                             bullet_directions=FAITHFUL_DIRECTIONS if eight_way else ANALOG_DIRECTIONS,
+                             controls=Controls(directions=8 if eight_way else None))
 
-    level1_dict = {
-        Electrode:    helper_funcs.generate_rand_coords(SCREEN_RECT, 10),
-        Grunt:        helper_funcs.generate_rand_coords(SCREEN_RECT, 10),
-        Player:       [SCREEN_RECT.center],
-        FamilyMember: helper_funcs.generate_rand_coords(SCREEN_RECT, 5)
-    }
-    game_director.load_level(level1_dict)
+    # Score, lives and rescue points, drawn over the game
+    hud = Hud(play_rect)
+
+    recorder = None
+    if record:
+        recorder = InputRecorder()
+        game_director.start_recording(recorder)
+
+    wave_stream = None
+    first_wave = None
+    if waves_path is not None:
+        wave_stream = WaveStream(LevelFile(waves_path))
+        first_wave = wave_stream.next_wave()
+        if first_wave is None:
+            print(f"{waves_path} has no waves in it, playing the stock level instead")
+            wave_stream.close()
+            wave_stream.level_file.close()
+            wave_stream = None
+    game_director.load_level(first_wave if first_wave is not None else stock_level(screen_rect=play_rect))
+    loading_level = False # The next wave is still being brought in (see LEVEL_LOAD_PER_FRAME)
 
-    if pygame.joystick.get_count() > 0:
-        game_director.set_joystick(Director.init_joystick(0))
+    profiler = game_director.profiler
+    frames_shown = 0
 
     # -- Main game loop --
     while not done:
-        delta = clock.tick(60) / 1000.0 # Time passed since the last frame in SECONDS
+        delta = clock.tick(fps) / 1000.0 # Time passed since the last frame in SECONDS
+        profiler.begin_frame()
 
         # Loop through all game events
         for event in pygame.event.get():
@@ -56,35 +142,152 @@ def run() -> None:
                     done = True
 
                 if event.key == pygame.K_F2:
-                    pygame.image.save(screen, "screenshots/screenshot_{}.png".format(datetime.now().strftime('%Y-%m-%dT%H%M%S')))
+                    frame_capture.screenshot(screen, "screenshots/screenshot_{}.png".format(datetime.now().strftime('%Y-%m-%dT%H%M%S')))
+
+                # Start / stop recording frames
+                if event.key == pygame.K_F6:
+                    if frame_capture.recording:
+                        frame_capture.stop_recording()
+                    else:
+                        frame_capture.start_recording("captures/capture_{}".format(datetime.now().strftime('%Y-%m-%dT%H%M%S')),
+                                                      capture_every, capture_format)
+
+                # Toggle only redrawing the parts of the screen that changed
+                if event.key == pygame.K_F3:
+                    game_director.set_dirty_rendering(not game_director.dirty_rendering)
+
+                # Toggle the frame profiler and its overlay
+                if event.key == pygame.K_F4:
+                    profiler.set_enabled(not profiler.enabled)
+                    profiler.show_overlay = profiler.enabled
+                    game_director.full_redraw = True # Wipe the old overlay
+
+                # Save what the profiler has collected so far
+                if event.key == pygame.K_F5 and profiler.enabled:
+                    os.makedirs("profiles", exist_ok=True)
+                    timestamp = datetime.now().strftime('%Y-%m-%dT%H%M%S')
+                    profiler.export_csv("profiles/profile_{}.csv".format(timestamp))
+                    profiler.export_chrome_trace("profiles/trace_{}.json".format(timestamp))
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: # Left mouse button
-                    game_director.shoot(event.pos)
-
-            if event.type == pygame.JOYDEVICEADDED:
-                if game_director.joystick is None:
-                    game_director.set_joystick(game_director.init_joystick(event.device_index))
-
-            # TODO: Make robust against multiple joysticks / controllers being plugged in / removed
-            elif event.type == pygame.JOYDEVICEREMOVED:
-                if game_director.joystick is not None:
-                    game_director.remove_joystick()
-                    
-        # Update all entities
+                    # Clicks are in window coordinates, the game isn't
+                    game_director.shoot(render_target.window_to_logical(event.pos))
+
+            # Controllers being plugged in / removed and their sticks moving
+            game_director.controls.handle_event(event)
+
+        # Update all entities, in as many fixed size steps as fit in the
+        # time that has passed
         pressed_keys = pygame.key.get_pressed()
-        game_director.update(delta, pressed_keys)
+        steps = 0
+        if loading_level:
+            # Nothing moves until the whole wave is in
+            with profiler.phase("load level"):
+                loading_level = not game_director.continue_level(LEVEL_LOAD_PER_FRAME)
+        else:
+            steps = timestep.advance(delta)
+        for i in range(steps):
+            if i == steps - 1:
+                game_director.save_previous_positions()
+            game_director.update(timestep.step, pressed_keys)
+
+            # Wave cleared, the next one has already been decoded in the
+            # background. It's made over the next few frames.
+            if wave_stream is not None and not game_director.enemy_group:
+                if (next_wave := wave_stream.next_wave()) is not None:
+                    loading_level = game_director.start_level(next_wave)
+                    if loading_level:
+                        break
+        profiler.count("sim steps", steps)
+
+        # Everything the steps asked to play, once per frame
+        with profiler.phase("audio"):
+            game_director.audio.flush()
 
-        # Fill the screen with black to reset it.
-        screen.fill((0, 0, 0))
+        alpha = timestep.alpha
+        hud.update(delta, game_director.scoreboard)
+        game_over = game_director.scoreboard.game_over
 
-        game_director.draw(screen)
+        canvas = render_target.surface
+        if game_director.dirty_rendering:
+            # The overlay and the HUD aren't sprites, so erase them by hand
+            # before the director redraws everything on top.
+            old_overlay = profiler.overlay_rect if profiler.show_overlay else None
+            if old_overlay is not None:
+                canvas.blit(game_director.background_image(), old_overlay, old_overlay)
+            old_hud_rects = hud.clear(canvas, game_director.background_image())
 
-        pygame.display.update()
+            # Only clear, redraw and push the rects that changed this frame.
+            dirty_rects = game_director.draw_dirty(canvas, alpha, timestep.step)
+            dirty_rects.extend(old_hud_rects)
+            dirty_rects.extend(hud.draw(canvas, game_over))
+            if (overlay_rect := profiler.draw_overlay(canvas)) is not None:
+                dirty_rects.append(overlay_rect)
+            if old_overlay is not None:
+                dirty_rects.append(old_overlay)
+
+            with profiler.phase("display.update"):
+                render_target.present()
+                pygame.display.update(render_target.logical_to_window_rects(dirty_rects))
+
+        else:
+            # Starts with the cached background, no need to clear the screen first
+            game_director.draw(canvas, alpha, timestep.step)
+            hud.draw(canvas, game_over)
+            profiler.draw_overlay(canvas)
+
+            with profiler.phase("display.update"):
+                render_target.present()
+                pygame.display.update()
+
+        with profiler.phase("capture"):
+            frame_capture.capture_frame(screen)
+        profiler.count("dropped frames", frame_capture.dropped)
+
+        profiler.end_frame()
+
+        frames_shown += 1
+        if frames_shown == 1:
+            # The first frame is up, now start everything else. Controllers
+            # that are already plugged in show up as JOYDEVICEADDED events.
+            pygame.joystick.init()
+            game_director.audio.start()
+        if frames_shown == max_frames:
+            done = True
 
     # -- Clean Up --
+    frame_capture.close() # Waits for anything still being saved
+    if recorder is not None:
+        game_director.stop_recording()
+        os.makedirs("replays", exist_ok=True)
+        recorder.save("replays/session_{}.rep".format(datetime.now().strftime('%Y-%m-%dT%H%M%S')))
+    if wave_stream is not None:
+        wave_stream.close()
+        wave_stream.level_file.close()
     pygame.quit()
 
 # Use the standard way of calling our code. Prevents this from being an issue if imported.
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ROBOTRON: 2085")
+    parser.add_argument("--arcade", action="store_true",
+                        help="play on a {}x{} screen scaled up to the window".format(*ARCADE_SIZE))
+    parser.add_argument("--smooth", action="store_true",
+                        help="smooth scaling to fill the window instead of whole pixel scaling")
+    parser.add_argument("--waves", metavar="LEVEL_FILE",
+                        help="play the waves in a level file made with level_format.py")
+    parser.add_argument("--sim-rate", type=float, default=120,
+                        help="simulation steps per second, independent of the frame rate (default 120)")
+    parser.add_argument("--fps", type=int, default=60, help="frame rate cap (default 60)")
+    parser.add_argument("--no-record", action="store_true", help="don't save a replay of the session")
+    parser.add_argument("--capture-every", type=int, default=2, metavar="N",
+                        help="when recording frames (F6), save every Nth one (default 2)")
+    parser.add_argument("--capture-raw", action="store_true",
+                        help="record frames as one raw RGB stream instead of PNGs")
+    parser.add_argument("--eight-way", action="store_true",
+                        help="controller sticks and bullets only go in 8 directions, like the arcade game")
+    args = parser.parse_args()
+
+    run(ARCADE_SIZE if args.arcade else SCREEN_SIZE, SMOOTH if args.smooth else INTEGER, args.waves,
+        args.sim_rate, args.fps, not args.no_record, args.capture_every, RAW if args.capture_raw else PNG,
+        eight_way=args.eight_way)
\ No newline at end of file
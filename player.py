@@ -1,15 +1,17 @@
 import pygame
 import helper_funcs
+from assets import library
 
 class Player(pygame.sprite.Sprite):
-    
+
+    image_path: str = "imgs/Player.png"
+
     def __init__(self, pos: helper_funcs.CoordType, screen_rect: pygame.Rect):
         pygame.sprite.Sprite.__init__(self)
 
-        # Need to use .convert here to make it play nicely with pygame. Not 
-        # exactly sure what it does but you get a big performance hit for not 
-        # calling it.
-        self.image = pygame.image.load("imgs/Player.png").convert()
+        # The library handles calling .convert on the image (you get a big
+        # performance hit for not calling it) and only does it once.
+        self.image = library.image(self.image_path)
 
         # by putting pos in the pygame.math.Vector2 constructor we make sure it
         # is not sharing a reference with another entity.
@@ -20,6 +22,9 @@ class Player(pygame.sprite.Sprite):
 
         self.speed = 250 # pixels / second
 
+        # Reused every update instead of making a new vector each time
+        self.velocity = pygame.math.Vector2()
+
         self.screen_rect = screen_rect
 
     def update(self, delta: float, pressed_keys: list[bool], movement_vec: pygame.math.Vector2 = None) -> None:
@@ -27,11 +32,12 @@ class Player(pygame.sprite.Sprite):
 
         # Use a velocity instead of updating the player's position directly, so we
         # can normalize the direction.
-        vel = pygame.math.Vector2()
+        vel = self.velocity
         if movement_vec is not None:
-            vel.xy = movement_vec.xy
-            
+            vel.update(movement_vec)
+
         else:
+            vel.update(0, 0)
             if pressed_keys[pygame.K_w]:
                 vel.y -= 1
             if pressed_keys[pygame.K_s]:
@@ -46,8 +52,11 @@ class Player(pygame.sprite.Sprite):
         # vel.x += int(pressed_keys[pygame.K_d]) - int(pressed_keys[pygame.K_a])
 
         # If the player wants to move, move them at `self.speed` pixels/second
-        if vel.magnitude() != 0:
-            self.position += vel.normalize() * self.speed * delta
+        if vel.x or vel.y:
+            vel.normalize_ip()
+            vel *= self.speed
+            vel *= delta
+            self.position += vel
             self.rect.center = self.position
 
         helper_funcs.affix_to_screen(self)
@@ -0,0 +1,197 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+
+class _NullPhase:
+    """Stands in for a Phase while the profiler is off, so timing a block of
+    code costs about as much as an empty `with` statement.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_PHASE = _NullPhase()
+
+
+class Phase:
+    """Times one named part of the frame. There is one of these per name and
+    they get reused every frame, so timing doesn't allocate anything.
+    """
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class FrameProfiler:
+    """Keeps rolling timings for each phase of the frame (input, updates,
+    collisions, drawing, display.update...) and counts of the entities in
+    each group. Can show them as an overlay on the screen and export them as
+    CSV or as a Chrome trace (open chrome://tracing or ui.perfetto.dev and
+    load the file).
+
+    Off by default. While it's off, phase() hands back a shared do-nothing
+    context manager and nothing gets recorded.
+    """
+
+    def __init__(self, window: int = 240, trace_frames: int = 600):
+        self.enabled = False
+        self.show_overlay = False
+
+        # How many frames of samples the percentiles are worked out from
+        self.window = window
+        self.samples: dict[str, deque[float]] = {}
+        self.counts: dict[str, int] = {}
+        self.phases: dict[str, Phase] = {}
+
+        # Raw (name, start, end) events for the Chrome trace
+        self.trace: deque[tuple[str, float, float]] = deque(maxlen=trace_frames * 16)
+        self.origin = time.perf_counter()
+        self.frame_start = 0.0
+        self.frame_num = 0
+
+        self.font: pygame.font.Font | None = None
+        self.overlay_image: pygame.Surface | None = None
+        self.overlay_rect: pygame.Rect | None = None
+        self.overlay_interval = 15 # Frames between redrawing the overlay text
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.show_overlay = enabled and self.show_overlay
+        # Usually switched on part way through a frame
+        self.frame_start = time.perf_counter()
+
+    def phase(self, name: str) -> Phase | _NullPhase:
+        """Use as `with profiler.phase("draw"):` around the code to time."""
+
+        if not self.enabled:
+            return NULL_PHASE
+
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self, name)
+        return phase
+
+    def record(self, name: str, start: float, end: float) -> None:
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(end - start)
+        self.trace.append((name, start, end))
+
+    def count(self, name: str, value: int) -> None:
+        if self.enabled:
+            self.counts[name] = value
+
+    def begin_frame(self) -> None:
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        if self.enabled:
+            self.record("frame", self.frame_start, time.perf_counter())
+            self.frame_num += 1
+
+    def percentiles(self, name: str) -> tuple[float, float, float]:
+        """Returns the (p50, p95, p99) of the phase in seconds."""
+
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return (0.0, 0.0, 0.0)
+
+        last = len(samples) - 1
+        return (samples[round(last * 0.50)], samples[round(last * 0.95)], samples[round(last * 0.99)])
+
+    def report(self) -> list[tuple[str, float, float, float, float]]:
+        """(name, mean, p50, p95, p99) for every phase, in milliseconds."""
+
+        rows = []
+        for name, samples in self.samples.items():
+            p50, p95, p99 = self.percentiles(name)
+            mean = sum(samples) / len(samples)
+            rows.append((name, mean * 1000, p50 * 1000, p95 * 1000, p99 * 1000))
+        return rows
+
+    def export_csv(self, path: str) -> None:
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(("phase", "samples", "mean_ms", "p50_ms", "p95_ms", "p99_ms"))
+            for name, mean, p50, p95, p99 in self.report():
+                writer.writerow((name, len(self.samples[name]), f"{mean:.4f}", f"{p50:.4f}",
+                                 f"{p95:.4f}", f"{p99:.4f}"))
+
+            writer.writerow(())
+            writer.writerow(("group", "entities"))
+            for name, value in self.counts.items():
+                writer.writerow((name, value))
+
+    def export_chrome_trace(self, path: str) -> None:
+        events = [{"name": name, "ph": "X", "pid": 0, "tid": 0,
+                   "ts": (start - self.origin) * 1_000_000, "dur": (end - start) * 1_000_000}
+                  for name, start, end in self.trace]
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+    def draw_overlay(self, surface: pygame.Surface) -> pygame.Rect | None:
+        """Draws the timings in the top left corner of `surface`. The text is
+        only re-rendered every `overlay_interval` frames. Returns the rect that
+        was drawn to, or None if the overlay is hidden.
+        """
+
+        if not (self.enabled and self.show_overlay):
+            return None
+
+        if self.overlay_image is None or self.frame_num % self.overlay_interval == 0:
+            self.overlay_image = self.render_overlay()
+
+        self.overlay_rect = surface.blit(self.overlay_image, (4, 4))
+        return self.overlay_rect
+
+    def render_overlay(self) -> pygame.Surface:
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.Font(None, 16)
+
+        # The font isn't monospaced, so padding with spaces wouldn't line the
+        # columns up. Each cell is rendered on its own and placed at its
+        # column's x instead, the numbers right aligned.
+        color = (255, 255, 0)
+        rows = [("phase (ms)", "p50", "p95", "p99")]
+        for name, _, p50, p95, p99 in self.report():
+            rows.append((name, f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}"))
+        cells = [[self.font.render(text, False, color) for text in row] for row in rows]
+        counts = self.font.render("  ".join(f"{name}: {value}" for name, value in self.counts.items()), False, color)
+
+        gap = 10
+        column_widths = [max(row[column].get_width() for row in cells) for column in range(len(rows[0]))]
+        table_width = sum(column_widths) + gap * (len(column_widths) - 1)
+
+        line_height = self.font.get_linesize()
+        image = pygame.Surface((max(table_width, counts.get_width()) + 8, line_height * (len(cells) + 1) + 8))
+        image.set_alpha(200)
+        for i, row in enumerate(cells):
+            y = 4 + i * line_height
+            image.blit(row[0], (4, y))
+            right = 4 + column_widths[0]
+            for cell, width in zip(row[1:], column_widths[1:]):
+                right += gap + width
+                image.blit(cell, (right - cell.get_width(), y))
+        image.blit(counts, (4, 4 + len(cells) * line_height))
+        return image
@@ -0,0 +1,100 @@
+import pygame
+
+# The arcade screen was only around 360x280 pixels (see ideas.txt)
+ARCADE_SIZE = (360, 280)
+
+# -- Scale modes --
+INTEGER = "integer" # Biggest whole number scale that fits, crisp pixels
+SMOOTH = "smooth"   # Fills as much of the window as possible, filtered
+
+
+class RenderTarget:
+    """The game is drawn onto a small `logical` surface which is then scaled
+    up to the window in a single pass each frame. The scaled image goes
+    straight into a subsurface of the window (the viewport) that is made once
+    up front, so nothing gets allocated per frame.
+
+    If the logical size is the same as the window, the window itself is used
+    as the logical surface and present() does nothing.
+    """
+
+    def __init__(self, window: pygame.Surface, logical_size: tuple[int, int], mode: str = INTEGER):
+        if mode not in (INTEGER, SMOOTH):
+            raise ValueError(f"Unknown scale mode {mode!r}")
+
+        self.window = window
+        self.logical_size = tuple(logical_size)
+        self.mode = mode
+
+        window_w, window_h = window.get_size()
+        logical_w, logical_h = self.logical_size
+
+        self.passthrough = self.logical_size == (window_w, window_h)
+        if self.passthrough:
+            self.scale = 1.0
+            self.viewport = window.get_rect()
+            self.surface = window
+            self.viewport_surface = window
+            return
+
+        if mode == INTEGER:
+            self.scale = float(max(1, min(window_w // logical_w, window_h // logical_h)))
+        else:
+            self.scale = min(window_w / logical_w, window_h / logical_h)
+
+        # Center the scaled image in the window, leaving black bars around it
+        viewport_size = (min(window_w, round(logical_w * self.scale)), min(window_h, round(logical_h * self.scale)))
+        self.viewport = pygame.Rect((0, 0), viewport_size)
+        self.viewport.center = window.get_rect().center
+        self.viewport_surface = window.subsurface(self.viewport)
+
+        # Same pixel format as the window so blitting / scaling between them
+        # doesn't need a conversion.
+        self.surface = pygame.Surface(self.logical_size, 0, window)
+
+        window.fill((0, 0, 0))
+
+    def get_rect(self) -> pygame.Rect:
+        return self.surface.get_rect()
+
+    def present(self) -> None:
+        """Scales the logical surface up into the window's viewport."""
+
+        if self.passthrough:
+            return
+
+        if self.mode == INTEGER:
+            pygame.transform.scale(self.surface, self.viewport.size, self.viewport_surface)
+        else:
+            pygame.transform.smoothscale(self.surface, self.viewport.size, self.viewport_surface)
+
+    def window_to_logical(self, pos: tuple[int, int]) -> tuple[float, float]:
+        """Maps a window position (like a mouse click) to the logical surface.
+        Clicks in the black bars get clamped to the nearest edge.
+        """
+
+        if self.passthrough:
+            return pos
+
+        x = (pos[0] - self.viewport.left) / self.scale
+        y = (pos[1] - self.viewport.top) / self.scale
+        logical_w, logical_h = self.logical_size
+        return (min(max(x, 0), logical_w - 1), min(max(y, 0), logical_h - 1))
+
+    def logical_to_window_rects(self, rects: list[pygame.Rect]) -> list[pygame.Rect]:
+        """Maps dirty rects on the logical surface to the window, so only those
+        parts of the display need updating.
+        """
+
+        if self.passthrough:
+            return rects
+
+        scale = self.scale
+        left, top = self.viewport.topleft
+        window_rects = []
+        for rect in rects:
+            # Grow by a pixel so smooth scaling's blur at the edges is included
+            window_rect = pygame.Rect(int(rect.left * scale) + left - 1, int(rect.top * scale) + top - 1,
+                                      int(rect.width * scale) + 3, int(rect.height * scale) + 3)
+            window_rects.append(window_rect.clip(self.viewport))
+        return window_rects
@@ -0,0 +1,434 @@
+"""Records what the player did on every update of a Director, plus a
+snapshot of the whole game every so often, so a session can be played back
+exactly later on. Seeking to a frame restores the nearest snapshot before it
+and fast forwards headless from there, which is how rare collision bugs or
+slow frames from a real session can be reproduced without a screen capture.
+
+Inputs are delta encoded: a frame where nothing changed is a single byte,
+and the whole file is zlib compressed, so a session log is small enough to
+always keep (main.py saves one to replays/ every time the game is played).
+
+    python replay.py info replays/session.rep
+    python replay.py verify replays/session.rep
+    python replay.py seek replays/session.rep --frame 5000
+    python replay.py watch replays/session.rep --frame 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import struct
+import time
+import zlib
+
+import pygame
+
+from director import Director, GameState
+
+MAGIC = b"R2085REP"
+VERSION = 2 # 2: snapshots hold the scoreboard, and dying restarts the wave
+
+HEADER = struct.Struct("<8sHI")
+SECTION = struct.Struct("<I")
+SNAPSHOT = struct.Struct("<IBI")
+VEC = struct.Struct("<dd")
+DELTA = struct.Struct("<d")
+SHOT_COUNT = struct.Struct("<H")
+
+# The only keys Player.update looks at, stored as a bitmask
+KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+KEY_BITS = {key: 1 << bit for bit, key in enumerate(KEYS)}
+
+# -- Frame flags --
+# Each frame starts with one byte of these saying what changed since the
+# frame before. Only the changed parts follow it.
+KEYS_CHANGED = 1
+MOVEMENT_CHANGED = 2
+SHOOTING_CHANGED = 4
+SHOTS = 8
+DELTA_CHANGED = 16
+
+
+def encode_vec(data: bytearray, vec: tuple[float, float] | None) -> None:
+    if vec is None:
+        data.append(0)
+    else:
+        data.append(1)
+        data += VEC.pack(*vec)
+
+
+class KeyMask:
+    """Stands in for pygame.key.get_pressed() during playback."""
+
+    def __init__(self, mask: int):
+        self.mask = mask
+
+    def __getitem__(self, key: int) -> bool:
+        return bool(self.mask & KEY_BITS.get(key, 0))
+
+
+class RecordedFrame:
+    """The input to one Director.update: how long it was, the keys held,
+    the joystick vectors and the shots clicked just before it.
+    """
+
+    def __init__(self, delta: float, keys: int, movement: tuple[float, float] | None,
+                 shooting: tuple[float, float] | None, shots: list[tuple[float, float]]):
+        self.delta = delta
+        self.keys = KeyMask(keys)
+        self.movement = None if movement is None else pygame.math.Vector2(movement)
+        self.shooting = None if shooting is None else pygame.math.Vector2(shooting)
+        self.shots = shots
+
+
+class InputRecorder:
+    """Attach with Director.start_recording(). Every Director.update adds one
+    frame to the log, mouse click shots (Director.shoot) are stored with the
+    frame after them, and every `snapshot_interval` frames the game state is
+    saved. A snapshot is also taken whenever a level is loaded, since that
+    isn't an input the replay could reproduce.
+    """
+
+    def __init__(self, snapshot_interval: int = 1200):
+        self.snapshot_interval = snapshot_interval
+        self.data = bytearray()
+        self.frames = 0
+        self.meta: dict[str, object] = {}
+
+        # frame -> (forced, state). Forced snapshots have to be restored when
+        # playback reaches them (the level changed), the rest are only there
+        # to seek from.
+        self.snapshots: dict[int, tuple[bool, GameState]] = {}
+
+        self.keys = 0
+        self.movement: tuple[float, float] | None = None
+        self.shooting: tuple[float, float] | None = None
+        self.delta: float | None = None
+        self.pending_shots: list[tuple[float, float]] = []
+
+    def start(self, director: Director) -> None:
+        rect = director.screen_rect
+        self.meta = {
+            "screen_rect": [rect.x, rect.y, rect.width, rect.height],
+            "use_entity_store": director.entity_store is not None,
+            "bullet_directions": director.bullet_pool.image_cache.directions,
+            "infinite_lives": director.scoreboard.infinite_lives,
+            "snapshot_interval": self.snapshot_interval
+        }
+        self.snapshots[self.frames] = (True, director.snapshot())
+
+    def record_shot(self, pos) -> None:
+        self.pending_shots.append((float(pos[0]), float(pos[1])))
+
+    def record_frame(self, delta: float, pressed_keys, movement_vec: pygame.math.Vector2 | None,
+                     shooting_vec: pygame.math.Vector2 | None) -> None:
+        keys = 0
+        for key, bit in KEY_BITS.items():
+            if pressed_keys[key]:
+                keys |= bit
+        movement = None if movement_vec is None else (movement_vec.x, movement_vec.y)
+        shooting = None if shooting_vec is None else (shooting_vec.x, shooting_vec.y)
+
+        flags = 0
+        if keys != self.keys:
+            flags |= KEYS_CHANGED
+        if movement != self.movement:
+            flags |= MOVEMENT_CHANGED
+        if shooting != self.shooting:
+            flags |= SHOOTING_CHANGED
+        if self.pending_shots:
+            flags |= SHOTS
+        if delta != self.delta:
+            flags |= DELTA_CHANGED
+
+        data = self.data
+        data.append(flags)
+        if flags & KEYS_CHANGED:
+            data.append(keys)
+        if flags & MOVEMENT_CHANGED:
+            encode_vec(data, movement)
+        if flags & SHOOTING_CHANGED:
+            encode_vec(data, shooting)
+        if flags & SHOTS:
+            data += SHOT_COUNT.pack(len(self.pending_shots))
+            for shot in self.pending_shots:
+                data += VEC.pack(*shot)
+            self.pending_shots.clear()
+        if flags & DELTA_CHANGED:
+            data += DELTA.pack(delta)
+
+        self.keys = keys
+        self.movement = movement
+        self.shooting = shooting
+        self.delta = delta
+
+    def end_frame(self, director: Director) -> None:
+        self.frames += 1
+        if self.frames % self.snapshot_interval == 0:
+            self.snapshots[self.frames] = (False, director.snapshot())
+
+    def level_loaded(self, director: Director) -> None:
+        # Loading a level kills every bullet, including ones from clicks that
+        # haven't been written to a frame yet
+        self.pending_shots.clear()
+        self.snapshots[self.frames] = (True, director.snapshot())
+
+    def stop(self, director: Director) -> None:
+        # One last snapshot so `verify` checks the session all the way through
+        if self.frames not in self.snapshots:
+            self.snapshots[self.frames] = (False, director.snapshot())
+
+    def save(self, path: str) -> None:
+        meta = json.dumps(self.meta).encode()
+        chunks = [SECTION.pack(len(meta)), meta, SECTION.pack(len(self.data)), self.data,
+                  SECTION.pack(len(self.snapshots))]
+        for frame, (forced, state) in sorted(self.snapshots.items()):
+            encoded = json.dumps(state, separators=(",", ":")).encode()
+            chunks.append(SNAPSHOT.pack(frame, forced, len(encoded)))
+            chunks.append(encoded)
+
+        with open(path, "wb") as replay_file:
+            replay_file.write(HEADER.pack(MAGIC, VERSION, self.frames))
+            replay_file.write(zlib.compress(b"".join(chunks)))
+
+
+def decode_frames(data: bytes, count: int) -> list[RecordedFrame]:
+    """Turns the recorded input stream back into one RecordedFrame per
+    update.
+    """
+
+    frames = []
+    offset = 0
+    keys = 0
+    movement = None
+    shooting = None
+    delta = 0.0
+
+    def read_vec():
+        nonlocal offset
+        present = data[offset]
+        offset += 1
+        if not present:
+            return None
+        vec = VEC.unpack_from(data, offset)
+        offset += VEC.size
+        return vec
+
+    for _ in range(count):
+        flags = data[offset]
+        offset += 1
+        if flags & KEYS_CHANGED:
+            keys = data[offset]
+            offset += 1
+        if flags & MOVEMENT_CHANGED:
+            movement = read_vec()
+        if flags & SHOOTING_CHANGED:
+            shooting = read_vec()
+        shots = []
+        if flags & SHOTS:
+            num_shots, = SHOT_COUNT.unpack_from(data, offset)
+            offset += SHOT_COUNT.size
+            for _ in range(num_shots):
+                shots.append(VEC.unpack_from(data, offset))
+                offset += VEC.size
+        if flags & DELTA_CHANGED:
+            delta, = DELTA.unpack_from(data, offset)
+            offset += DELTA.size
+
+        frames.append(RecordedFrame(delta, keys, movement, shooting, shots))
+    return frames
+
+
+class Replay:
+    """A recorded session loaded back in. Plays it on headless Directors."""
+
+    def __init__(self, meta: dict[str, object], frames: list[RecordedFrame],
+                 snapshots: dict[int, tuple[bool, GameState]]):
+        self.meta = meta
+        self.frames = frames
+        self.snapshots = snapshots
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, "rb") as replay_file:
+            magic, version, frame_count = HEADER.unpack(replay_file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a replay")
+            if version != VERSION:
+                raise ValueError(f"{path} is version {version}, only version {VERSION} is supported")
+            payload = zlib.decompress(replay_file.read())
+
+        offset = 0
+
+        def read_section() -> bytes:
+            nonlocal offset
+            length, = SECTION.unpack_from(payload, offset)
+            offset += SECTION.size + length
+            return payload[offset - length:offset]
+
+        meta = json.loads(read_section())
+        frames = decode_frames(read_section(), frame_count)
+
+        snapshots = {}
+        snapshot_count, = SECTION.unpack_from(payload, offset)
+        offset += SECTION.size
+        for _ in range(snapshot_count):
+            frame, forced, length = SNAPSHOT.unpack_from(payload, offset)
+            offset += SNAPSHOT.size
+            snapshots[frame] = (bool(forced), json.loads(payload[offset:offset + length]))
+            offset += length
+        return cls(meta, frames, snapshots)
+
+    def new_director(self, headless: bool = True) -> Director:
+        return Director(pygame.Rect(self.meta["screen_rect"]), self.meta["use_entity_store"],
+                        rng=random.Random(), headless=headless,
+                        bullet_directions=self.meta["bullet_directions"],
+                        infinite_lives=self.meta.get("infinite_lives", False))
+
+    def seek(self, frame: int, director: Director | None = None) -> Director:
+        """Returns a Director with the game exactly as it was at the start of
+        `frame`, restoring the closest snapshot before it and playing the
+        rest.
+        """
+
+        frame = max(0, min(frame, len(self.frames)))
+        start = max(snapshot_frame for snapshot_frame in self.snapshots if snapshot_frame <= frame)
+        if director is None:
+            director = self.new_director()
+        director.restore(self.snapshots[start][1])
+        self.play(director, start, frame)
+        return director
+
+    def play(self, director: Director, start: int, end: int) -> None:
+        """Plays frames [start, end) on a director that is already at the
+        start of frame `start`.
+        """
+
+        snapshots = self.snapshots
+        for frame in range(start, end):
+            if frame != start and frame in snapshots and snapshots[frame][0]:
+                director.restore(snapshots[frame][1])
+            self.play_frame(director, frame)
+
+    def play_frame(self, director: Director, frame: int) -> None:
+        recorded = self.frames[frame]
+        for shot in recorded.shots:
+            director.fire_bullet(shot)
+        director.update(recorded.delta, recorded.keys, (recorded.movement, recorded.shooting))
+
+    def verify(self) -> list[int]:
+        """Plays the whole session from the start and checks the game matches
+        every snapshot along the way. Returns the frames that didn't match
+        (an empty list means the replay is faithful).
+        """
+
+        director = self.new_director()
+        director.restore(self.snapshots[0][1])
+        mismatches = []
+        previous = 0
+        for frame in sorted(self.snapshots):
+            if frame == 0:
+                continue
+            self.play(director, previous, frame)
+            forced, state = self.snapshots[frame]
+            # Forced snapshots come after a level load, so there's nothing to compare
+            if not forced and json.loads(json.dumps(director.snapshot())) != state:
+                mismatches.append(frame)
+            if forced:
+                director.restore(state)
+            previous = frame
+        return mismatches
+
+
+def watch(replay: Replay, frame: int) -> None:
+    """Shows the replay in a window from `frame` on. Space pauses, right
+    arrow steps a single frame while paused.
+    """
+
+    pygame.display.init()
+    director = replay.seek(frame, replay.new_director())
+    screen = pygame.display.set_mode(director.screen_rect.size)
+    clock = pygame.time.Clock()
+    accumulator = 0.0
+    paused = False
+
+    while frame < len(replay):
+        elapsed = clock.tick(60) / 1000.0
+        step_once = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                frame = len(replay)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    frame = len(replay)
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    step_once = True
+
+        if not paused:
+            accumulator += elapsed
+        while frame < len(replay) and (step_once or (not paused and accumulator >= replay.frames[frame].delta)):
+            accumulator -= replay.frames[frame].delta
+            replay.play(director, frame, frame + 1)
+            frame += 1
+            step_once = False
+        director.audio.flush()
+
+        director.draw(screen)
+        pygame.display.set_caption(f"replay frame {frame}/{len(replay)}{' (paused)' if paused else ''}")
+        pygame.display.update()
+
+    pygame.quit()
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Inspect and play back recorded sessions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("info", "show what's in a replay"),
+                            ("verify", "play the whole replay and check it against every snapshot"),
+                            ("seek", "jump to a frame and print the game state there"),
+                            ("watch", "play the replay in a window")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path")
+        if name in ("seek", "watch"):
+            command.add_argument("--frame", type=int, default=0)
+
+    args = parser.parse_args()
+    replay = Replay.load(args.path)
+
+    if args.command == "info":
+        forced = sum(1 for is_forced, _ in replay.snapshots.values() if is_forced)
+        game_time = sum(recorded.delta for recorded in replay.frames)
+        print(f"{args.path}: {os.path.getsize(args.path)} bytes")
+        print(f"  {len(replay)} frames, {game_time:.1f}s of game time")
+        print(f"  {len(replay.snapshots)} snapshots ({forced} level loads)")
+
+    elif args.command == "verify":
+        start = time.perf_counter()
+        mismatches = replay.verify()
+        elapsed = time.perf_counter() - start
+        if mismatches:
+            print(f"replay diverged at frames {mismatches}")
+        else:
+            print(f"replay matches all {len(replay.snapshots)} snapshots ({elapsed:.2f}s)")
+
+    elif args.command == "seek":
+        start = time.perf_counter()
+        director = replay.seek(args.frame)
+        elapsed = time.perf_counter() - start
+        print(f"frame {args.frame} reached in {elapsed * 1000:.1f} ms")
+        print(f"  player at ({director.player.position.x:.1f}, {director.player.position.y:.1f})")
+        print(f"  {len(director.enemy_group)} enemies, {len(director.family_group)} family, "
+              f"{len(director.bullet_group)} bullets, {len(director.debris)} debris, {director.kills} kills")
+
+    elif args.command == "watch":
+        watch(replay, args.frame)
+
+
+if __name__ == "__main__":
+    run()
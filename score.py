@@ -0,0 +1,116 @@
+from collections import deque
+
+# -- Event kinds --
+ENEMY_KILLED = "enemy killed"
+RESCUED = "rescued"
+PLAYER_DIED = "player died"
+EXTRA_LIFE = "extra life"
+
+STARTING_LIVES = 3
+EXTRA_LIFE_EVERY = 25_000 # Points, like the arcade game
+RESCUE_POINTS = 200       # For the first family member picked up in a level
+MAX_RESCUE_POINTS = 5000  # The bonus stops doubling here, like the arcade game
+
+
+class ScoreEvent:
+    """Something that happened this frame that the HUD might show: who got
+    points for what, and where.
+    """
+
+    __slots__ = ("kind", "points", "position")
+
+    def __init__(self, kind: str, points: int, position: tuple[float, float]):
+        self.kind = kind
+        self.points = points
+        self.position = position
+
+
+class Scoreboard:
+    """Score, lives and the rescue bonus. Anything that scores during an
+    update (bullets, rescues, deaths) only push()es an event, and the
+    Director applies them all in one go with apply() at the end of the
+    update. Applied events wait in `recent` for the HUD to take_recent()
+    them, and only the newest few are kept so headless runs that never
+    draw don't pile them up.
+
+    With `infinite_lives` dying doesn't cost a life and the game never
+    ends, for benchmarks and long headless runs.
+    """
+
+    def __init__(self, lives: int = STARTING_LIVES, extra_life_every: int = EXTRA_LIFE_EVERY,
+                 infinite_lives: bool = False):
+        self.score = 0
+        self.lives = lives
+        self.infinite_lives = infinite_lives
+        self.extra_life_every = extra_life_every
+        self.next_extra_life = extra_life_every
+        self.rescued = 0 # Family members picked up this level
+        self.game_over = False
+
+        self.pending: list[ScoreEvent] = []
+        self.recent: deque[ScoreEvent] = deque(maxlen=64)
+
+    def push(self, kind: str, points: int, position: tuple[float, float]) -> None:
+        self.pending.append(ScoreEvent(kind, points, position))
+
+    def rescue(self, position: tuple[float, float]) -> None:
+        """Rescues are worth 200 * 2^x, where x is how many others were
+        picked up earlier in the level (200, 400, 800...), up to 5000.
+        """
+
+        # Doubling stops being under the cap after a few, so don't work out 2^x for huge x
+        points = min(RESCUE_POINTS * 2 ** min(self.rescued, 5), MAX_RESCUE_POINTS)
+        self.push(RESCUED, points, position)
+        self.rescued += 1
+
+    def player_died(self, position: tuple[float, float]) -> None:
+        self.push(PLAYER_DIED, 0, position)
+
+    def new_level(self) -> None:
+        self.rescued = 0
+
+    def apply(self) -> None:
+        """Adds up everything pushed since the last apply()."""
+
+        if not self.pending:
+            return
+
+        for event in self.pending:
+            if event.kind == PLAYER_DIED and not self.infinite_lives:
+                self.lives -= 1
+                if self.lives <= 0:
+                    self.lives = 0
+                    self.game_over = True
+            self.score += event.points
+            self.recent.append(event)
+
+            if self.score >= self.next_extra_life:
+                # Every threshold passed at once, however many that is
+                extra_lives = (self.score - self.next_extra_life) // self.extra_life_every + 1
+                self.next_extra_life += extra_lives * self.extra_life_every
+                self.lives += extra_lives
+                self.recent.append(ScoreEvent(EXTRA_LIFE, 0, event.position))
+        self.pending.clear()
+
+    def take_recent(self) -> list[ScoreEvent]:
+        events = list(self.recent)
+        self.recent.clear()
+        return events
+
+    def snapshot(self) -> dict[str, int | bool]:
+        return {
+            "score": self.score,
+            "lives": self.lives,
+            "next_extra_life": self.next_extra_life,
+            "rescued": self.rescued,
+            "game_over": self.game_over
+        }
+
+    def restore(self, state: dict[str, int | bool]) -> None:
+        self.score = state["score"]
+        self.lives = state["lives"]
+        self.next_extra_life = state["next_extra_life"]
+        self.rescued = state["rescued"]
+        self.game_over = state["game_over"]
+        self.pending.clear()
+        self.recent.clear()
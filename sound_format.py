@@ -0,0 +1,55 @@
+"""Shrinks the game's sound effects without losing anything.
+
+The wavs were 22050 Hz sounds saved at 44100 Hz, with every sample written
+out twice. Storing them at their real rate halves the files and keeps them
+plain PCM, so loading them is still just a read (the mixer resamples them
+once when they're loaded). mp3 / ogg would be smaller, but have to be
+decoded on every cold start, and IMA ADPCM came out far too noisy for
+these (about 7-10 dB signal to noise on the explosion and shot).
+
+    python sound_format.py sounds/explode.wav            # shrink in place
+    python sound_format.py sounds/explode.wav small.wav  # or to a new file
+"""
+
+import argparse
+import wave
+
+
+def halve_sample_rate(source: str, destination: str) -> tuple[int, int]:
+    """Rewrites the wav at `source` at half its sample rate, if every
+    sample in it (after the first) is repeated so nothing would be lost.
+    Returns the (old, new) sizes of the sample data in bytes.
+    """
+
+    with wave.open(source, "rb") as source_file:
+        params = source_file.getparams()
+        frames = source_file.readframes(params.nframes)
+
+    frame_size = params.sampwidth * params.nchannels
+    samples = [frames[i:i + frame_size] for i in range(0, len(frames), frame_size)]
+    # Pairs start at the second sample: [a, b, b, c, c, ...]
+    pairs_match = all(samples[i] == samples[i + 1] for i in range(1, len(samples) - 1, 2))
+    if not pairs_match:
+        raise ValueError(f"{source} isn't a doubled-up recording, halving it would lose detail")
+
+    kept = b"".join([samples[0]] + samples[1::2])
+    with wave.open(destination, "wb") as destination_file:
+        destination_file.setnchannels(params.nchannels)
+        destination_file.setsampwidth(params.sampwidth)
+        destination_file.setframerate(params.framerate // 2)
+        destination_file.writeframes(kept)
+    return len(frames), len(kept)
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Losslessly halve the sample rate of doubled-up wav files.")
+    parser.add_argument("source")
+    parser.add_argument("destination", nargs="?", help="defaults to overwriting the source")
+    args = parser.parse_args()
+
+    old_size, new_size = halve_sample_rate(args.source, args.destination or args.source)
+    print(f"{args.source}: {old_size} -> {new_size} bytes of samples")
+
+
+if __name__ == "__main__":
+    run()
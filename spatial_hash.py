@@ -0,0 +1,314 @@
+from typing import Callable
+
+import pygame
+
+# -- Types --
+CellKey = tuple[int, int]
+
+
+class SpatialHash:
+    """Uniform grid over the play area used as a broadphase for collisions.
+    Each sprite is filed in the one cell that holds the center of its rect,
+    so a query only has to look at the sprites in the handful of cells around
+    it instead of every sprite in the group.
+
+    Queries grow the rect being checked by `margin` (half the size of the
+    biggest sprite that has been indexed) so sprites that hang over the edge
+    of their cell still get found. Sprites only get moved between cells when
+    their center crosses into a new one, which for most entities is only once
+    every few frames.
+
+    If something else keeps the sprites' rects up to date lazily (the
+    EntityStore), set `refresh` to a function that brings one sprite up to
+    date. Queries call it on every sprite before looking at its rect, and
+    sync() can be handed the sprites that changed cells instead of reading
+    every rect.
+    """
+
+    def __init__(self, bounds: pygame.Rect, cell_size: int = 64):
+        # Sprites outside of bounds are still indexed fine (cells are just
+        # dictionary keys), bounds is only used to see how big the grid is.
+        self.bounds = pygame.Rect(bounds)
+        self.cell_size = cell_size
+        self.margin = 0
+
+        # Cells are dicts used as ordered sets. Plain sets iterate in memory
+        # address order, which would make "which enemy did the bullet hit"
+        # change from run to run and break deterministic replays.
+        self.cells: dict[CellKey, dict[pygame.sprite.Sprite, None]] = {}
+        self.sprite_cells: dict[pygame.sprite.Sprite, CellKey] = {}
+        self.refresh: Callable[[pygame.sprite.Sprite], None] | None = None
+
+    def __len__(self) -> int:
+        return len(self.sprite_cells)
+
+    def __contains__(self, sprite: pygame.sprite.Sprite) -> bool:
+        return sprite in self.sprite_cells
+
+    def cell_key(self, pos: tuple[int, int]) -> CellKey:
+        return (pos[0] // self.cell_size, pos[1] // self.cell_size)
+
+    def insert(self, sprite: pygame.sprite.Sprite, key: CellKey | None = None) -> None:
+        rect = sprite.rect
+        self.margin = max(self.margin, (rect.width + 1) // 2, (rect.height + 1) // 2)
+
+        if key is None:
+            key = self.cell_key(rect.center)
+        self.sprite_cells[sprite] = key
+        self.cells.setdefault(key, {})[sprite] = None
+
+    def remove(self, sprite: pygame.sprite.Sprite) -> None:
+        key = self.sprite_cells.pop(sprite, None)
+        if key is not None:
+            del self.cells[key][sprite]
+
+    def move(self, sprite: pygame.sprite.Sprite) -> None:
+        """Re-files a sprite after it has moved. Does nothing if its center is
+        still in the same cell.
+        """
+
+        old_key = self.sprite_cells.get(sprite)
+        if old_key is None:
+            self.insert(sprite)
+            return
+
+        key = self.cell_key(sprite.rect.center)
+        if key != old_key:
+            del self.cells[old_key][sprite]
+            self.sprite_cells[sprite] = key
+            self.cells.setdefault(key, {})[sprite] = None
+
+    def sync(self, group: pygame.sprite.AbstractGroup,
+             moves: list[tuple[pygame.sprite.Sprite, CellKey]] | None = None) -> None:
+        """Brings the index up to date with the sprites in `group`. Sprites
+        that have left the group are dropped, new sprites are inserted and
+        everything else is only re-filed if it changed cells.
+
+        Dead sprites are only searched for when the sizes don't match, so
+        anything that kills a sprite and adds another in the same frame should
+        call remove() / insert() itself (like Bullet.update does).
+
+        `moves` is (sprite, cell) for every sprite that may have changed
+        cells (see EntityStore.cell_moves). Then only those are re-filed,
+        and the rest of the group is taken to have stayed put.
+        """
+
+        sprite_cells = self.sprite_cells
+        if len(sprite_cells) != len(group):
+            for sprite in [sprite for sprite in sprite_cells if sprite not in group]:
+                self.remove(sprite)
+
+        if moves is not None:
+            self.apply_moves(group, moves)
+            return
+
+        # This is the hot loop, so move() is inlined here.
+        size = self.cell_size
+        cells = self.cells
+        for sprite in group:
+            x, y = sprite.rect.center
+            key = (x // size, y // size)
+            old_key = sprite_cells.get(sprite)
+            if old_key == key:
+                continue
+
+            if old_key is None:
+                self.insert(sprite)
+            else:
+                del cells[old_key][sprite]
+                sprite_cells[sprite] = key
+                cells.setdefault(key, {})[sprite] = None
+
+    def apply_moves(self, group: pygame.sprite.AbstractGroup,
+                    moves: list[tuple[pygame.sprite.Sprite, CellKey]]) -> None:
+        sprite_cells = self.sprite_cells
+        cells = self.cells
+        for sprite, key in moves:
+            old_key = sprite_cells.get(sprite)
+            if old_key == key:
+                continue
+
+            if old_key is None:
+                self.insert(sprite, key)
+            else:
+                del cells[old_key][sprite]
+                sprite_cells[sprite] = key
+                cells.setdefault(key, {})[sprite] = None
+
+        # Anything the moves didn't cover (stationary enemies added since)
+        if len(sprite_cells) != len(group):
+            for sprite in group:
+                if sprite not in sprite_cells:
+                    self.insert(sprite)
+
+    def rebuild(self, sprites) -> None:
+        """Throws away the index and builds it from scratch."""
+
+        self.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.sprite_cells.clear()
+        self.margin = 0
+
+    def cell_order(self, ids: dict[pygame.sprite.Sprite, int]) -> list[list]:
+        """The contents of every cell as [x, y, [id, ...]], with sprites
+        swapped for `ids[sprite]`. Which enemy a bullet hits depends on the
+        order sprites sit in their cells, so replay snapshots save this. The
+        order of the cells themselves doesn't matter, they're sorted so the
+        same index always gives the same output.
+        """
+
+        return [[x, y, [ids[sprite] for sprite in cell]] for (x, y), cell in sorted(self.cells.items()) if cell]
+
+    def restore_cell_order(self, order: list[list], sprites: list[pygame.sprite.Sprite]) -> None:
+        """Rebuilds the index from cell_order() output, `sprites[id]` being
+        the sprite each id stands for.
+        """
+
+        self.clear()
+        for x, y, ids in order:
+            for sprite_id in ids:
+                sprite = sprites[sprite_id]
+                rect = sprite.rect
+                self.margin = max(self.margin, (rect.width + 1) // 2, (rect.height + 1) // 2)
+                self.sprite_cells[sprite] = (x, y)
+                self.cells.setdefault((x, y), {})[sprite] = None
+
+    def query(self, rect: pygame.Rect) -> list[pygame.sprite.Sprite]:
+        """Returns every sprite filed in the cells that could be touching
+        `rect`. These are only candidates, they still need a proper rect check.
+        """
+
+        size = self.cell_size
+        margin = self.margin
+        found = []
+        cells = self.cells
+        for y in range((rect.top - margin) // size, (rect.bottom + margin) // size + 1):
+            for x in range((rect.left - margin) // size, (rect.right + margin) // size + 1):
+                cell = cells.get((x, y))
+                if cell:
+                    found.extend(cell)
+        return found
+
+    def collide_rect(self, rect: pygame.Rect) -> list[pygame.sprite.Sprite]:
+        """Returns every indexed sprite whose rect overlaps `rect`."""
+
+        refresh = self.refresh
+        found = []
+        for sprite in self.query(rect):
+            if refresh is not None:
+                refresh(sprite)
+            if rect.colliderect(sprite.rect):
+                found.append(sprite)
+        return found
+
+    def collide_any(self, sprite: pygame.sprite.Sprite) -> pygame.sprite.Sprite | None:
+        """Same idea as pygame.sprite.spritecollideany, but only looks at the
+        cells around `sprite`. Returns None if nothing is touching it.
+        """
+
+        rect = sprite.rect
+        size = self.cell_size
+        margin = self.margin
+        cells = self.cells
+        refresh = self.refresh
+        for y in range((rect.top - margin) // size, (rect.bottom + margin) // size + 1):
+            for x in range((rect.left - margin) // size, (rect.right + margin) // size + 1):
+                cell = cells.get((x, y))
+                if not cell:
+                    continue
+                for other in cell:
+                    if refresh is not None:
+                        refresh(other)
+                    if other is not sprite and rect.colliderect(other.rect):
+                        return other
+        return None
+
+    def sweep(self, start: tuple[float, float], end: tuple[float, float],
+              half_size: tuple[float, float] = (0, 0)) -> tuple[pygame.sprite.Sprite | None, float]:
+        """Swept version of collide_any for things that move further than
+        an enemy is wide in one step (bullets during a frame hitch). A box
+        `half_size` out from its center moves in a straight line from `start`
+        to `end`, and this finds the first indexed sprite it runs into.
+
+        Returns (sprite, t) where t is how far along the path (0 to 1) the
+        hit happened, or (None, 1.0). The sprites are treated as standing
+        still at their current positions.
+        """
+
+        start_x, start_y = start
+        end_x, end_y = end
+        half_w, half_h = half_size
+        dx = end_x - start_x
+        dy = end_y - start_y
+        inv_dx = 1 / dx if dx else 0.0
+        inv_dy = 1 / dy if dy else 0.0
+
+        size = self.cell_size
+        cells = self.cells
+        refresh = self.refresh
+
+        # Box around the whole path, anything outside it can't be hit
+        path_left = min(start_x, end_x) - half_w
+        path_right = max(start_x, end_x) + half_w
+        path_top = min(start_y, end_y) - half_h
+        path_bottom = max(start_y, end_y) + half_h
+
+        first_x = int((path_left - self.margin) // size)
+        last_x = int((path_right + self.margin) // size)
+        first_y = int((path_top - self.margin) // size)
+        last_y = int((path_bottom + self.margin) // size)
+
+        hit = None
+        hit_t = 1.0
+        for y in range(first_y, last_y + 1):
+            for x in range(first_x, last_x + 1):
+                cell = cells.get((x, y))
+                if not cell:
+                    continue
+
+                for other in cell:
+                    if refresh is not None:
+                        refresh(other)
+                    rect = other.rect
+                    left, top, width, height = rect
+                    if (left >= path_right or left + width <= path_left or
+                            top >= path_bottom or top + height <= path_top):
+                        continue
+
+                    # Slab test against the sprite's rect grown by the
+                    # moving box, clipping [t_near, t_far] along each axis.
+                    t_near = 0.0
+                    t_far = hit_t
+                    if dx:
+                        t_a = (left - half_w - start_x) * inv_dx
+                        t_b = (left + width + half_w - start_x) * inv_dx
+                        if t_a > t_b:
+                            t_a, t_b = t_b, t_a
+                        t_near = max(t_near, t_a)
+                        t_far = min(t_far, t_b)
+                    elif not left - half_w < start_x < left + width + half_w:
+                        continue
+
+                    if dy:
+                        t_a = (top - half_h - start_y) * inv_dy
+                        t_b = (top + height + half_h - start_y) * inv_dy
+                        if t_a > t_b:
+                            t_a, t_b = t_b, t_a
+                        t_near = max(t_near, t_a)
+                        t_far = min(t_far, t_b)
+                    elif not top - half_h < start_y < top + height + half_h:
+                        continue
+
+                    # Strictly less, same as colliderect not counting rects
+                    # that only touch. t_far starts at the best hit so far,
+                    # so ties go to the sprite found first.
+                    if t_near < t_far:
+                        if t_near == 0.0: # Already touching at the start, nothing can beat that
+                            return other, 0.0
+                        hit = other
+                        hit_t = t_near
+        return hit, hit_t
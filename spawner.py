@@ -0,0 +1,160 @@
+from typing import Callable
+
+import pygame
+
+from enemy import BaseEnemy
+import helper_funcs
+
+
+class EnemyPool:
+    """Recycles killed enemies of one type. BaseEnemy.kill hands the enemy
+    back here and acquire() resets it rather than making a new one, so waves
+    that keep spawning (Spheroids, Quarks) don't allocate anything once the
+    pool has warmed up.
+
+    Enemies aren't reused straight away. They wait out one full update first,
+    so the EntityStore and the collision indexes have dropped them before
+    they come back looking like a brand new enemy.
+    """
+
+    def __init__(self, enemy_type: type[BaseEnemy], screen_rect: pygame.Rect):
+        self.enemy_type = enemy_type
+        self.screen_rect = screen_rect
+        self.free: list[BaseEnemy] = []
+        self.cooling: list[BaseEnemy] = [] # Killed before the last update
+        self.dying: list[BaseEnemy] = []   # Killed since the last update
+
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, pos: helper_funcs.CoordType) -> BaseEnemy:
+        if self.free:
+            self.reused += 1
+            enemy = self.free.pop()
+            enemy.reset(pos)
+            return enemy
+
+        self.created += 1
+        enemy = self.enemy_type(pos, self.screen_rect)
+        enemy.pool = self
+        return enemy
+
+    def release(self, enemy: BaseEnemy) -> None:
+        self.dying.append(enemy)
+
+    def end_frame(self) -> None:
+        self.free.extend(self.cooling)
+        self.cooling = self.dying
+        self.dying = []
+
+    def recycle_all(self) -> None:
+        """Makes every dead enemy reusable right away. Only safe when nothing
+        else is still holding on to them (e.g. after a level load).
+        """
+
+        self.free.extend(self.cooling)
+        self.free.extend(self.dying)
+        self.cooling = []
+        self.dying = []
+
+    def hit_rate(self) -> float:
+        acquired = self.created + self.reused
+        return self.reused / acquired if acquired else 0.0
+
+
+class Spawner:
+    """Brings enemies into the game on behalf of the level and of generator
+    enemies (Spheroids make Enforcers, Quarks make Tanks). Every enemy comes
+    out of a per-type EnemyPool.
+
+    Spawns made with spawn() are limited two ways. `budget` caps how many
+    enemies can be alive at once. `rate_limits` caps how many of a type
+    can spawn per second, as a token bucket that can save up one second's
+    worth. Refused spawns return None and are counted.
+    """
+
+    def __init__(self, screen_rect: pygame.Rect, enemy_group: pygame.sprite.AbstractGroup,
+                 add_enemy: Callable[[BaseEnemy], None], budget: int = 2000,
+                 rate_limits: dict[type[BaseEnemy], float] | None = None):
+        self.screen_rect = screen_rect
+        self.enemy_group = enemy_group
+        self.add_enemy = add_enemy
+        self.budget = budget
+        self.rate_limits = dict(rate_limits or {})
+        self.tokens = dict(self.rate_limits)
+
+        self.pools: dict[type[BaseEnemy], EnemyPool] = {}
+        self.spawned = 0
+        self.refused_budget = 0
+        self.refused_rate = 0
+
+    def pool(self, enemy_type: type[BaseEnemy]) -> EnemyPool:
+        pool = self.pools.get(enemy_type)
+        if pool is None:
+            pool = self.pools[enemy_type] = EnemyPool(enemy_type, self.screen_rect)
+        return pool
+
+    def acquire(self, enemy_type: type[BaseEnemy], pos: helper_funcs.CoordType) -> BaseEnemy:
+        """Gets an enemy from the pool without adding it anywhere or checking
+        any limits. For loading levels and restoring snapshots.
+        """
+
+        return self.pool(enemy_type).acquire(pos)
+
+    def set_rate_limit(self, enemy_type: type[BaseEnemy], per_second: float | None) -> None:
+        if per_second is None:
+            self.rate_limits.pop(enemy_type, None)
+            self.tokens.pop(enemy_type, None)
+        else:
+            self.rate_limits[enemy_type] = per_second
+            self.tokens[enemy_type] = per_second
+
+    def spawn(self, enemy_type: type[BaseEnemy], pos: helper_funcs.CoordType) -> BaseEnemy | None:
+        """Adds a new enemy to the game at `pos`, unless the budget or the
+        type's rate limit says no.
+        """
+
+        if len(self.enemy_group) >= self.budget:
+            self.refused_budget += 1
+            return None
+
+        if enemy_type in self.tokens:
+            if self.tokens[enemy_type] < 1:
+                self.refused_rate += 1
+                return None
+            self.tokens[enemy_type] -= 1
+
+        enemy = self.pool(enemy_type).acquire(pos)
+        self.add_enemy(enemy)
+        self.spawned += 1
+        return enemy
+
+    def update(self, delta: float) -> None:
+        """Call once per update, after everything that can kill an enemy."""
+
+        for enemy_type, per_second in self.rate_limits.items():
+            self.tokens[enemy_type] = min(per_second, self.tokens[enemy_type] + per_second * delta)
+
+        for pool in self.pools.values():
+            pool.end_frame()
+
+    def recycle_all(self) -> None:
+        for pool in self.pools.values():
+            pool.recycle_all()
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        stats = {
+            enemy_type.__name__: {
+                "created": pool.created,
+                "reused": pool.reused,
+                "free": len(pool.free),
+                "hit_rate": pool.hit_rate()
+            }
+            for enemy_type, pool in self.pools.items()
+        }
+        stats["spawner"] = {
+            "spawned": self.spawned,
+            "refused_budget": self.refused_budget,
+            "refused_rate": self.refused_rate
+        }
+        return stats
@@ -0,0 +1,57 @@
+import pygame
+
+
+class StaticGroup(pygame.sprite.Group):
+    """Group for sprites that never move (Electrodes). Remembers the rect of
+    every sprite that joins or leaves it, however that happens (add(),
+    kill(), empty()...), so the StaticLayer knows when and where it has to
+    be redrawn.
+    """
+
+    def __init__(self, *sprites):
+        self.changed_rects: list[pygame.Rect] = []
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None) -> None:
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        self.changed_rects.append(sprite.rect.copy())
+
+    def remove_internal(self, sprite) -> None:
+        pygame.sprite.Group.remove_internal(self, sprite)
+        self.changed_rects.append(sprite.rect.copy())
+
+
+class StaticLayer:
+    """The background with every static sprite already drawn on it. Drawing
+    a frame starts with one blit of this instead of a fill plus a blit per
+    static sprite, and the dirty rect renderer erases moving sprites with it
+    so the static ones under them come back for free.
+
+    Only redrawn when a static sprite is added or removed (or after
+    invalidate(), e.g. if they were moved by hand).
+    """
+
+    def __init__(self, background: pygame.Surface):
+        self.background = background
+        self.image = background.copy()
+        self.valid = False
+        self.rebuilds = 0
+
+    def invalidate(self) -> None:
+        self.valid = False
+
+    def refresh(self, group: StaticGroup) -> list[pygame.Rect]:
+        """Brings the image up to date with `group`. Returns the rects that
+        changed, the whole image if it was invalidated.
+        """
+
+        if self.valid and not group.changed_rects:
+            return []
+
+        changed = group.changed_rects if self.valid else [self.image.get_rect()]
+        group.changed_rects = []
+        self.valid = True
+        self.rebuilds += 1
+        self.image.blit(self.background, (0, 0))
+        group.draw(self.image)
+        return changed
@@ -0,0 +1,188 @@
+"""Plays thousands of headless games in parallel to help balance the game.
+Every combination of the parameters being swept is played with a number of
+different seeds, spread across a pool of worker processes. Summaries are
+streamed back as each game finishes and written out column by column at the
+end.
+
+    python sweep.py --games 100 --grunt-speed 80,100,120 --reload 0.15,0.2 --out results.json
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+from assets import library
+from director import LevelType
+from enemy import Electrode, Grunt
+from family import FamilyMember
+from player import Player
+from headless import HeadlessGame, random_input
+import helper_funcs
+import main
+
+# numpy is only needed to write .npz results
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Order of the columns in the results file
+COLUMNS = ("seed", "grunt_speed", "reload_timer_max", "spawn_min", "spawn_max",
+           "survived", "survival_time", "kills", "enemies_left", "frames", "wall_time")
+
+
+class GameConfig:
+    """Everything needed to set up and play one game. Has to be picklable
+    since it gets sent to the worker processes.
+    """
+
+    def __init__(self, seed: int, grunt_speed: float = 100, reload_timer_max: float = 0.2,
+                 spawn_min: float = 0.5, spawn_max: float = 1.0, num_grunts: int = 10,
+                 num_electrodes: int = 10, num_family: int = 5, max_frames: int = 60 * 60,
+                 delta: float = 1 / 60):
+        self.seed = seed
+        self.grunt_speed = grunt_speed
+        self.reload_timer_max = reload_timer_max
+        self.spawn_min = spawn_min
+        self.spawn_max = spawn_max
+        self.num_grunts = num_grunts
+        self.num_electrodes = num_electrodes
+        self.num_family = num_family
+        self.max_frames = max_frames
+        self.delta = delta
+
+    def build_level(self, rng) -> LevelType:
+        screen_rect = main.SCREEN_RECT
+        return {
+            Electrode:    helper_funcs.generate_rand_coords(screen_rect, self.num_electrodes, self.spawn_min, self.spawn_max, rng),
+            Grunt:        helper_funcs.generate_rand_coords(screen_rect, self.num_grunts, self.spawn_min, self.spawn_max, rng),
+            Player:       [screen_rect.center],
+            FamilyMember: helper_funcs.generate_rand_coords(screen_rect, self.num_family, self.spawn_min, self.spawn_max, rng)
+        }
+
+
+def init_worker() -> None:
+    """Runs once in each worker process. The asset library is per process,
+    so decoding the images here means none of the games have to.
+    """
+
+    library.preload_images([Grunt.image_path, Player.image_path])
+
+
+def play_game(config: GameConfig) -> dict[str, float | int | bool]:
+    """Plays one game until the player is hit or max_frames runs out and
+    returns a summary of it.
+    """
+
+    start = time.perf_counter()
+    game = HeadlessGame(config.seed, config.build_level,
+                        input_source=random_input(config.seed, config.max_frames),
+                        delta=config.delta)
+
+    director = game.director
+    director.reload_timer_max = config.reload_timer_max
+    for enemy in director.enemy_group:
+        if isinstance(enemy, Grunt):
+            enemy.speed = config.grunt_speed
+
+    frames = game.run(config.max_frames, until=lambda g: g.director.player_hit or not g.director.enemy_group)
+
+    return {
+        "seed": config.seed,
+        "grunt_speed": config.grunt_speed,
+        "reload_timer_max": config.reload_timer_max,
+        "spawn_min": config.spawn_min,
+        "spawn_max": config.spawn_max,
+        "survived": not director.player_hit,
+        "survival_time": game.time,
+        "kills": director.kills,
+        "enemies_left": len(director.enemy_group),
+        "frames": frames,
+        "wall_time": time.perf_counter() - start
+    }
+
+
+def make_configs(games: int, base_seed: int, grunt_speeds, reload_times, spawn_mins, spawn_maxes,
+                 max_frames: int) -> list[GameConfig]:
+    configs = []
+    seed = base_seed
+    for grunt_speed, reload_time, spawn_min, spawn_max in itertools.product(grunt_speeds, reload_times,
+                                                                          spawn_mins, spawn_maxes):
+        for _ in range(games):
+            configs.append(GameConfig(seed, grunt_speed, reload_time, spawn_min, spawn_max, max_frames=max_frames))
+            seed += 1
+    return configs
+
+
+def run_sweep(configs: list[GameConfig], processes: int | None = None, chunksize: int | None = None,
+              progress: bool = True) -> dict[str, list]:
+    """Plays every config across a process pool. Returns the results as a
+    dict of columns.
+    """
+
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        # Big enough to keep the workers from waiting on the pipe, small
+        # enough that the progress output still moves.
+        chunksize = max(1, len(configs) // (processes * 8))
+
+    columns = {name: [] for name in COLUMNS}
+    with multiprocessing.Pool(processes, initializer=init_worker) as pool:
+        for done, summary in enumerate(pool.imap_unordered(play_game, configs, chunksize), 1):
+            for name in COLUMNS:
+                columns[name].append(summary[name])
+            if progress and (done % max(1, len(configs) // 20) == 0 or done == len(configs)):
+                print(f"{done}/{len(configs)} games")
+    return columns
+
+
+def write_results(path: str, columns: dict[str, list]) -> None:
+    """Writes the results one column per array. .npz files need numpy,
+    anything else is written as JSON.
+    """
+
+    if path.endswith(".npz"):
+        if np is None:
+            raise ImportError("Writing .npz results requires numpy")
+        np.savez_compressed(path, **{name: np.asarray(values) for name, values in columns.items()})
+        return
+
+    with open(path, "w") as results_file:
+        json.dump({"columns": list(columns), "data": columns}, results_file)
+
+
+def parse_list(text: str) -> list[float]:
+    return [float(value) for value in text.split(",")]
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Play many headless games in parallel for balancing.")
+    parser.add_argument("--games", type=int, default=100, help="games per parameter combination")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--processes", type=int, default=None, help="defaults to the number of cores")
+    parser.add_argument("--frames", type=int, default=60 * 60, help="max frames per game")
+    parser.add_argument("--grunt-speed", type=parse_list, default=[100])
+    parser.add_argument("--reload", type=parse_list, default=[0.2], help="reload_timer_max values")
+    parser.add_argument("--spawn-min", type=parse_list, default=[0.5])
+    parser.add_argument("--spawn-max", type=parse_list, default=[1.0])
+    parser.add_argument("--out", default="sweep_results.json", help=".json or .npz")
+    args = parser.parse_args()
+
+    configs = make_configs(args.games, args.seed, args.grunt_speed, args.reload,
+                           args.spawn_min, args.spawn_max, args.frames)
+
+    start = time.perf_counter()
+    columns = run_sweep(configs, args.processes)
+    elapsed = time.perf_counter() - start
+
+    write_results(args.out, columns)
+    frames = sum(columns["frames"])
+    print(f"{len(configs)} games, {frames} frames in {elapsed:.1f}s ({frames / elapsed:.0f} frames/s), "
+          f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+class FixedTimestep:
+    """Turns the variable time between rendered frames into a whole number
+    of fixed size simulation steps, e.g. a 120 Hz simulation under a 60 Hz
+    display. Whatever time is left over (less than one step) is carried into
+    the next frame, and `alpha` says how far between the last two steps the
+    renderer should draw things.
+
+    If a frame took so long that catching up would need more than
+    `max_steps` steps, the extra time is thrown away (and added up in
+    `dropped`) instead of trying to catch up. Otherwise a slow frame makes
+    the next one slower still, and the game never recovers.
+    """
+
+    def __init__(self, sim_rate: float = 120, max_steps: int = 8):
+        if sim_rate <= 0:
+            raise ValueError("sim_rate must be positive")
+
+        self.sim_rate = sim_rate
+        self.step = 1 / sim_rate # Seconds per simulation step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+        self.steps_taken = 0 # Over the whole run, handy for the profiler
+        self.dropped = 0.0   # Seconds of game time skipped to avoid catching up
+
+    def advance(self, frame_delta: float) -> int:
+        """Adds the time since the last frame and returns how many steps the
+        simulation should take this frame (possibly 0).
+        """
+
+        self.accumulator += frame_delta
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.step
+            steps = self.max_steps
+
+        self.accumulator -= steps * self.step
+        # Anything still over a whole step here was skipped above
+        if self.accumulator >= self.step:
+            self.accumulator %= self.step
+
+        self.steps_taken += steps
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """How far through the next step the display is, from 0 to 1."""
+
+        return self.accumulator / self.step
+
+    def reset(self) -> None:
+        self.accumulator = 0.0